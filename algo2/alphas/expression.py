@@ -0,0 +1,369 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Alpha expressions: an alpha is built as a DAG of operator nodes
+(e.g. rank(delta(log(volume), 2))) rather than computed right away,
+so that a set of alphas can be evaluated in a single scheduled pass
+in which identical subexpressions, wherever they occur, are computed
+once and shared.
+"""
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+from collections import Counter
+import timeit
+
+import numpy as np
+
+from algo2.alphas import operators
+
+
+def _replace(df, old, new):
+    """
+    Replaces the values equal to old by new (DataFrame.replace).
+    """
+    return np.where(df == old, new, df)
+
+
+# elementwise operations: name -> (function, infix symbol or None)
+_ELEMENTWISE = {
+    "add": (np.add, "+"),
+    "sub": (np.subtract, "-"),
+    "mul": (np.multiply, "*"),
+    "div": (np.true_divide, "/"),
+    "pow": (np.power, "**"),
+    "lt": (np.less, "<"),
+    "le": (np.less_equal, "<="),
+    "gt": (np.greater, ">"),
+    "ge": (np.greater_equal, ">="),
+    "or": (np.logical_or, "|"),
+    "and": (np.logical_and, "&"),
+    "neg": (np.negative, None),
+    "abs": (np.abs, None),
+    "log": (np.log, None),
+    "sign": (np.sign, None),
+    "where": (np.where, None),
+    "replace": (_replace, None),
+}
+
+# time-series and cross-sectional operators, see algo2.alphas.operators
+_OPERATORS = (
+    "ts_sum", "sma", "stddev", "variance", "correlation", "covariance",
+    "ts_rank", "product", "ts_min", "ts_max", "ts_argmax", "ts_argmin",
+    "delay", "delta", "rank", "scale", "decay_linear", "pct_change",
+    "replace_nonfinite"
+)
+
+
+class Expression(object):
+    """
+    Node of an alpha expression DAG: an operation (see _ELEMENTWISE
+    and _OPERATORS, or "field" for the input data) applied to arguments,
+    either Expressions or constants (windows, factors, ...).
+
+    The key of a node identifies its whole subexpression, i.e. two
+    nodes with the same key compute the same values: built separately,
+    they are still evaluated once.
+    """
+    __slots__ = ("op", "args", "key")
+
+    def __init__(self, op, *args):
+        self.op = op
+        self.args = args
+        self.key = (op,) + tuple(
+            arg.key if isinstance(arg, Expression) else arg for arg in args
+        )
+
+    def __str__(self):
+        if self.op == "field":
+            return self.args[0]
+        args = [str(arg) for arg in self.args]
+        symbol = _ELEMENTWISE.get(self.op, (None, None))[1]
+        if symbol is not None:
+            return "(%s %s %s)" % (args[0], symbol, args[1])
+        if self.op == "neg":
+            return "-%s" % args[0]
+        return "%s(%s)" % (self.op, ", ".join(args))
+
+    def __repr__(self):
+        return "Expression(%s)" % self
+
+    def __add__(self, other):
+        return Expression("add", self, other)
+
+    def __radd__(self, other):
+        return Expression("add", other, self)
+
+    def __sub__(self, other):
+        return Expression("sub", self, other)
+
+    def __rsub__(self, other):
+        return Expression("sub", other, self)
+
+    def __mul__(self, other):
+        return Expression("mul", self, other)
+
+    def __rmul__(self, other):
+        return Expression("mul", other, self)
+
+    def __truediv__(self, other):
+        return Expression("div", self, other)
+
+    def __rtruediv__(self, other):
+        return Expression("div", other, self)
+
+    __div__ = __truediv__
+    __rdiv__ = __rtruediv__
+
+    def __pow__(self, other):
+        return Expression("pow", self, other)
+
+    def __abs__(self):
+        return Expression("abs", self)
+
+    def __neg__(self):
+        return Expression("neg", self)
+
+    def __lt__(self, other):
+        return Expression("lt", self, other)
+
+    def __le__(self, other):
+        return Expression("le", self, other)
+
+    def __gt__(self, other):
+        return Expression("gt", self, other)
+
+    def __ge__(self, other):
+        return Expression("ge", self, other)
+
+    def __or__(self, other):
+        return Expression("or", self, other)
+
+    def __and__(self, other):
+        return Expression("and", self, other)
+
+
+def field(name):
+    """
+    Input data, e.g. field("close").
+    """
+    return Expression("field", name)
+
+
+def abs_(x):
+    """
+    Absolute value, named abs_ not to shadow the builtin abs
+    (which builds the same node from an Expression).
+    """
+    return Expression("abs", x)
+
+
+def log(x):
+    return Expression("log", x)
+
+
+def sign(x):
+    return Expression("sign", x)
+
+
+def where(cond, x, y):
+    """
+    x where cond is True, else y.
+    """
+    return Expression("where", cond, x, y)
+
+
+def replace(x, old, new):
+    """
+    x with the values equal to old replaced by new.
+    """
+    return Expression("replace", x, old, new)
+
+
+def ts_sum(x, window=10):
+    return Expression("ts_sum", x, window)
+
+
+def sma(x, window=10):
+    return Expression("sma", x, window)
+
+
+def stddev(x, window=10):
+    return Expression("stddev", x, window)
+
+
+def variance(x, window=10):
+    return Expression("variance", x, window)
+
+
+def correlation(x, y, window=10):
+    return Expression("correlation", x, y, window)
+
+
+def covariance(x, y, window=10):
+    return Expression("covariance", x, y, window)
+
+
+def ts_rank(x, window=10):
+    return Expression("ts_rank", x, window)
+
+
+def product(x, window=10):
+    return Expression("product", x, window)
+
+
+def ts_min(x, window=10):
+    return Expression("ts_min", x, window)
+
+
+def ts_max(x, window=10):
+    return Expression("ts_max", x, window)
+
+
+def ts_argmax(x, window=10):
+    return Expression("ts_argmax", x, window)
+
+
+def ts_argmin(x, window=10):
+    return Expression("ts_argmin", x, window)
+
+
+def delay(x, period=1):
+    return Expression("delay", x, period)
+
+
+def delta(x, period=1):
+    return Expression("delta", x, period)
+
+
+def rank(x):
+    return Expression("rank", x)
+
+
+def scale(x, k=1):
+    return Expression("scale", x, k)
+
+
+def decay_linear(x, period=10):
+    return Expression("decay_linear", x, period)
+
+
+def pct_change(x):
+    return Expression("pct_change", x)
+
+
+def replace_nonfinite(x, value=0.0):
+    return Expression("replace_nonfinite", x, value)
+
+
+class EvaluationReport(object):
+    """
+    What an evaluation computed: the no. of operation nodes (i.e. not
+    fields) looked up while scheduling the expressions, of distinct
+    ones evaluated, and of cache hits, i.e. (sub)expressions found
+    already scheduled (their own subexpressions are then not looked
+    up), with the time spent per operation.
+    """
+    def __init__(self):
+        self.nodes = 0
+        self.evaluated = 0
+        self.hits = 0
+        self.shared = Counter()     # str(expression) -> hits
+        self.seconds = Counter()    # operation -> time spent
+
+    def __str__(self):
+        lines = [
+            "%d nodes, %d evaluated, %d cache hits (%.1f%%)" % (
+                self.nodes, self.evaluated, self.hits,
+                100.0 * self.hits / max(self.nodes, 1)
+            )
+        ]
+        for expression, hits in self.shared.most_common(10):
+            lines.append("  %4d x %s" % (hits, expression))
+        return "\n".join(lines)
+
+
+class Evaluator(object):
+    """
+    Evaluates sets of alpha expressions over the given fields (name ->
+    (time x ticker) array), each set in a single pass over their DAG:
+    the distinct nodes are evaluated once, in topological order, and
+    the intermediate values are dropped once their last consumer is
+    computed. The report of the last evaluation is kept in 'report'.
+    """
+    def __init__(self, fields):
+        self.fields = dict(
+            (name, operators.as_array(values)) for name, values in fields.items()
+        )
+        self.report = None
+
+    def _schedule(self, expressions, report):
+        """
+        Distinct nodes (by key) of the expressions, children first,
+        and the no. of their distinct consumers.
+        """
+        order = []
+        consumers = Counter()
+        seen = set()
+        for expression in expressions:
+            stack = [(expression, False)]
+            while stack:
+                node, expanded = stack.pop()
+                if expanded:
+                    order.append(node)
+                    continue
+                if node.key in seen:
+                    if node.op != "field":
+                        report.nodes += 1
+                        report.hits += 1
+                        report.shared[str(node)] += 1
+                    continue
+                if node.op != "field":
+                    report.nodes += 1
+                seen.add(node.key)
+                stack.append((node, True))
+                children = [arg for arg in node.args if isinstance(arg, Expression)]
+                for child in set(child.key for child in children):
+                    consumers[child] += 1
+                stack.extend((child, False) for child in reversed(children))
+        return order, consumers
+
+    def _apply(self, node, values):
+        """
+        Evaluates a node from the values of its arguments.
+        """
+        if node.op == "field":
+            return self.fields[node.args[0]]
+        args = [
+            values[arg.key] if isinstance(arg, Expression) else arg
+            for arg in node.args
+        ]
+        if node.op in _ELEMENTWISE:
+            return _ELEMENTWISE[node.op][0](*args)
+        if node.op in _OPERATORS:
+            return getattr(operators, node.op)(*args)
+        raise ValueError("Unknown operation %s" % node.op)
+
+    def evaluate(self, expressions):
+        """
+        Evaluates a dictionary of name -> Expression,
+        returns the dictionary of name -> array.
+        """
+        report = EvaluationReport()
+        outputs = set(expression.key for expression in expressions.values())
+        order, consumers = self._schedule(list(expressions.values()), report)
+        values = {}
+        with np.errstate(all="ignore"):
+            for node in order:
+                start = timeit.default_timer()
+                values[node.key] = self._apply(node, values)
+                report.seconds[node.op] += timeit.default_timer() - start
+                report.evaluated += node.op != "field"
+                for key in set(arg.key for arg in node.args if isinstance(arg, Expression)):
+                    consumers[key] -= 1
+                    if consumers[key] == 0 and key not in outputs:
+                        del values[key]
+        self.report = report
+        return dict(
+            (name, values[expression.key]) for name, expression in expressions.items()
+        )
@@ -0,0 +1,349 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Time-series and cross-sectional operators of the "101 Formulaic
+Alphas" (see samples/world_quant_101alphas.py), vectorized with NumPy
+over (time x ticker) float arrays.
+
+As the pandas versions (rolling with min_periods=window), a rolling
+operator is NaN for the first window-1 rows and wherever its window
+holds a NaN. Rolling sums use cumulative sums (one pass), the other
+rolling operators loop over the window's lags with whole-array
+operations, i.e. window passes and no Python call per element.
+"""
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import numpy as np
+
+
+def as_array(df):
+    """
+    (time x ticker) float64 array of a DataFrame or array-like.
+    """
+    return np.asarray(getattr(df, "values", df), dtype=np.float64)
+
+
+def _invalid_windows(a, window):
+    """
+    True where the window ending at a row is incomplete or holds a NaN.
+    """
+    nans = np.cumsum(np.isnan(a), axis=0)
+    invalid = np.ones(a.shape, dtype=bool)
+    if window <= len(a):
+        in_window = nans[window - 1:].copy()
+        in_window[1:] -= nans[:-window]
+        invalid[window - 1:] = in_window > 0
+    return invalid
+
+
+def _constant_windows(a, window):
+    """
+    True where all the values in the window ending at a row are
+    equal, via the length of the runs of equal consecutive values.
+    """
+    same = np.zeros(a.shape, dtype=np.int64)
+    same[1:] = a[1:] == a[:-1]
+    runs = np.cumsum(same, axis=0)
+    run_starts = np.maximum.accumulate(np.where(same == 0, runs, 0), axis=0)
+    return runs - run_starts >= window - 1
+
+
+def _centred(a, nan):
+    """
+    a minus its column means (over the non-NaN rows), 0 where NaN.
+    """
+    a = np.where(nan, 0.0, a)
+    counts = np.maximum((~nan).sum(axis=0), 1)
+    return np.where(nan, 0.0, a - a.sum(axis=0) / counts)
+
+
+def _rolling_sum(a, window):
+    """
+    Rolling sum of an array without NaN, via cumulative sums.
+    """
+    sums = np.full(a.shape, np.nan)
+    if window <= len(a):
+        csum = np.cumsum(a, axis=0)
+        sums[window - 1:] = csum[window - 1:]
+        sums[window:] -= csum[:-window]
+    return sums
+
+
+def _lagged(a, window, func, init):
+    """
+    Folds func(acc, lagged values, lag) over the window, oldest
+    value first, for the rows with a complete window.
+    """
+    n = len(a) - window + 1
+    out = np.full(a.shape, np.nan)
+    if n <= 0:
+        return out
+    acc = init(a[:n])
+    for j in range(1, window):
+        acc = func(acc, a[j:j + n], j)
+    out[window - 1:] = acc
+    return out
+
+
+def ts_sum(df, window=10):
+    """
+    Rolling sum over the past 'window' rows.
+    """
+    a = as_array(df)
+    sums = _rolling_sum(np.where(np.isnan(a), 0.0, a), window)
+    sums[_invalid_windows(a, window)] = np.nan
+    return sums
+
+
+def sma(df, window=10):
+    """
+    Simple Moving Average (i.e. rolling mean).
+    """
+    return ts_sum(df, window) / window
+
+
+def covariance(x, y, window=10, ddof=1):
+    """
+    Rolling covariance of x and y (rows where either is NaN excluded,
+    i.e. windows holding them are NaN).
+    """
+    x = as_array(x)
+    y = as_array(y)
+    nan = np.isnan(x) | np.isnan(y)
+    # centred on the column means to limit the cancellation
+    x = _centred(x, nan)
+    y = _centred(y, nan)
+    cov = (_rolling_sum(x * y, window) -
+           _rolling_sum(x, window) * _rolling_sum(y, window) / window) / (window - ddof)
+    cov[_invalid_windows(np.where(nan, np.nan, 0.0), window)] = np.nan
+    return cov
+
+
+def variance(df, window=10, ddof=1):
+    """
+    Rolling variance, exactly zero over constant windows.
+    """
+    a = as_array(df)
+    var = np.maximum(covariance(a, a, window, ddof), 0.0)
+    var[_constant_windows(a, window) & ~np.isnan(var)] = 0.0
+    return var
+
+
+def stddev(df, window=10):
+    """
+    Rolling standard deviation.
+    """
+    return np.sqrt(variance(df, window))
+
+
+def correlation(x, y, window=10):
+    """
+    Rolling correlation of x and y, clipped to [-1, 1] and NaN over
+    windows where either is constant (pandas gives NaN or +/-inf, from
+    rounding).
+    """
+    x = as_array(x)
+    y = as_array(y)
+    nan = np.isnan(x) | np.isnan(y)
+    x = np.where(nan, np.nan, x)
+    y = np.where(nan, np.nan, y)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        corr = covariance(x, y, window) / np.sqrt(variance(x, window) * variance(y, window))
+    np.clip(corr, -1.0, 1.0, out=corr)
+    corr[_constant_windows(x, window) | _constant_windows(y, window)] = np.nan
+    return corr
+
+
+def ts_rank(df, window=10):
+    """
+    Rolling rank of the last value within its window (from 1 to
+    window, ties averaged as per scipy.stats.rankdata).
+    """
+    a = as_array(df)
+    less = np.zeros(a.shape)
+    equal = np.zeros(a.shape)
+    for j in range(1, window):
+        less[j:] += a[:-j] < a[j:]
+        equal[j:] += a[:-j] == a[j:]
+    rank = less + 1 + equal / 2
+    rank[_invalid_windows(a, window)] = np.nan
+    return rank
+
+
+def product(df, window=10):
+    """
+    Rolling product.
+    """
+    return _lagged(
+        as_array(df), window, lambda acc, values, j: acc * values, np.copy
+    )
+
+
+def ts_min(df, window=10):
+    """
+    Rolling min.
+    """
+    return _lagged(
+        as_array(df), window, lambda acc, values, j: np.minimum(acc, values), np.copy
+    )
+
+
+def ts_max(df, window=10):
+    """
+    Rolling max.
+    """
+    return _lagged(
+        as_array(df), window, lambda acc, values, j: np.maximum(acc, values), np.copy
+    )
+
+
+def _ts_argextreme(df, window, better):
+    """
+    Which row (1 = oldest) of the window holds its extreme value,
+    the first one if repeated.
+    """
+    a = as_array(df)
+    n = len(a) - window + 1
+    out = np.full(a.shape, np.nan)
+    if n <= 0:
+        return out
+    best = a[:n].copy()
+    where = np.ones(best.shape)
+    for j in range(1, window):
+        values = a[j:j + n]
+        update = better(values, best)
+        best[update] = values[update]
+        where[update] = j + 1
+    out[window - 1:] = where
+    out[_invalid_windows(a, window)] = np.nan
+    return out
+
+
+def ts_argmax(df, window=10):
+    """
+    Which day ts_max(df, window) occurred on.
+    """
+    return _ts_argextreme(df, window, np.greater)
+
+
+def ts_argmin(df, window=10):
+    """
+    Which day ts_min(df, window) occurred on.
+    """
+    return _ts_argextreme(df, window, np.less)
+
+
+def delay(df, period=1):
+    """
+    Lag: the value 'period' rows ago.
+    """
+    a = as_array(df)
+    out = np.full(a.shape, np.nan)
+    if period < len(a):
+        out[period:] = a[:len(a) - period]
+    return out
+
+
+def delta(df, period=1):
+    """
+    Difference: today's value minus the value 'period' rows ago.
+    """
+    return as_array(df) - delay(df, period)
+
+
+def rank(df):
+    """
+    Cross-sectional rank, in percent of the non-NaN values of each
+    row (ties averaged), as DataFrame.rank(axis=1, pct=True).
+    """
+    a = as_array(df)
+    if a.size == 0:
+        return a.copy()
+    order = np.argsort(a, axis=1, kind="mergesort")    # NaN last
+    values = np.take_along_axis(a, order, axis=1)
+    positions = np.broadcast_to(np.arange(a.shape[1]), a.shape)
+    # first and last positions of each run of ties
+    starts = np.ones(a.shape, dtype=bool)
+    starts[:, 1:] = values[:, 1:] != values[:, :-1]
+    ends = np.ones(a.shape, dtype=bool)
+    ends[:, :-1] = starts[:, 1:]
+    first = np.maximum.accumulate(np.where(starts, positions, 0), axis=1)
+    last = np.minimum.accumulate(
+        np.where(ends, positions, a.shape[1])[:, ::-1], axis=1
+    )[:, ::-1]
+    ranks = np.empty(a.shape)
+    np.put_along_axis(ranks, order, (first + last) / 2 + 1, axis=1)
+
+    nan = np.isnan(a)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ranks /= (~nan).sum(axis=1, keepdims=True)
+    ranks[nan] = np.nan
+    return ranks
+
+
+def scale(df, k=1):
+    """
+    Rescaled df such that sum(abs(df)) = k, over each column.
+    """
+    a = as_array(df)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return a * k / np.nansum(np.abs(a), axis=0)
+
+
+def ffill(df):
+    """
+    Forward fills NaN along time (leading NaN are kept).
+    """
+    a = as_array(df)
+    nan = np.isnan(a)
+    if not nan.any():
+        return a.copy()
+    rows = np.where(nan, 0, np.arange(len(a))[:, None])
+    return a[np.maximum.accumulate(rows, axis=0), np.arange(a.shape[1])]
+
+
+def fill_nan(df):
+    """
+    Forward, then backward, fills NaN along time, then with 0.
+    """
+    a = ffill(df)
+    nan = np.isnan(a)
+    if not nan.any():
+        return a
+    rows = np.where(nan, len(a) - 1, np.arange(len(a))[:, None])
+    a = a[np.minimum.accumulate(rows[::-1], axis=0)[::-1], np.arange(a.shape[1])]
+    a[np.isnan(a)] = 0.0
+    return a
+
+
+def decay_linear(df, period=10):
+    """
+    Linear weighted moving average (weights 1..period, the latest
+    the heaviest), on NaN-filled data; as in the original, the first
+    period-1 rows are the (filled) values themselves.
+    """
+    a = fill_nan(df)
+    weights = (np.arange(period) + 1.0) / (period * (period + 1) / 2)
+    out = _lagged(a, period, lambda acc, values, j: acc + values * weights[j],
+                  lambda values: values * weights[0])
+    out[:period - 1] = a[:period - 1]
+    return out
+
+
+def pct_change(df):
+    """
+    Percentage change from the previous row, over forward filled
+    values, as DataFrame.pct_change().
+    """
+    filled = ffill(df)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return filled / delay(filled) - 1
+
+
+def replace_nonfinite(df, value=0.0):
+    """
+    Replaces inf, -inf and NaN by value.
+    """
+    a = as_array(df)
+    return np.where(np.isfinite(a), a, value)
@@ -0,0 +1,350 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Streaming versions of the alpha operators, for live use: an operator
+is fed one new row (the values of all the tickers at a date) at a
+time and returns its newest output row, equal to the last row of the
+batch operator (see algo2.alphas.operators) over the whole history.
+
+An operator keeps O(window) state per ticker and updates it in O(1)
+amortized per row, vectorized over the tickers. Running sums are
+re-computed from the window each time it wraps around, so that
+rounding errors do not accumulate (as algo2.rolling.RollingWindow).
+"""
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+from abc import ABCMeta, abstractmethod
+
+import numpy as np
+
+from algo2.alphas.operators import as_array
+
+
+class StreamingOperator(object):
+    """
+    Base class of the streaming operators.
+    """
+
+    __metaclass__ = ABCMeta
+
+    @abstractmethod
+    def update(self, *rows):
+        """
+        Takes the new row of each input (values by ticker),
+        returns the new row of the operator.
+        """
+        raise NotImplementedError("Should implement update()")
+
+
+class _Window(object):
+    """
+    Ring buffer of the last 'window' rows.
+    """
+    def __init__(self, window):
+        if window < 1:
+            raise ValueError("window must be positive, got %s" % window)
+        self.window = window
+        self.values = None      # (window x ticker), created on the first row
+        self.count = 0          # no. of rows pushed so far
+
+    def push(self, row):
+        """
+        Adds a row, returns the one dropped (None while filling up).
+        """
+        if self.values is None:
+            self.values = np.full((self.window,) + row.shape, np.nan)
+        i = self.count % self.window
+        old = self.values[i].copy() if self.count >= self.window else None
+        self.values[i] = row
+        self.count += 1
+        return old
+
+    def is_full(self):
+        return self.count >= self.window
+
+    def wrapped(self):
+        """
+        True if the last push completed a turn of the ring buffer.
+        """
+        return self.count % self.window == 0
+
+
+class _Runs(object):
+    """
+    Length of the current run of equal consecutive values, by ticker.
+    """
+    def __init__(self):
+        self.last = None
+        self.length = None
+
+    def update(self, row):
+        if self.last is None:
+            self.length = np.zeros(row.shape, dtype=np.int64)
+        else:
+            self.length = np.where(row == self.last, self.length + 1, 0)
+        self.last = row
+
+    def constant(self, window):
+        """
+        True where the last 'window' values are all equal.
+        """
+        return self.length >= window - 1
+
+
+class StreamingSum(StreamingOperator):
+    """
+    Rolling sum over the past 'window' rows, see operators.ts_sum.
+    """
+    def __init__(self, window=10):
+        self._window = _Window(window)
+        self._sum = 0.0
+        self._nans = 0
+
+    def update(self, x):
+        x = as_array(x)
+        nan = np.isnan(x)
+        old = self._window.push(x)
+        self._sum = self._sum + np.where(nan, 0.0, x)
+        self._nans = self._nans + nan
+        if old is not None:
+            old_nan = np.isnan(old)
+            self._sum -= np.where(old_nan, 0.0, old)
+            self._nans -= old_nan
+        if self._window.wrapped():
+            values = self._window.values
+            self._sum = np.where(np.isnan(values), 0.0, values).sum(axis=0)
+        out = self._sum.copy()
+        if not self._window.is_full():
+            out[:] = np.nan
+        out[self._nans > 0] = np.nan
+        return out
+
+
+class StreamingMean(StreamingSum):
+    """
+    Rolling mean, see operators.sma.
+    """
+    def update(self, x):
+        return super(StreamingMean, self).update(x) / self._window.window
+
+
+class StreamingCovariance(StreamingOperator):
+    """
+    Rolling covariance of x and y, see operators.covariance.
+
+    The sums are kept shifted by an anchor (per ticker) close to the
+    window means, re-set on each wrap around, to limit cancellation.
+    """
+    def __init__(self, window=10, ddof=1):
+        self.ddof = ddof
+        self._x = _Window(window)
+        self._y = _Window(window)
+        self._runs_x = _Runs()
+        self._runs_y = _Runs()
+        self._anchors = (0.0, 0.0)
+        self._sums = None       # [x, y, x * x, y * y, x * y] shifted
+        self._nans = 0
+
+    def _shifted(self, x, y):
+        """
+        The terms of the sums for rows x and y (0 where either is NaN).
+        """
+        nan = np.isnan(x) | np.isnan(y)
+        x = np.where(nan, 0.0, x - self._anchors[0])
+        y = np.where(nan, 0.0, y - self._anchors[1])
+        return [x, y, x * x, y * y, x * y], nan
+
+    def _resync(self):
+        """
+        Re-sets the anchors to the window means, re-computes the sums.
+        """
+        x, y = self._x.values, self._y.values
+        valid = ~(np.isnan(x) | np.isnan(y))
+        counts = np.maximum(valid.sum(axis=0), 1)
+        self._anchors = (
+            np.where(valid, x, 0.0).sum(axis=0) / counts,
+            np.where(valid, y, 0.0).sum(axis=0) / counts
+        )
+        terms, _ = self._shifted(x, y)
+        self._sums = [term.sum(axis=0) for term in terms]
+
+    def _push(self, x, y):
+        """
+        Adds rows x and y to the windows and sums.
+        """
+        x = as_array(x)
+        y = as_array(y)
+        self._runs_x.update(x)
+        self._runs_y.update(y)
+        old_x = self._x.push(x)
+        old_y = self._y.push(y)
+        terms, nan = self._shifted(x, y)
+        if self._sums is None:
+            self._sums = terms
+        else:
+            self._sums = [s + term for s, term in zip(self._sums, terms)]
+        self._nans = self._nans + nan
+        if old_x is not None:
+            terms, nan = self._shifted(old_x, old_y)
+            self._sums = [s - term for s, term in zip(self._sums, terms)]
+            self._nans = self._nans - nan
+        if self._x.wrapped():
+            self._resync()
+
+    def _moment(self, i, j):
+        """
+        Covariance from the sums of the i-th and j-th inputs.
+        """
+        window = self._x.window
+        sums = self._sums
+        products = {(0, 0): sums[2], (1, 1): sums[3], (0, 1): sums[4]}[(i, j)]
+        out = (products - sums[i] * sums[j] / window) / (window - self.ddof)
+        if not self._x.is_full():
+            out[:] = np.nan
+        out[self._nans > 0] = np.nan
+        return out
+
+    def _variance(self, i):
+        runs = (self._runs_x, self._runs_y)[i]
+        var = np.maximum(self._moment(i, i), 0.0)
+        var[runs.constant(self._x.window) & ~np.isnan(var)] = 0.0
+        return var
+
+    def update(self, x, y):
+        self._push(x, y)
+        return self._moment(0, 1)
+
+
+class StreamingVariance(StreamingCovariance):
+    """
+    Rolling variance, see operators.variance.
+    """
+    def update(self, x):
+        self._push(x, x)
+        return self._variance(0)
+
+
+class StreamingStddev(StreamingVariance):
+    """
+    Rolling standard deviation, see operators.stddev.
+    """
+    def __init__(self, window=10):
+        super(StreamingStddev, self).__init__(window)
+
+    def update(self, x):
+        return np.sqrt(super(StreamingStddev, self).update(x))
+
+
+class StreamingCorrelation(StreamingCovariance):
+    """
+    Rolling correlation of x and y, see operators.correlation.
+    """
+    def __init__(self, window=10):
+        super(StreamingCorrelation, self).__init__(window)
+
+    def update(self, x, y):
+        self._push(x, y)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = self._moment(0, 1) / np.sqrt(self._variance(0) * self._variance(1))
+        np.clip(corr, -1.0, 1.0, out=corr)
+        window = self._x.window
+        corr[self._runs_x.constant(window) | self._runs_y.constant(window)] = np.nan
+        return corr
+
+
+class StreamingMin(StreamingOperator):
+    """
+    Rolling min, see operators.ts_min.
+
+    van Herk/Gil-Werman: the window ending at a row spans the end of
+    the previous block of 'window' rows and the start of the current
+    one, i.e. its min is that of a suffix min of the previous block
+    (computed once per block) and of the running prefix min.
+    """
+    _reduce = staticmethod(np.minimum)
+
+    def __init__(self, window=10):
+        self._window = _Window(window)
+        self._prefix = None
+        self._suffixes = None
+
+    def update(self, x):
+        x = as_array(x)
+        window = self._window
+        i = window.count % window.window
+        self._prefix = x.copy() if i == 0 else self._reduce(self._prefix, x)
+        window.push(x)
+        if not window.is_full():
+            return np.full(x.shape, np.nan)
+        if i == window.window - 1:
+            self._suffixes = self._reduce.accumulate(window.values[::-1], axis=0)[::-1]
+            return self._prefix.copy()
+        return self._reduce(self._suffixes[i + 1], self._prefix)
+
+
+class StreamingMax(StreamingMin):
+    """
+    Rolling max, see operators.ts_max.
+    """
+    _reduce = staticmethod(np.maximum)
+
+
+class StreamingDelay(StreamingOperator):
+    """
+    Lag: the value 'period' rows ago, see operators.delay.
+    """
+    def __init__(self, period=1):
+        self._window = _Window(period)
+
+    def update(self, x):
+        x = as_array(x)
+        old = self._window.push(x)
+        return np.full(x.shape, np.nan) if old is None else old
+
+
+class StreamingDelta(StreamingDelay):
+    """
+    Difference: the value minus the one 'period' rows ago,
+    see operators.delta.
+    """
+    def update(self, x):
+        x = as_array(x)
+        return x - super(StreamingDelta, self).update(x)
+
+
+class StreamingDecayLinear(StreamingOperator):
+    """
+    Linear weighted moving average, see operators.decay_linear.
+
+    NaN are forward filled, else 0: unlike the batch operator, leading
+    NaN can not be back filled from the values to come.
+    """
+    def __init__(self, period=10):
+        self._window = _Window(period)
+        self._last = None       # last value, by ticker
+        self._sum = 0.0
+        self._weighted = 0.0    # sum of the values by their weights 1..period
+
+    def update(self, x):
+        x = as_array(x)
+        if self._last is None:
+            self._last = np.zeros(x.shape)
+        x = np.where(np.isnan(x), self._last, x)
+        self._last = x
+        window = self._window
+        period = window.window
+        old = window.push(x)
+        if old is None:
+            self._weighted = self._weighted + window.count * x
+            self._sum = self._sum + x
+        else:
+            self._weighted = self._weighted - self._sum + period * x
+            self._sum = self._sum - old + x
+        if window.wrapped():
+            # oldest row first, as the buffer just wrapped around
+            self._sum = window.values.sum(axis=0)
+            self._weighted = np.arange(1.0, period + 1).dot(window.values)
+        if not window.is_full():
+            return x.copy()
+        return self._weighted / (period * (period + 1) / 2)
@@ -0,0 +1,404 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Alphas of the "101 Formulaic Alphas"
+(source: https://papers.ssrn.com/sol3/papers.cfm?abstract_id=2701346),
+as in samples/world_quant_101alphas.py, but built as expressions (see
+algo2.alphas.expression) computed with the vectorized operators over
+(time x ticker) arrays, so that the intermediates they have in common
+(e.g. sma(volume, 20)) are computed once per evaluation.
+"""
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+from collections import OrderedDict
+
+import pandas as pd
+
+from algo2.alphas.expression import (
+    Evaluator, abs_, correlation, covariance, decay_linear, delay, delta,
+    field, log, pct_change, rank, replace, replace_nonfinite, scale, sign,
+    sma, stddev, ts_argmax, ts_max, ts_min, ts_rank, ts_sum, where
+)
+
+OPEN = field("open")
+HIGH = field("high")
+LOW = field("low")
+CLOSE = field("close")
+VOLUME = field("volume")
+RETURNS = pct_change(CLOSE)
+
+# alpha name -> function building its expression
+FORMULAS = OrderedDict()
+
+
+def _formula(func):
+    FORMULAS[func.__name__] = func
+    return func
+
+
+@_formula
+def alpha001():
+    inner = where(RETURNS < 0, stddev(RETURNS, 20), CLOSE)
+    return rank(ts_argmax(inner ** 2, 5))
+
+
+@_formula
+def alpha002():
+    df = -1 * correlation(rank(delta(log(VOLUME), 2)), rank((CLOSE - OPEN) / OPEN), 6)
+    return replace_nonfinite(df)
+
+
+@_formula
+def alpha003():
+    df = -1 * correlation(rank(OPEN), rank(VOLUME), 10)
+    return replace_nonfinite(df)
+
+
+@_formula
+def alpha004():
+    return -1 * ts_rank(rank(LOW), 9)
+
+
+@_formula
+def alpha006():
+    df = -1 * correlation(OPEN, VOLUME, 10)
+    return replace_nonfinite(df)
+
+
+@_formula
+def alpha007():
+    adv20 = sma(VOLUME, 20)
+    alpha = -1 * ts_rank(abs_(delta(CLOSE, 7)), 60) * sign(delta(CLOSE, 7))
+    return where(adv20 >= VOLUME, -1, alpha)
+
+
+@_formula
+def alpha008():
+    inner = ts_sum(OPEN, 5) * ts_sum(RETURNS, 5)
+    return -1 * rank(inner - delay(inner, 10))
+
+
+@_formula
+def alpha009():
+    delta_close = delta(CLOSE, 1)
+    cond_1 = ts_min(delta_close, 5) > 0
+    cond_2 = ts_max(delta_close, 5) < 0
+    return where(cond_1 | cond_2, delta_close, -1 * delta_close)
+
+
+@_formula
+def alpha010():
+    delta_close = delta(CLOSE, 1)
+    cond_1 = ts_min(delta_close, 4) > 0
+    cond_2 = ts_max(delta_close, 4) < 0
+    return where(cond_1 | cond_2, delta_close, -1 * delta_close)
+
+
+@_formula
+def alpha012():
+    return sign(delta(VOLUME, 1)) * (-1 * delta(CLOSE, 1))
+
+
+@_formula
+def alpha013():
+    return -1 * rank(covariance(rank(CLOSE), rank(VOLUME), 5))
+
+
+@_formula
+def alpha014():
+    df = replace_nonfinite(correlation(OPEN, VOLUME, 10))
+    return -1 * rank(delta(RETURNS, 3)) * df
+
+
+@_formula
+def alpha015():
+    df = replace_nonfinite(correlation(rank(HIGH), rank(VOLUME), 3))
+    return -1 * ts_sum(rank(df), 3)
+
+
+@_formula
+def alpha016():
+    return -1 * rank(covariance(rank(HIGH), rank(VOLUME), 5))
+
+
+@_formula
+def alpha017():
+    adv20 = sma(VOLUME, 20)
+    return -1 * (rank(ts_rank(CLOSE, 10)) *
+                 rank(delta(delta(CLOSE, 1), 1)) *
+                 rank(ts_rank((VOLUME / adv20), 5)))
+
+
+@_formula
+def alpha018():
+    df = replace_nonfinite(correlation(CLOSE, OPEN, 10))
+    return -1 * (rank((stddev(abs_((CLOSE - OPEN)), 5) + (CLOSE - OPEN)) +
+                      df))
+
+
+@_formula
+def alpha019():
+    return ((-1 * sign((CLOSE - delay(CLOSE, 7)) + delta(CLOSE, 7))) *
+            (1 + rank(1 + ts_sum(RETURNS, 250))))
+
+
+@_formula
+def alpha020():
+    return -1 * (rank(OPEN - delay(HIGH, 1)) *
+                 rank(OPEN - delay(CLOSE, 1)) *
+                 rank(OPEN - delay(LOW, 1)))
+
+
+@_formula
+def alpha021():
+    cond_1 = sma(CLOSE, 8) + stddev(CLOSE, 8) < sma(CLOSE, 2)
+    cond_2 = sma(VOLUME, 20) / VOLUME < 1
+    return where(cond_1 | cond_2, -1.0, 1.0)
+
+
+@_formula
+def alpha022():
+    df = replace_nonfinite(correlation(HIGH, VOLUME, 5))
+    return -1 * delta(df, 5) * rank(stddev(CLOSE, 20))
+
+
+@_formula
+def alpha023():
+    cond = sma(HIGH, 20) < HIGH
+    return where(cond, -1 * delta(HIGH, 2), 0.0)
+
+
+@_formula
+def alpha024():
+    cond = delta(sma(CLOSE, 100), 100) / delay(CLOSE, 100) <= 0.05
+    return where(cond, -1 * (CLOSE - ts_min(CLOSE, 100)), -1 * delta(CLOSE, 3))
+
+
+@_formula
+def alpha026():
+    df = replace_nonfinite(correlation(ts_rank(VOLUME, 5), ts_rank(HIGH, 5), 5))
+    return -1 * ts_max(df, 3)
+
+
+@_formula
+def alpha028():
+    adv20 = sma(VOLUME, 20)
+    df = replace_nonfinite(correlation(adv20, LOW, 5))
+    return scale(((df + ((HIGH + LOW) / 2)) - CLOSE))
+
+
+@_formula
+def alpha029():
+    return (ts_min(rank(rank(scale(log(ts_sum(rank(rank(-1 * rank(delta((CLOSE - 1), 5)))), 2))))), 5) +
+            ts_rank(delay((-1 * RETURNS), 6), 5))
+
+
+@_formula
+def alpha030():
+    delta_close = delta(CLOSE, 1)
+    inner = sign(delta_close) + sign(delay(delta_close, 1)) + sign(delay(delta_close, 2))
+    return ((1.0 - rank(inner)) * ts_sum(VOLUME, 5)) / ts_sum(VOLUME, 20)
+
+
+@_formula
+def alpha031():
+    adv20 = sma(VOLUME, 20)
+    df = replace_nonfinite(correlation(adv20, LOW, 12))
+    return ((rank(rank(rank(decay_linear((-1 * rank(rank(delta(CLOSE, 10)))), 10)))) +
+             rank((-1 * delta(CLOSE, 3)))) + sign(scale(df)))
+
+
+@_formula
+def alpha033():
+    return rank(-1 + (OPEN / CLOSE))
+
+
+@_formula
+def alpha034():
+    inner = replace_nonfinite(stddev(RETURNS, 2) / stddev(RETURNS, 5), 1)
+    return rank(2 - rank(inner) - rank(delta(CLOSE, 1)))
+
+
+@_formula
+def alpha035():
+    return ((ts_rank(VOLUME, 32) *
+             (1 - ts_rank(CLOSE + HIGH - LOW, 16))) *
+            (1 - ts_rank(RETURNS, 32)))
+
+
+@_formula
+def alpha037():
+    return rank(correlation(delay(OPEN - CLOSE, 1), CLOSE, 200)) + rank(OPEN - CLOSE)
+
+
+@_formula
+def alpha038():
+    inner = replace_nonfinite(CLOSE / OPEN, 1)
+    return -1 * rank(ts_rank(OPEN, 10)) * rank(inner)
+
+
+@_formula
+def alpha039():
+    adv20 = sma(VOLUME, 20)
+    return ((-1 * rank(delta(CLOSE, 7) * (1 - rank(decay_linear(VOLUME / adv20, 9))))) *
+            (1 + rank(ts_sum(RETURNS, 250))))
+
+
+@_formula
+def alpha040():
+    return -1 * rank(stddev(HIGH, 10)) * correlation(HIGH, VOLUME, 10)
+
+
+@_formula
+def alpha043():
+    adv20 = sma(VOLUME, 20)
+    return ts_rank(VOLUME / adv20, 20) * ts_rank((-1 * delta(CLOSE, 7)), 8)
+
+
+@_formula
+def alpha044():
+    df = replace_nonfinite(correlation(HIGH, rank(VOLUME), 5))
+    return -1 * df
+
+
+@_formula
+def alpha045():
+    df = replace_nonfinite(correlation(CLOSE, VOLUME, 2))
+    return -1 * (rank(sma(delay(CLOSE, 5), 20)) * df *
+                 rank(correlation(ts_sum(CLOSE, 5), ts_sum(CLOSE, 20), 2)))
+
+
+def _close_trend():
+    """
+    Inner term of alpha046, alpha049 and alpha051.
+    """
+    return (((delay(CLOSE, 20) - delay(CLOSE, 10)) / 10) -
+            ((delay(CLOSE, 10) - CLOSE) / 10))
+
+
+@_formula
+def alpha046():
+    inner = _close_trend()
+    alpha = where(inner < 0, 1, -1 * delta(CLOSE))
+    return where(inner > 0.25, -1, alpha)
+
+
+@_formula
+def alpha049():
+    inner = _close_trend()
+    return where(inner < -0.1, 1, -1 * delta(CLOSE))
+
+
+@_formula
+def alpha051():
+    inner = _close_trend()
+    return where(inner < -0.05, 1, -1 * delta(CLOSE))
+
+
+@_formula
+def alpha052():
+    return (((-1 * delta(ts_min(LOW, 5), 5)) *
+             rank(((ts_sum(RETURNS, 240) - ts_sum(RETURNS, 20)) / 220))) * ts_rank(VOLUME, 5))
+
+
+@_formula
+def alpha053():
+    inner = replace(CLOSE - LOW, 0, 0.0001)
+    return -1 * delta((((CLOSE - LOW) - (HIGH - CLOSE)) / inner), 9)
+
+
+@_formula
+def alpha054():
+    inner = replace(LOW - HIGH, 0, -0.0001)
+    return -1 * (LOW - CLOSE) * (OPEN ** 5) / (inner * (CLOSE ** 5))
+
+
+@_formula
+def alpha055():
+    divisor = replace(ts_max(HIGH, 12) - ts_min(LOW, 12), 0, 0.0001)
+    inner = (CLOSE - ts_min(LOW, 12)) / divisor
+    df = correlation(rank(inner), rank(VOLUME), 6)
+    return -1 * replace_nonfinite(df)
+
+
+@_formula
+def alpha060():
+    divisor = replace(HIGH - LOW, 0, 0.0001)
+    inner = ((CLOSE - LOW) - (HIGH - CLOSE)) * VOLUME / divisor
+    return -((2 * scale(rank(inner))) - scale(rank(ts_argmax(CLOSE, 10))))
+
+
+class Alphas(object):
+    """
+    The alphas of a universe, from its (time x ticker) open, high,
+    low, close and volume DataFrames (or arrays), all of the same shape.
+
+    compute evaluates a set of alphas (by default all of them) in a
+    single pass, sharing their common subexpressions, and keeps the
+    evaluation report (e.g. cache hits) in 'report'; each alphaNNN
+    method computes one alpha. Alphas are returned as DataFrames with
+    the index and columns of close; the input data are never modified.
+    """
+    FIELDS = ("Open", "High", "Low", "Close", "Volume")
+
+    def __init__(self, open, high, low, close, volume):
+        self.index = getattr(close, "index", None)
+        self.columns = getattr(close, "columns", None)
+        self.evaluator = Evaluator({
+            "open": open, "high": high, "low": low, "close": close, "volume": volume
+        })
+
+    @classmethod
+    def from_tickers_data(cls, tickers_data):
+        """
+        Alphas from a dictionary of the tickers' price DataFrames
+        (with Open, High, Low, Close and Volume columns, e.g. the
+        tickers_data of a bar data handler), aligned on their dates.
+        """
+        fields = [
+            pd.DataFrame(dict(
+                (ticker, df[field_name]) for ticker, df in tickers_data.items()
+            ))
+            for field_name in cls.FIELDS
+        ]
+        return cls(*fields)
+
+    @property
+    def report(self):
+        """
+        EvaluationReport of the last computation.
+        """
+        return self.evaluator.report
+
+    @staticmethod
+    def expressions(names=None):
+        """
+        Dictionary of alpha name -> Expression (all the alphas by default).
+        """
+        if names is None:
+            names = FORMULAS.keys()
+        return OrderedDict((name, FORMULAS[name]()) for name in names)
+
+    def compute(self, names=None):
+        """
+        Computes the alphas (all of them by default) in a single pass,
+        returns the dictionary of alpha name -> DataFrame.
+        """
+        values = self.evaluator.evaluate(self.expressions(names))
+        return OrderedDict(
+            (name, pd.DataFrame(values[name], index=self.index, columns=self.columns))
+            for name in values
+        )
+
+
+def _alpha_method(name):
+    def alpha(self):
+        return self.compute([name])[name]
+    alpha.__name__ = str(name)
+    alpha.__doc__ = "%s, see FORMULAS." % name
+    return alpha
+
+
+for _name in FORMULAS:
+    setattr(Alphas, _name, _alpha_method(_name))
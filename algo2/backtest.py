@@ -3,8 +3,8 @@
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
-from algo2.utilities import queue
 from algo2.event import EventType
+from algo2.event_bus import as_event_bus
 import datetime as dt
 
 
@@ -13,12 +13,22 @@ class Backtest(object):
     """
     Encapsulates the settings and components for
     carrying out an event-driven backtesting.
+
+    If 'batch_timestamps' is True, the data handler streams all the
+    bars of a timestamp at once (see stream_next_timestamp), these
+    are passed to the position sizer and strategy only, and the portfolio is re-valued
+    and statistics sampled once per timestamp, when all its events
+    (incl. the resulting fills) have been handled, rather than on
+    every market event. In this mode portfolio.equity is refreshed
+    only by trades during a timestamp, and the equity sampled at a
+    timestamp is marked at its prices, after its fills.
     """
     def __init__(
         self, data_handler,
         strategy, portfolio_handler, broker,
         position_sizer, risk_manager,
-        statistics, equity
+        statistics, equity,
+        batch_timestamps=False
     ):
         """
         Set up backtesting variables according to
@@ -32,44 +42,117 @@ class Backtest(object):
         self.risk_manager = risk_manager
         self.statistics = statistics
         self.equity = equity
+        self.batch_timestamps = batch_timestamps
 
-        self.events_queue = data_handler.events_queue   # i.e. = queue.Queue()
+        # i.e. = DequeEventBus(), or a queue.Queue wrapped in a QueueEventBus
+        self.events_queue = as_event_bus(data_handler.events_queue)
         self.cur_time = None
 
         self.signals = 0; self.orders = 0; self.fills = 0   # no Py8 inspection
 
+        # dispatch table: event.type -> handler
+        on_market_event = self._on_market_event_batch if batch_timestamps else self._on_market_event
+        # futures positions are settled daily, see _end_of_day
+        self.settle_daily = getattr(portfolio_handler.portfolio, "futures", None) is not None
+        self.cur_date = None
+        self.handlers = {
+            EventType.TICK: on_market_event,
+            EventType.BAR: on_market_event,
+            EventType.SIGNAL: self._on_signal_event,
+            EventType.ORDER: self._on_order_event,
+            EventType.FILL: self._on_fill_event,
+        }
+
+    def _on_market_event(self, event):
+        if self.settle_daily:
+            self._check_new_day(event.time)
+        self.cur_time = event.time
+        # the position sizer sees the market data before the strategy
+        # (see AbstractPositionSizer.on_market_event)
+        self.position_sizer.on_market_event(event)
+        self.strategy.calculate_signals(event)
+        self.portfolio_handler.update_portfolio_value(event.ticker)
+        self.statistics.update(event.time, self.portfolio_handler)  # TODO: move down?
+
+    def _on_market_event_batch(self, event):
+        if self.settle_daily:
+            self._check_new_day(event.time)
+        self.cur_time = event.time
+        self.position_sizer.on_market_event(event)
+        self.strategy.calculate_signals(event)
+
+    def _check_new_day(self, time):
+        """
+        Calls the end-of-day hook at the first market event of a new day.
+        """
+        date = time.date()
+        if date != self.cur_date:
+            if self.cur_date is not None:
+                self._end_of_day()
+            self.cur_date = date
+
+    def _end_of_day(self):
+        """
+        End-of-day hook, called before the first market event of the
+        next day is handled and at the end of the backtest (if the
+        portfolio trades futures): settles the futures positions at
+        the prices they were last marked at (see Portfolio.settle).
+        """
+        self.portfolio_handler.settle()
+
+    def _end_timestamp(self):
+        """
+        Once all events of the current timestamp have been handled,
+        re-values the portfolio and samples the statistics.
+        """
+        if self.cur_time is not None:
+            self.portfolio_handler.update_portfolio_value()
+            self.statistics.update(self.cur_time, self.portfolio_handler)
+
+    def _on_signal_event(self, event):
+        self.signals += 1
+        self.portfolio_handler.on_signal(event)
+
+    def _on_order_event(self, event):
+        self.orders += 1
+        self.broker.execute_order(event)
+        self.fills += 1
+
+    def _on_fill_event(self, event):
+        self.portfolio_handler.on_fill(event)
+
     def _run_backtest(self):
         """
         Carries out an infinite while loop that polls the
-        events queue and directs each event to either the
-        strategy component of the execution handler. The
-        loop continue until the event queue has been
+        events bus and directs each event, via the handlers
+        table, to either the strategy component of the execution
+        handler. The loop continue until the event bus has been
         emptied.
         """
         print("Running Backtest...")
-        while self.data_handler.continue_backtest:
+        poll = self.events_queue.poll
+        handlers = self.handlers
+        data_handler = self.data_handler
+        batch_timestamps = self.batch_timestamps
+        if batch_timestamps:
+            stream_next = data_handler.stream_next_timestamp
+        else:
+            stream_next = data_handler.stream_next
+        while data_handler.continue_backtest:
+            event = poll()
+            if event is None:
+                if batch_timestamps:
+                    self._end_timestamp()
+                stream_next()  # get next bar(s), and restart loop
+                continue
             try:
-                event = self.events_queue.get(False)
-            except queue.Empty:
-                self.data_handler.stream_next()  # get next bar, and restart loop
-            else:                                # if event
-                if event is not None:
-                    if event.type == EventType.TICK or event.type == EventType.BAR:
-                        self.cur_time = event.time
-                        self.strategy.calculate_signals(event)
-                        self.portfolio_handler.update_portfolio_value()
-                        self.statistics.update(event.time, self.portfolio_handler)  # TODO: move down?
-                    elif event.type == EventType.SIGNAL:
-                        self.signals += 1
-                        self.portfolio_handler.on_signal(event)
-                    elif event.type == EventType.ORDER:
-                        self.orders += 1
-                        self.broker.execute_order(event)
-                        self.fills += 1
-                    elif event.type == EventType.FILL:
-                        self.portfolio_handler.on_fill(event)
-                    else:
-                        raise NotImplemented("Unsupported event.type '%s'" % event.type)
+                handler = handlers[event.type]
+            except KeyError:
+                raise NotImplementedError("Unsupported event.type '%s'" % event.type)
+            handler(event)
+        # the last day is settled before the final statistics
+        if self.cur_date is not None:
+            self._end_of_day()
 
     def simulate_trading(self, testing=False):
         """
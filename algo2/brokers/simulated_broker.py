@@ -2,6 +2,8 @@
 # -*- coding: utf-8 -*-
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
+import numpy as np
+
 from algo2.brokers.base_broker import AbstractBroker
 from algo2.event import FillEvent, EventType
 
@@ -39,6 +41,21 @@ class IBSimulatedExecutionHandler(AbstractBroker):
         )
         return commission
 
+    @staticmethod
+    def calculate_ib_commissions(quantities, fill_prices):
+        """
+        Array version of calculate_ib_commission, i.e. the same
+        Interactive Brokers rule applied element-wise to arrays of
+        (signed) traded quantities and fill prices.
+        No commission is charged where nothing is traded.
+        """
+        quantities = np.abs(quantities)
+        commissions = np.minimum(
+            0.5 * fill_prices * quantities,
+            np.maximum(1.0, 0.005 * quantities)
+        )
+        return np.where(quantities > 0, commissions, 0.0)
+
     def execute_order(self, event):
         """
         Converts OrderEvents into FillEvents "naively",
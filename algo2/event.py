@@ -13,12 +13,16 @@ class Event(object):
     """
     Event is the base class, provinding an interface
     for all inherited that will be created/stored
-    
+
+    Events are slotted records (no per-instance __dict__), cheap
+    to allocate, and immutable by convention: the consumers of
+    an event should not modify it. The event 'type' is a class
+    attribute, hence not stored per instance.
     """
+    __slots__ = ()
 #    @property
 #    def typename(self):
 #        return self.type.name
-    pass
 
 
 ##########################################
@@ -29,12 +33,8 @@ class MarketEvent(Event):
     
     Datafeed ->  MarketEvent -> Strategy
     """
-
-    def __init__(self):
-        """
-        Initialises the MarketEvent.
-        """
-        self.type = 'MARKET'
+    __slots__ = ()
+    type = 'MARKET'
 
 
 # MarketEvent
@@ -45,6 +45,8 @@ class TickEvent(Event):
     which is defined as a ticker symbol and associated best
     bid and ask from the top of the order book.
     """
+    __slots__ = ("ticker", "time", "bid", "ask")
+    type = EventType.TICK  # i.e. = "TICK"
 
     def __init__(self, ticker, time, bid, ask):
         """
@@ -53,12 +55,22 @@ class TickEvent(Event):
         :param bid - The best bid price at the time of the tick.
         :param ask - The best ask price at the time of the tick.
         """
-        self.type = EventType.TICK  # i.e. = "TICK"
         self.ticker = ticker
         self.time = time
         self.bid = bid
         self.ask = ask
 
+    def renew(self, ticker, time, bid, ask):
+        """
+        Re-uses this TickEvent for a new tick (see the data
+        handlers' 'reuse_events'), avoiding an allocation.
+        """
+        self.ticker = ticker
+        self.time = time
+        self.bid = bid
+        self.ask = ask
+        return self
+
     def __str__(self):
         return "Type: %s, Ticker: %s, Time: %s, Bid: %s, Ask: %s" % (
             str(self.type), str(self.ticker),
@@ -75,6 +87,11 @@ class BarEvent(Event):
     open-high-low-close-volume bar, as would be generated
     via common data providers such as Yahoo Finance.
     """
+    __slots__ = (
+        "ticker", "time", "period", "open_price", "high_price",
+        "low_price", "close_price", "volume", "adj_close_price"
+    )
+    type = EventType.BAR  # i.e. = "BAR"
 
     def __init__(
             self, ticker, time, period,
@@ -96,7 +113,6 @@ class BarEvent(Event):
         of 'open_price', 'close_price' as 'open' is a reserved
         word in Python.
         """
-        self.type = EventType.BAR  # i.e. = "BAR"
         self.ticker = ticker
         self.time = time
         self.period = period
@@ -107,6 +123,26 @@ class BarEvent(Event):
         self.volume = volume
         self.adj_close_price = adj_close_price
 
+    def renew(
+            self, ticker, time, period,
+            open_price, high_price, low_price,
+            close_price, volume, adj_close_price=None
+    ):
+        """
+        Re-uses this BarEvent for a new bar (see the data
+        handlers' 'reuse_events'), avoiding an allocation.
+        """
+        self.ticker = ticker
+        self.time = time
+        self.period = period
+        self.open_price = open_price
+        self.high_price = high_price
+        self.low_price = low_price
+        self.close_price = close_price
+        self.volume = volume
+        self.adj_close_price = adj_close_price
+        return self
+
 
 ##########################################
 class SignalEvent(Event):
@@ -115,6 +151,8 @@ class SignalEvent(Event):
     This is received by a Portfolio object and acted upon.
     Strategy -> SignalEvent -> Portfolio (splittable in sizer and risk mgt)
     """
+    __slots__ = ("ticker", "action", "suggested_quantity")
+    type = EventType.SIGNAL  # ='SIGNAL'
 
     def __init__(self, ticker, action, suggested_quantity=None):
         """
@@ -129,7 +167,6 @@ class SignalEvent(Event):
         # self.strategy_id = strategy_id # strategy_id - unique ID of the generated strategy signal.
         # self.datetime = datetime
 
-        self.type = EventType.SIGNAL  # ='SIGNAL'
         self.ticker = ticker
         self.action = action
         self.suggested_quantity = suggested_quantity
@@ -144,7 +181,11 @@ class SuggestedOrderEvent(Event):
     suggested orders and final orders (OrderEvent objects) ensures
     that a suggested order is never transacted unless it has been
     scrutinised by the position sizing and risk management layers.
+
+    NB: unlike the other events, it is modified (in place) by
+    the PositionSizer.
     """
+    __slots__ = ("ticker", "action", "quantity")
 
     def __init__(self, ticker, action, quantity=0):
         """
@@ -173,6 +214,8 @@ class OrderEvent(Event):
     quantity and a direction.
     Portfolio -> OrderEvent -> Execution
     """
+    __slots__ = ("ticker", "action", "quantity", "type_of_order")
+    type = EventType.ORDER
 
     def __init__(self, ticker, action, quantity, type_of_order=None):
         """
@@ -191,7 +234,6 @@ class OrderEvent(Event):
         :param type_of_order - OPTIONAL 'MKT' or 'LMT' for Market or Limit.
         """
 
-        self.type = EventType.ORDER
         self.ticker = ticker
         self.action = action
         self.quantity = quantity
@@ -220,6 +262,11 @@ class FillEvent(Event):
     different prices. This will be simulated by averaging
     the cost.
     """
+    __slots__ = (
+        "timestamp", "ticker", "action", "quantity",
+        "exchange", "price", "commission"
+    )
+    type = EventType.FILL  # = 'FILL'
 
     def __init__(
             self, timestamp, ticker,
@@ -239,7 +286,6 @@ class FillEvent(Event):
         :param commission - The brokerage commission for carrying out the trade.
         """
 
-        self.type = EventType.FILL  # = 'FILL'
         self.timestamp = timestamp
         self.ticker = ticker
         self.action = action
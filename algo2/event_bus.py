@@ -0,0 +1,83 @@
+#!/usr/bin/python
+# -*- coding: utf-8  -*-
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+from collections import deque
+
+from algo2.utilities import queue
+
+
+class DequeEventBus(object):
+    """
+    Event bus for (single-threaded) backtesting, backed by a plain
+    collections.deque: no lock or condition variable is taken on
+    put/poll, and an empty bus is signalled by poll() returning None
+    rather than by raising queue.Empty.
+
+    It can be passed wherever an events_queue is expected, as it
+    also exposes the put/get/empty methods of queue.Queue.
+    """
+    def __init__(self):
+        self._events = deque()
+        self.put = self._events.append  # bound method, saves a call level
+
+    def poll(self):
+        """
+        Returns the next event, or None if the bus is empty.
+        """
+        events = self._events
+        return events.popleft() if events else None
+
+    def get(self, block=True, timeout=None):
+        """
+        As queue.Queue.get, but never blocks (single-threaded).
+        """
+        if not self._events:
+            raise queue.Empty
+        return self._events.popleft()
+
+    def empty(self):
+        return not self._events
+
+    def qsize(self):
+        return len(self._events)
+
+    def __len__(self):
+        return len(self._events)
+
+
+class QueueEventBus(object):
+    """
+    Thread-safe event bus for live trading, where events
+    (e.g. fills) may be put from other threads. It wraps a
+    queue.Queue, either new or existing.
+    """
+    def __init__(self, events_queue=None):
+        self.events_queue = queue.Queue() if events_queue is None else events_queue
+        self.put = self.events_queue.put
+        self.get = self.events_queue.get
+        self.empty = self.events_queue.empty
+        self.qsize = self.events_queue.qsize
+
+    def poll(self):
+        """
+        Returns the next event, or None if the bus is empty.
+        """
+        try:
+            return self.events_queue.get(False)
+        except queue.Empty:
+            return None
+
+    def __len__(self):
+        return self.events_queue.qsize()
+
+
+def as_event_bus(events_queue):
+    """
+    Returns events_queue if it is already an event bus, otherwise
+    (e.g. a queue.Queue) a QueueEventBus wrapping it.
+    """
+    if hasattr(events_queue, "poll"):
+        return events_queue
+    return QueueEventBus(events_queue)
@@ -19,6 +19,36 @@ class AbstractDataHandler(object):
 
     __metaclass__ = ABCMeta
 
+    _pending_event = None   # created by stream_next_timestamp, not yet streamed
+
+    def _next_event(self, event=None):
+        """
+        Creates the next event of the stream (re-using event, if
+        given), without storing or queueing it. None at the end.
+        """
+        raise NotImplementedError("Should implement _next_event()")
+
+    def stream_next_timestamp(self):
+        """
+        Place all the events of the next timestamp onto the event
+        queue (see Backtest 'batch_timestamps'). The first event of
+        the following timestamp is created but held back, i.e. not
+        stored, until the next call. As several events are queued
+        at once, they are never re-used.
+        """
+        event = self._pending_event
+        if event is None:
+            event = self._next_event()
+        if event is None:
+            self.continue_backtest = False
+            return
+        time = event.time
+        while event is not None and event.time == time:
+            self._store_event(event)
+            self.events_queue.put(event)
+            event = self._next_event()
+        self._pending_event = event
+
     def unsubscribe_ticker(self, ticker):
         """
         Unsubscribes the data handler from a current ticker symbol.
@@ -0,0 +1,143 @@
+# no shebang
+# -*- coding: utf-8 -*-
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+from algo2 import utilities
+from algo2.utilities import string_types
+
+# atomic rename over an existing file (Python 3), else best effort
+_replace = getattr(os, "replace", os.rename)
+
+
+class CSVCache(object):
+    """
+    CSVCache is an on-disk cache of parsed CSV price files: the
+    first read of a file parses it with pd.read_csv and stores the
+    resulting DataFrame in a binary columnar .npz bundle (one .npy
+    array per column plus the index), next reads load the bundle,
+    skipping the (slow) CSV and date parsing.
+
+    An entry is keyed on the CSV path and read_csv arguments, and
+    is valid only while the CSV file has the same modification time
+    and size, i.e. it is invalidated (and re-built) if the CSV changes.
+
+    :param cache_dir - OPTIONAL directory of the bundles,
+        default: DEFAULT.OUTPUT_DIR/csv_cache.
+    """
+    VERSION = 1
+
+    def __init__(self, cache_dir=None):
+        if cache_dir is None:
+            cache_dir = os.path.join(utilities.DEFAULT.OUTPUT_DIR, "csv_cache")
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+
+    def _get_filename(self, csv_path, read_csv_kwargs):
+        """
+        Bundle filename, from the CSV path and the parsing arguments.
+        """
+        key = "%s|%s|%s" % (
+            self.VERSION, os.path.abspath(csv_path), sorted(read_csv_kwargs.items())
+        )
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        name = os.path.splitext(os.path.basename(csv_path))[0]
+        return os.path.join(self.cache_dir, "%s_%s.npz" % (name, digest[:16]))
+
+    @staticmethod
+    def _get_stamp(csv_path):
+        """
+        (modification time in ns, size in bytes) of the CSV file.
+        """
+        stat = os.stat(csv_path)
+        mtime_ns = getattr(stat, "st_mtime_ns", int(stat.st_mtime * 1e9))
+        return np.array([mtime_ns, stat.st_size], dtype=np.int64)
+
+    @staticmethod
+    def _to_array(values):
+        """
+        Array to store for a column or index, None if not storable
+        (e.g. objects other than strings).
+        """
+        values = np.asarray(values)
+        if values.dtype.kind != "O":
+            return values
+        if all(isinstance(x, string_types) for x in values):
+            return values.astype("U")
+        return None
+
+    def _save(self, filename, stamp, df):
+        """
+        Saves df as .npz bundle, atomically. Returns False if df
+        has columns that can not be stored.
+        """
+        arrays = {"stamp": stamp}
+        for i, values in enumerate([df.index] + [df[c] for c in df.columns]):
+            array = self._to_array(values.values)
+            if array is None:
+                return False
+            arrays["c%d" % i] = array
+        arrays["columns"] = np.array([str(c) for c in df.columns], dtype="U")
+        arrays["index_name"] = np.array([df.index.name or ""], dtype="U")
+
+        if not os.path.isdir(self.cache_dir):
+            os.makedirs(self.cache_dir)
+        tmp_filename = "%s.%d.tmp" % (filename, os.getpid())
+        with open(tmp_filename, "wb") as fd:
+            np.savez(fd, **arrays)
+        _replace(tmp_filename, filename)
+        return True
+
+    @staticmethod
+    def _load(bundle):
+        """
+        Re-builds the DataFrame from an (open) .npz bundle.
+        """
+        def values(i):
+            array = bundle["c%d" % i]
+            return array.astype(object) if array.dtype.kind == "U" else array
+
+        columns = bundle["columns"].tolist()
+        index_name = bundle["index_name"][0] or None
+        index = pd.Index(values(0), name=index_name)
+        return pd.DataFrame(
+            dict((name, values(i + 1)) for i, name in enumerate(columns)),
+            index=index, columns=columns
+        )
+
+    def read_csv(self, csv_path, **read_csv_kwargs):
+        """
+        As pd.read_csv(csv_path, **read_csv_kwargs), via the cache.
+        """
+        filename = self._get_filename(csv_path, read_csv_kwargs)
+        stamp = self._get_stamp(csv_path)
+        if os.path.exists(filename):
+            try:
+                with np.load(filename, allow_pickle=False) as bundle:
+                    if np.array_equal(bundle["stamp"], stamp):
+                        df = self._load(bundle)
+                        self.hits += 1
+                        return df
+            except (IOError, OSError, ValueError, KeyError):
+                pass    # corrupt or old bundle: re-build it below
+
+        self.misses += 1
+        df = pd.read_csv(csv_path, **read_csv_kwargs)
+        self._save(filename, stamp, df)
+        return df
+
+    def clear(self):
+        """
+        Removes all the bundles in the cache directory.
+        """
+        if os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(".npz"):
+                    os.remove(os.path.join(self.cache_dir, name))
@@ -0,0 +1,200 @@
+# no shebang
+# -*- coding: utf-8 -*-
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import os
+import numpy as np
+import pandas as pd
+
+from algo2.event import BarEvent
+from algo2.feeds.base_feed import AbstractBarDataHandler
+
+
+class BarColumns(object):
+    """
+    BarColumns holds a merged (time ordered) stream of
+    OHLCV bars as contiguous NumPy arrays, one per field,
+    so that a data handler can build each BarEvent from
+    array indices rather than from a pandas row.
+
+    :param time - datetime64[ns] array of bar timestamps;
+    :param ticker - integer codes into 'tickers';
+    :param tickers - list of ticker symbols;
+    :param open_price, high_price, low_price, close_price,
+        adj_close_price - float64 arrays;
+    :param volume - int64 array.
+    """
+    FIELDS = (
+        "time", "ticker", "open_price", "high_price", "low_price",
+        "close_price", "volume", "adj_close_price"
+    )
+
+    def __init__(
+            self, time, ticker, tickers,
+            open_price, high_price, low_price,
+            close_price, volume, adj_close_price
+    ):
+        self.time = time
+        self.ticker = ticker
+        self.tickers = list(tickers)
+        self.open_price = open_price
+        self.high_price = high_price
+        self.low_price = low_price
+        self.close_price = close_price
+        self.volume = volume
+        self.adj_close_price = adj_close_price
+        self._timestamps = None
+
+    def __len__(self):
+        return len(self.time)
+
+    @classmethod
+    def from_frame(cls, df):
+        """
+        Converts (once) a merged and sorted bar DataFrame, i.e.
+        Yahoo columns plus 'Ticker' and a DatetimeIndex,
+        into contiguous column arrays.
+        """
+        codes, tickers = pd.factorize(df["Ticker"])
+
+        def column(name, dtype):
+            return np.ascontiguousarray(df[name].values, dtype=dtype)
+
+        return cls(
+            np.ascontiguousarray(df.index.values, dtype="datetime64[ns]"),
+            np.ascontiguousarray(codes, dtype=np.int32),
+            tickers,
+            column("Open", np.float64),
+            column("High", np.float64),
+            column("Low", np.float64),
+            column("Close", np.float64),
+            column("Volume", np.int64),
+            column("Adj Close", np.float64)
+        )
+
+    def save(self, directory):
+        """
+        Saves each column as a .npy file in directory, so that
+        it can be loaded back (and memory mapped) by load().
+        """
+        for field in self.FIELDS:
+            np.save(os.path.join(directory, "%s.npy" % field), getattr(self, field))
+        np.save(os.path.join(directory, "tickers.npy"), np.array(self.tickers, dtype="U"))
+
+    @classmethod
+    def load(cls, directory, mmap_mode=None):
+        """
+        Loads the columns saved by save(). With mmap_mode="r"
+        the arrays are read-only memory maps: no copy is made and
+        processes loading the same directory share the OS pages.
+        """
+        columns = dict(
+            (field, np.load(os.path.join(directory, "%s.npy" % field), mmap_mode=mmap_mode))
+            for field in cls.FIELDS
+        )
+        columns["tickers"] = np.load(os.path.join(directory, "tickers.npy")).tolist()
+        return cls(**columns)
+
+    def timestamps(self):
+        """
+        Returns the bar times as a list of pandas Timestamps,
+        i.e. the same objects DataFrame.iterrows() yields.
+        The list is built once and cached.
+        """
+        if self._timestamps is None:
+            self._timestamps = list(pd.DatetimeIndex(self.time))
+        return self._timestamps
+
+    def create_event(self, i, time, period, event=None):
+        """
+        Obtain all elements of the i-th bar from the arrays
+        and return a BarEvent (the given event renewed, if any)
+        """
+        values = (
+            self.tickers[self.ticker[i]], time, period,
+            float(self.open_price[i]), float(self.high_price[i]),
+            float(self.low_price[i]), float(self.close_price[i]),
+            int(self.volume[i]), float(self.adj_close_price[i])
+        )
+        if event is not None:
+            return event.renew(*values)
+        return BarEvent(*values)
+
+
+class ColumnarBarDataHandler(AbstractBarDataHandler):
+    """
+    ColumnarBarDataHandler streams BarEvents to the provided
+    events queue from already loaded (possibly memory mapped)
+    BarColumns, e.g. to share the same price data among many
+    backtests without re-reading the CSV files.
+
+    If 'reuse_events' is True, a single BarEvent is re-used (renewed)
+    for every bar, as per HistoricCSVBarDataHandler.
+    """
+
+    def __init__(self, bar_columns, events_queue, period=86400, reuse_events=False):
+        """
+        Takes the BarColumns, the events queue and the bar period
+        in seconds, then subscribes all tickers in the columns.
+        """
+        self.events_queue = events_queue
+        self.continue_backtest = True
+        self.period = period
+        self.reuse_events = reuse_events
+        self._free_event = None     # BarEvent to re-use, if reuse_events
+        self.tickers = {}
+        self.tickers_data = {}
+        self.bar_stream = bar_columns
+        self._bar_times = bar_columns.timestamps()
+        self._bar_cursor = 0
+        for ticker in bar_columns.tickers:
+            self.subscribe_ticker(ticker)
+
+    def subscribe_ticker(self, ticker):
+        """
+        Subscribes the data handler to a ticker in the columns,
+        with the prices of its first bar.
+        """
+        bars = self.bar_stream
+        if ticker in self.tickers:
+            print(
+                "Could not subscribe ticker %s "
+                "as is already subscribed." % ticker
+            )
+        elif ticker not in bars.tickers:
+            print(
+                "Could not subscribe ticker %s "
+                "as no data found for pricing." % ticker
+            )
+        else:
+            i = int(np.argmax(bars.ticker == bars.tickers.index(ticker)))
+            self.tickers[ticker] = {
+                "close": float(bars.close_price[i]),
+                "adj_close": float(bars.adj_close_price[i]),
+                "timestamp": self._bar_times[i]
+            }
+
+    def _next_event(self, event=None):
+        """
+        Creates the next BarEvent from the columns (the given
+        event renewed, if any), or returns None at their end.
+        """
+        i = self._bar_cursor
+        if i >= len(self._bar_times):
+            return None
+        self._bar_cursor = i + 1
+        return self.bar_stream.create_event(i, self._bar_times[i], self.period, event)
+
+    def stream_next(self):
+        """
+        Place the next BarEvent onto the event queue.
+        """
+        bev = self._next_event(self._free_event)
+        if bev is None:
+            self.continue_backtest = False
+            return
+        if self.reuse_events:
+            self._free_event = bev
+        self._store_event(bev)
+        self.events_queue.put(bev)
@@ -6,6 +6,9 @@ import os
 import pandas as pd
 
 from algo2.event import BarEvent, TickEvent
+from algo2.feeds.cache import CSVCache
+from algo2.feeds.columnar import BarColumns
+from algo2.feeds.merge import iter_ticker_rows, merge_ticker_rows, read_sorted_chunks
 from algo2.feeds.base_feed import AbstractBarDataHandler, AbstractTickDataHandler
 
 
@@ -16,19 +19,54 @@ class HistoricCSVBarDataHandler(AbstractBarDataHandler):
     Yahoo Finance daily Open-High-Low-Close-Volume (OHLCV) data
     for each requested financial instrument and stream those to
     the provided events queue as BarEvents.
+
+    If 'columnar' is True, the merged DataFrame is converted
+    once into contiguous NumPy arrays (see BarColumns) and each
+    BarEvent is built from array indices, rather than from a
+    pandas row via DataFrame.iterrows(). The event sequence is
+    the same in both modes.
+
+    If 'reuse_events' is True, a single BarEvent is re-used (renewed)
+    for every bar rather than allocating a new one. It is safe in
+    the Backtest loop, which streams the next bar only once the
+    previous one has been fully handled, but not if any component
+    keeps references to the market events.
+
+    If 'cache' is given (a CSVCache, or True for the default one),
+    the parsed CSV files are cached in a binary format, so that
+    next constructions skip the CSV and dates parsing.
+
+    If 'chunksize' is given, the CSV files are not loaded whole:
+    each is read in chunks of that many rows and the tickers' streams
+    are k-way merged on (time, ticker), with the same event sequence
+    as the default mode and memory bounded by chunksize times the
+    no. of tickers (see algo2.feeds.merge). 'tickers_data' then holds
+    only the first row of each file, and 'columnar' and 'cache' do not
+    apply.
     """
+    BAR_COLUMNS = ("Open", "High", "Low", "Close", "Volume", "Adj Close")
+    READ_CSV_KWARGS = dict(
+        header=0, parse_dates=True, index_col=0, dayfirst=True,
+        # names=("Date", "Open", "High", "Low", "Close", "Volume", "Adj Close")
+    )
 
     def __init__(
             self, csv_dir, events_queue,
             init_tickers=None,
             start_date=None, end_date=None,
+            columnar=False, reuse_events=False, cache=None,
+            chunksize=None
     ):
         """
         Takes the CSV directory, the events queue and a possible
         list of initial ticker symbols then creates an (optional)
         list of ticker subscriptions and associated prices.
         """
+        if columnar and chunksize is not None:
+            raise ValueError("'columnar' needs the whole data, not chunks.")
         self.csv_dir = csv_dir
+        self.cache = CSVCache() if cache is True else cache
+        self.chunksize = chunksize
         self.events_queue = events_queue
         self.continue_backtest = True
         self.tickers = {}
@@ -38,7 +76,13 @@ class HistoricCSVBarDataHandler(AbstractBarDataHandler):
                 self.subscribe_ticker(ticker)
         self.start_date = start_date
         self.end_date = end_date
-        self.bar_stream = self._merge_sort_ticker_data()
+        self.columnar = columnar
+        self.reuse_events = reuse_events
+        self._free_event = None     # BarEvent to re-use, if reuse_events
+        if self.chunksize is not None:
+            self.bar_stream = self._merge_stream_ticker_data()
+        else:
+            self.bar_stream = self._merge_sort_ticker_data()
 
     def _open_ticker_price_csv(self, ticker):
         """
@@ -47,12 +91,14 @@ class HistoricCSVBarDataHandler(AbstractBarDataHandler):
         them into a pandas DataFrame, stored in a dictionary.
         """
         ticker_path = os.path.join(self.csv_dir, "%s.csv" % ticker)
-
-        self.tickers_data[ticker] = pd.read_csv(
-            ticker_path, header=0, parse_dates=True,
-            index_col=0, dayfirst=True,
-            # names=("Date", "Open", "High", "Low", "Close", "Volume", "Adj Close")
-        )
+        if self.chunksize is not None:
+            # streaming: only the first row, for the subscription prices
+            self.tickers_data[ticker] = pd.read_csv(
+                ticker_path, nrows=1, **self.READ_CSV_KWARGS
+            )
+        else:
+            read_csv = pd.read_csv if self.cache is None else self.cache.read_csv
+            self.tickers_data[ticker] = read_csv(ticker_path, **self.READ_CSV_KWARGS)
         self.tickers_data[ticker]["Ticker"] = ticker
 
     def _merge_sort_ticker_data(self):
@@ -79,15 +125,41 @@ class HistoricCSVBarDataHandler(AbstractBarDataHandler):
         df['colFromIndex'] = df.index
         df = df.sort_values(by=["colFromIndex", "Ticker"])
 
-        # Determine how to slice data
-        if start is None and end is None:
-            return df.iterrows()  # default, as per the Tick version below
-        elif start is not None and end is None:
-            return df.ix[start:].iterrows()
-        elif start is None and end is not None:
-            return df.ix[:end].iterrows()
-        else:
-            return df.ix[start:end].iterrows()
+        # Slice data (positionally, None meaning no bound)
+        df = df.iloc[start:end]
+        if self.columnar:
+            return self._create_columnar_stream(df)
+        return df.iterrows()  # default, as per the Tick version below
+
+    def _merge_stream_ticker_data(self):
+        """
+        Streams the tickers' CSV files, in chunks, and k-way merges
+        them into a single time ordered stream of
+        (time, ticker, row no., bar values) tuples.
+        The order is the same as per _merge_sort_ticker_data.
+        """
+        streams = [
+            iter_ticker_rows(
+                ticker,
+                read_sorted_chunks(
+                    os.path.join(self.csv_dir, "%s.csv" % ticker),
+                    self.chunksize, **self.READ_CSV_KWARGS
+                ),
+                self.BAR_COLUMNS
+            )
+            for ticker in self.tickers_data
+        ]
+        return merge_ticker_rows(streams, self.start_date, self.end_date)
+
+    def _create_columnar_stream(self, df):
+        """
+        Converts the merged DataFrame into BarColumns and sets up
+        the cursor used by stream_next. Returns the BarColumns.
+        """
+        bars = BarColumns.from_frame(df)
+        self._bar_times = bars.timestamps()
+        self._bar_cursor = 0
+        return bars
 
     def subscribe_ticker(self, ticker):
         """
@@ -120,10 +192,10 @@ class HistoricCSVBarDataHandler(AbstractBarDataHandler):
             )
 
     @staticmethod
-    def _create_event(index, period, ticker, row):
+    def _create_event(index, period, ticker, row, event=None):
         """
         Obtain all elements of the bar from a row of dataframe
-        and return a BarEvent
+        and return a BarEvent (the given event renewed, if any)
         """
         open_price = float(row["Open"])
         high_price = float(row["High"])
@@ -131,6 +203,12 @@ class HistoricCSVBarDataHandler(AbstractBarDataHandler):
         close_price = float(row["Close"])
         adj_close_price = float(row["Adj Close"])
         volume = int(row["Volume"])
+        if event is not None:
+            return event.renew(
+                ticker, index, period, open_price,
+                high_price, low_price, close_price,
+                volume, adj_close_price
+            )
         bev = BarEvent(
             ticker, index, period, open_price,
             high_price, low_price, close_price,
@@ -138,20 +216,41 @@ class HistoricCSVBarDataHandler(AbstractBarDataHandler):
         )
         return bev
 
-    def stream_next(self):
+    def _next_event(self, event=None):
         """
-        Place the next BarEvent onto the event queue.
+        Creates the next BarEvent from the bar stream (the given
+        event renewed, if any), or returns None at its end.
         """
+        period = 86400  # Seconds in a day
+        if self.columnar:
+            i = self._bar_cursor
+            if i >= len(self._bar_times):
+                return None
+            self._bar_cursor = i + 1
+            return self.bar_stream.create_event(i, self._bar_times[i], period, event)
         try:
-            index, row = next(self.bar_stream)
+            if self.chunksize is not None:
+                index, ticker, _, values = next(self.bar_stream)
+                row = dict(zip(self.BAR_COLUMNS, values))
+            else:
+                index, row = next(self.bar_stream)
+                ticker = row["Ticker"]
         except StopIteration:
+            return None
+        # Obtain all elements of the bar from the dataframe
+        return self._create_event(index, period, ticker, row, event)
+
+    def stream_next(self):
+        """
+        Place the next BarEvent onto the event queue.
+        """
+        # Create the bar event for the queue
+        bev = self._next_event(self._free_event)
+        if bev is None:
             self.continue_backtest = False
             return
-        # Obtain all elements of the bar from the dataframe
-        ticker = row["Ticker"]
-        period = 86400  # Seconds in a day
-        # Create the tick event for the queue
-        bev = self._create_event(index, period, ticker, row)
+        if self.reuse_events:
+            self._free_event = bev
         # Store event
         self._store_event(bev)  # method of the underlying class
         # Send event to queue
@@ -167,15 +266,32 @@ class HistoricCSVTickDataHandler(AbstractTickDataHandler):
     HistoricCSVPrDataHandler is designed to read CSV files of
     tick data for each requested financial instrument and
     stream those to the provided events queue as TickEvents.
+
+    If 'reuse_events' is True, a single TickEvent is re-used
+    (renewed) for every tick, and 'cache' caches the parsed CSV
+    files, as per HistoricCSVBarDataHandler.
+
+    If 'chunksize' is given, the CSV files are read in chunks and
+    k-way merged on (time, ticker), as per HistoricCSVBarDataHandler.
     """
+    TICK_COLUMNS = ("Ticker", "Bid", "Ask")
+    READ_CSV_KWARGS = dict(
+        header=0, parse_dates=True, dayfirst=True, index_col=1,
+        names=("Ticker", "Time", "Bid", "Ask")
+    )
 
-    def __init__(self, csv_dir, events_queue, init_tickers=None):
+    def __init__(
+            self, csv_dir, events_queue, init_tickers=None,
+            reuse_events=False, cache=None, chunksize=None
+    ):
         """
         Takes the CSV directory, the events queue and a possible
         list of initial ticker symbols, then creates an (optional)
         list of ticker subscriptions and associated prices.
         """
         self.csv_dir = csv_dir
+        self.cache = CSVCache() if cache is True else cache
+        self.chunksize = chunksize
         self.events_queue = events_queue
         self.continue_backtest = True
         self.tickers = {}
@@ -183,7 +299,12 @@ class HistoricCSVTickDataHandler(AbstractTickDataHandler):
         if init_tickers is not None:
             for ticker in init_tickers:
                 self.subscribe_ticker(ticker)
-        self.tick_stream = self._merge_sort_ticker_data()
+        self.reuse_events = reuse_events
+        self._free_event = None     # TickEvent to re-use, if reuse_events
+        if self.chunksize is not None:
+            self.tick_stream = self._merge_stream_ticker_data()
+        else:
+            self.tick_stream = self._merge_sort_ticker_data()
 
     def _open_ticker_price_csv(self, ticker):
         """
@@ -192,11 +313,14 @@ class HistoricCSVTickDataHandler(AbstractTickDataHandler):
         them into a pandas DataFrame, stored in a dictionary.
         """
         ticker_path = os.path.join(self.csv_dir, "%s.csv" % ticker)
-        self.tickers_data[ticker] = pd.read_csv(
-            ticker_path, header=0, parse_dates=True,
-            dayfirst=True, index_col=1,
-            names=("Ticker", "Time", "Bid", "Ask")
-        )
+        if self.chunksize is not None:
+            # streaming: only the first row, for the subscription prices
+            self.tickers_data[ticker] = pd.read_csv(
+                ticker_path, nrows=1, **self.READ_CSV_KWARGS
+            )
+        else:
+            read_csv = pd.read_csv if self.cache is None else self.cache.read_csv
+            self.tickers_data[ticker] = read_csv(ticker_path, **self.READ_CSV_KWARGS)
 
     def _merge_sort_ticker_data(self):
         """
@@ -210,6 +334,25 @@ class HistoricCSVTickDataHandler(AbstractTickDataHandler):
             self.tickers_data.values()
         ).sort_index().iterrows()
 
+    def _merge_stream_ticker_data(self):
+        """
+        Streams the tickers' CSV files, in chunks, and k-way merges
+        them into a single stream of (time, ticker, row no., tick
+        values) tuples, ordered by time then ticker.
+        """
+        streams = [
+            iter_ticker_rows(
+                ticker,
+                read_sorted_chunks(
+                    os.path.join(self.csv_dir, "%s.csv" % ticker),
+                    self.chunksize, **self.READ_CSV_KWARGS
+                ),
+                self.TICK_COLUMNS
+            )
+            for ticker in self.tickers_data
+        ]
+        return merge_ticker_rows(streams)
+
     def subscribe_ticker(self, ticker):
         """
         Subscribes the price handler to a new ticker symbol.
@@ -237,26 +380,42 @@ class HistoricCSVTickDataHandler(AbstractTickDataHandler):
             )
 
     @staticmethod
-    def _create_event(index, ticker, row):
+    def _create_event(index, ticker, row, event=None):
         """
         Obtain all elements of the bar a row of dataframe
-        and return a TickEvent
+        and return a TickEvent (the given event renewed, if any)
         """
         bid = float(row["Bid"])
         ask = float(row["Ask"])
+        if event is not None:
+            return event.renew(ticker, index, bid, ask)
         tev = TickEvent(ticker, index, bid, ask)
         return tev
 
-    def stream_next(self):
+    def _next_event(self, event=None):
         """
-        Place the next TickEvent onto the event queue.
+        Creates the next TickEvent from the tick stream (the given
+        event renewed, if any), or returns None at its end.
         """
         try:
-            index, row = next(self.tick_stream)
+            if self.chunksize is not None:
+                index, _, _, values = next(self.tick_stream)
+                row = dict(zip(self.TICK_COLUMNS, values))
+            else:
+                index, row = next(self.tick_stream)
         except StopIteration:
+            return None
+        return self._create_event(index, row["Ticker"], row, event)
+
+    def stream_next(self):
+        """
+        Place the next TickEvent onto the event queue.
+        """
+        tev = self._next_event(self._free_event)
+        if tev is None:
             self.continue_backtest = False
             return
-        ticker = row["Ticker"]
-        tev = self._create_event(index, ticker, row)
+        if self.reuse_events:
+            self._free_event = tev
         self._store_event(tev)
         self.events_queue.put(tev)
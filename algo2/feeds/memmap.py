@@ -0,0 +1,208 @@
+# no shebang
+# -*- coding: utf-8 -*-
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from algo2.event import TickEvent
+from algo2.feeds.base_feed import AbstractTickDataHandler
+from algo2.feeds.csv_files import HistoricCSVTickDataHandler
+from algo2.feeds.merge import iter_ticker_rows, merge_ticker_rows, read_sorted_chunks
+
+
+# fixed-width (28 bytes, packed) record of a tick in the store
+TICK_DTYPE = np.dtype([
+    ("time", "<i8"),      # ns since the epoch
+    ("bid", "<f8"),
+    ("ask", "<f8"),
+    ("ticker", "<u4")     # index into the store's tickers
+])
+
+
+def convert_tick_csvs(csv_dir, tickers, store_dir, chunksize=100000):
+    """
+    One-time conversion of the tickers' tick CSV files (Ticker, Time,
+    Bid, Ask) into a tick store, i.e. in store_dir:
+    - ticks.bin: all the ticks merged by (time, ticker) as TICK_DTYPE records;
+    - tickers.npy: the ticker symbols, by ticker id;
+    - first.npy: the record no. of the first tick of each ticker (-1 if none).
+
+    The CSV files are read in chunks and k-way merged, then written
+    chunksize records at a time, so that memory is bounded whatever the
+    size of the files. Returns the no. of ticks written.
+    """
+    tickers = list(tickers)
+    ticker_ids = dict((ticker, i) for i, ticker in enumerate(tickers))
+    first = np.full(len(tickers), -1, dtype=np.int64)
+    streams = [
+        iter_ticker_rows(
+            ticker,
+            read_sorted_chunks(
+                os.path.join(csv_dir, "%s.csv" % ticker), chunksize,
+                **HistoricCSVTickDataHandler.READ_CSV_KWARGS
+            ),
+            ("Bid", "Ask")
+        )
+        for ticker in tickers
+    ]
+
+    if not os.path.isdir(store_dir):
+        os.makedirs(store_dir)
+    n_ticks = 0
+    records = np.empty(chunksize, dtype=TICK_DTYPE)
+    with open(os.path.join(store_dir, "ticks.bin"), "wb") as fd:
+        n = 0
+        for time, ticker, _, (bid, ask) in merge_ticker_rows(streams):
+            ticker_id = ticker_ids[ticker]
+            if first[ticker_id] < 0:
+                first[ticker_id] = n_ticks + n
+            records[n] = (time.value, bid, ask, ticker_id)
+            n += 1
+            if n == chunksize:
+                records.tofile(fd)
+                n_ticks += n
+                n = 0
+        records[:n].tofile(fd)
+        n_ticks += n
+
+    np.save(os.path.join(store_dir, "tickers.npy"), np.array(tickers, dtype="U"))
+    np.save(os.path.join(store_dir, "first.npy"), first)
+    return n_ticks
+
+
+def open_tick_store(store_dir):
+    """
+    Memory maps (read-only) a tick store written by convert_tick_csvs.
+    Returns (ticks, tickers, first), see convert_tick_csvs.
+    """
+    ticks_path = os.path.join(store_dir, "ticks.bin")
+    if os.path.getsize(ticks_path) == 0:
+        ticks = np.empty(0, dtype=TICK_DTYPE)     # an empty file can not be mapped
+    else:
+        ticks = np.memmap(ticks_path, dtype=TICK_DTYPE, mode="r")
+    tickers = np.load(os.path.join(store_dir, "tickers.npy")).tolist()
+    first = np.load(os.path.join(store_dir, "first.npy"))
+    return ticks, tickers, first
+
+
+class MemmapTickDataHandler(AbstractTickDataHandler):
+    """
+    MemmapTickDataHandler streams TickEvents to the provided events
+    queue from a tick store (see convert_tick_csvs) memory mapped with
+    numpy.memmap: nothing is loaded on construction and only a block of
+    'block_size' ticks is decoded at a time, so that resident memory
+    does not grow with the size of the store.
+
+    Only the ticks of the subscribed tickers (by default, all those in
+    the store) are streamed, in the same order as per
+    HistoricCSVTickDataHandler. If 'reuse_events' is True, a single
+    TickEvent is re-used (renewed) for every tick.
+    """
+
+    def __init__(
+            self, store_dir, events_queue, init_tickers=None,
+            block_size=8192, reuse_events=False
+    ):
+        """
+        Takes the tick store directory, the events queue and a possible
+        list of initial ticker symbols, then memory maps the store
+        and creates the ticker subscriptions and associated prices.
+        """
+        self.store_dir = store_dir
+        self.events_queue = events_queue
+        self.continue_backtest = True
+        self.block_size = block_size
+        self.reuse_events = reuse_events
+        self._free_event = None     # TickEvent to re-use, if reuse_events
+        self.ticks, self.store_tickers, self._first = open_tick_store(store_dir)
+        self.tickers = {}
+        self.tickers_data = {}
+        if init_tickers is None:
+            init_tickers = self.store_tickers
+        for ticker in init_tickers:
+            self.subscribe_ticker(ticker)
+        self._block_start = 0
+        self._block = ([], [], [], [])  # times, tickers, bids, asks
+        self._cursor = 0
+
+    def subscribe_ticker(self, ticker):
+        """
+        Subscribes the data handler to a ticker in the store,
+        with the prices of its first tick.
+        """
+        if ticker in self.tickers:
+            print(
+                "Could not subscribe ticker %s "
+                "as is already subscribed." % ticker
+            )
+        elif ticker not in self.store_tickers or \
+                self._first[self.store_tickers.index(ticker)] < 0:
+            print(
+                "Could not subscribe ticker %s "
+                "as no data found for pricing." % ticker
+            )
+        else:
+            tick = self.ticks[self._first[self.store_tickers.index(ticker)]]
+            self.tickers[ticker] = {
+                "bid": float(tick["bid"]),
+                "ask": float(tick["ask"]),
+                "timestamp": pd.Timestamp(int(tick["time"]))
+            }
+
+    def _load_block(self):
+        """
+        Decodes the next block of ticks from the memory map into
+        Python lists. Returns False at the end of the store.
+        """
+        start = self._block_start
+        if start >= len(self.ticks):
+            return False
+        block = self.ticks[start:start + self.block_size]
+        self._block_start = start + len(block)
+        store_tickers = self.store_tickers
+        self._block = (
+            list(pd.DatetimeIndex(block["time"].astype("datetime64[ns]"))),
+            [store_tickers[i] for i in block["ticker"].tolist()],
+            block["bid"].tolist(),
+            block["ask"].tolist()
+        )
+        self._cursor = 0
+        return True
+
+    def _next_event(self, event=None):
+        """
+        Creates the next TickEvent of a subscribed ticker (the given
+        event renewed, if any), or returns None at the end of the store.
+        """
+        tickers = self.tickers
+        while True:
+            i = self._cursor
+            if i >= len(self._block[0]):
+                if not self._load_block():
+                    return None
+                i = 0
+            self._cursor = i + 1
+            ticker = self._block[1][i]
+            if ticker in tickers:
+                break
+        times, _, bids, asks = self._block
+        if event is not None:
+            return event.renew(ticker, times[i], bids[i], asks[i])
+        return TickEvent(ticker, times[i], bids[i], asks[i])
+
+    def stream_next(self):
+        """
+        Place the next TickEvent of a subscribed ticker onto the event queue.
+        """
+        tev = self._next_event(self._free_event)
+        if tev is None:
+            self.continue_backtest = False
+            return
+        if self.reuse_events:
+            self._free_event = tev
+        self._store_event(tev)
+        self.events_queue.put(tev)
@@ -0,0 +1,76 @@
+# no shebang
+# -*- coding: utf-8 -*-
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import heapq
+import itertools
+
+import pandas as pd
+
+from algo2.utilities import zip
+
+
+def read_sorted_chunks(csv_path, chunksize, **read_csv_kwargs):
+    """
+    Reads a CSV file in chunks of chunksize rows and yields them
+    in ascending time (index) order.
+
+    A file in descending order (e.g. as downloaded from Yahoo) can
+    not be streamed, hence is read whole and sorted; any other
+    out of order file raises a ValueError.
+    """
+    reader = pd.read_csv(csv_path, chunksize=chunksize, **read_csv_kwargs)
+    first = next(reader, None)
+    if first is None:
+        return
+    if not first.index.is_monotonic_increasing and first.index.is_monotonic_decreasing:
+        yield pd.concat([first] + list(reader)).sort_index(kind="mergesort")
+        return
+
+    last_time = None
+    for chunk in itertools.chain([first], reader):
+        if len(chunk) == 0:
+            continue
+        if not chunk.index.is_monotonic_increasing or (
+            last_time is not None and chunk.index[0] < last_time
+        ):
+            raise ValueError(
+                "%s is not sorted by time: it can not be streamed." % csv_path
+            )
+        last_time = chunk.index[-1]
+        yield chunk
+
+
+def iter_ticker_rows(ticker, chunks, columns):
+    """
+    Yields the rows of a ticker's chunks as tuples
+    (time, ticker, row no., (values of columns)), i.e.
+    ready to be merged by (time, ticker).
+    """
+    row_no = itertools.count()
+    for chunk in chunks:
+        values = chunk[list(columns)].itertuples(index=False, name=None)
+        for time, row in zip(chunk.index, values):
+            yield time, ticker, next(row_no), row
+
+
+def merge_ticker_rows(streams, start_date=None, end_date=None):
+    """
+    k-way merge, via a heap, of the tickers' row streams into a
+    single stream ordered by (time, ticker), i.e. in the same order
+    as concatenating and sorting all the data, but holding only
+    the current chunk of each ticker in memory.
+    Rows before start_date or from end_date onwards are dropped
+    (dates as accepted by pd.Timestamp, e.g. '2010-01-01').
+    """
+    if start_date is not None:
+        start_date = pd.Timestamp(start_date)
+    if end_date is not None:
+        end_date = pd.Timestamp(end_date)
+    for item in heapq.merge(*streams):
+        if start_date is not None and item[0] < start_date:
+            continue
+        if end_date is not None and item[0] >= end_date:
+            return
+        yield item
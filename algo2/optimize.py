@@ -0,0 +1,141 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import itertools
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from algo2.event_bus import DequeEventBus
+from algo2.feeds.columnar import BarColumns, ColumnarBarDataHandler
+from algo2.feeds.csv_files import HistoricCSVBarDataHandler
+
+
+# BarColumns memory maps opened by the current (worker) process, by directory
+_shared_bars = {}
+
+
+def parameter_grid(grid):
+    """
+    Expands a dict of parameter name -> list of values into
+    the list of all combinations, each as a dict, e.g.
+    {"a": [1, 2], "b": [3]} -> [{"a": 1, "b": 3}, {"a": 2, "b": 3}]
+    """
+    names = list(grid.keys())
+    return [
+        dict(zip(names, values))
+        for values in itertools.product(*(grid[name] for name in names))
+    ]
+
+
+def load_bar_columns(csv_dir, tickers, start_date=None, end_date=None):
+    """
+    Reads, merges and sorts the tickers' CSV files once,
+    as HistoricCSVBarDataHandler does, and returns BarColumns.
+    """
+    data_handler = HistoricCSVBarDataHandler(
+        csv_dir, None, tickers,
+        start_date=start_date, end_date=end_date, columnar=True
+    )
+    return data_handler.bar_stream
+
+
+class SharedBarColumns(object):
+    """
+    Context manager saving BarColumns to .npy files in a temporary
+    directory, which worker processes memory map read-only: the price
+    data is shared by all processes without being copied or pickled.
+
+    :param bar_columns - the BarColumns to share;
+    :param directory - OPTIONAL parent directory of the temporary one,
+        e.g. "/dev/shm" to keep the files in memory.
+    """
+    def __init__(self, bar_columns, directory=None):
+        self.bar_columns = bar_columns
+        self.parent_directory = directory
+        self.directory = None
+
+    def __enter__(self):
+        self.directory = tempfile.mkdtemp(prefix="algo2_bars_", dir=self.parent_directory)
+        self.bar_columns.save(self.directory)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        shutil.rmtree(self.directory, ignore_errors=True)
+        self.directory = None
+
+
+def _get_shared_bars(directory):
+    """
+    Memory maps the shared BarColumns, once per process.
+    """
+    if directory not in _shared_bars:
+        _shared_bars[directory] = BarColumns.load(directory, mmap_mode="r")
+    return _shared_bars[directory]
+
+
+def run_backtest(backtest_factory, bar_columns, params):
+    """
+    Runs one backtest on the BarColumns and returns a dict with the
+    parameters and the (scalar) statistics from get_results.
+
+    :param backtest_factory - a callable taking the data handler and
+        the parameters as keyword arguments and returning a Backtest,
+        whose components must use data_handler.events_queue.
+    """
+    data_handler = ColumnarBarDataHandler(bar_columns, DequeEventBus())
+    backtest = backtest_factory(data_handler, **params)
+    results = backtest.simulate_trading(testing=True)
+
+    row = dict(params)
+    for key, value in results.items():
+        if not isinstance(value, (pd.Series, pd.DataFrame)):
+            row[key] = value
+    return row
+
+
+def _run_shared_backtest(args):
+    """
+    Worker entry point: one combination on the shared BarColumns.
+    """
+    backtest_factory, directory, params = args
+    return run_backtest(backtest_factory, _get_shared_bars(directory), params)
+
+
+def sweep(
+    backtest_factory, grid, csv_dir, tickers,
+    start_date=None, end_date=None,
+    max_workers=None, directory=None
+):
+    """
+    Runs a backtest for each combination of parameters in grid
+    on a process pool, with the price data loaded once and shared
+    with the workers via memory mapped files.
+
+    :param backtest_factory - a module level (picklable) callable
+        taking the data handler and the parameters as keyword
+        arguments and returning a Backtest;
+    :param grid - dict of parameter name -> list of values;
+    :param csv_dir, tickers, start_date, end_date - price data,
+        as per HistoricCSVBarDataHandler;
+    :param max_workers - no. of processes (default: no. of CPUs);
+    :param directory - OPTIONAL parent dir for the shared files.
+
+    Returns a DataFrame with one row per combination, holding
+    the parameters and the statistics from get_results.
+    """
+    combinations = parameter_grid(grid)
+    bar_columns = load_bar_columns(csv_dir, tickers, start_date, end_date)
+
+    with SharedBarColumns(bar_columns, directory) as shared:
+        tasks = [(backtest_factory, shared.directory, params) for params in combinations]
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            rows = list(executor.map(_run_shared_backtest, tasks))
+
+    columns = list(grid.keys())
+    columns += [key for key in rows[0] if key not in grid] if rows else []
+    return pd.DataFrame(rows, columns=columns)
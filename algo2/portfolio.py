@@ -3,16 +3,12 @@
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
+from algo2.positions.futures import Futures
 from algo2.positions.stock import Stock
 
 
-# from algo2.positions.futures import Futures
-
-# TODO: add futures contract
-
-
 class Portfolio(object):
-    def __init__(self, data_handler, cash):
+    def __init__(self, data_handler, cash, incremental=False, futures=None):
         """
         On creation, the Portfolio object contains no
         positions and all values are "reset" to the initial
@@ -24,8 +20,22 @@ class Portfolio(object):
         NB: realised_pnl is:
             - pnl from actual closed positions, plus 
             - (un) realised_pnl from still open positions.
+
+        If 'incremental' is True, update_portfolio(ticker) re-marks
+        only the position in ticker, i.e. O(1) rather than O(no.
+        of positions), and equity and unrealised_pnl are kept as
+        running sums of each position's contribution.
+        update_portfolio() (no ticker) always re-marks all positions.
+
+        'futures' is an OPTIONAL FuturesBook (see positions.futures):
+        the positions in its contracts are Futures (in its rows), the
+        others Stock. Trading futures only pays commissions out of
+        cash, their variation is paid by the daily settlement (see
+        settle), and margin_requirement is their initial margin.
         """
         self.data_handler = data_handler
+        self.incremental = incremental
+        self.futures = futures
 
         self.init_cash = cash
         self.equity = cash
@@ -35,55 +45,136 @@ class Portfolio(object):
         self.closed_positions = []
         self.realised_pnl, self.unrealised_pnl = 0, 0
 
-    def update_portfolio(self):
+        # ticker -> (unrealised pnl, equity) contribution of its position
+        self._marks = {}
+        self._positions_equity = 0   # sum of the equity contributions
+
+    def _get_bid_ask(self, ticker):
+        """
+        Last bid/ask of ticker, i.e. the adjusted close twice for bars.
+        """
+        if self.data_handler.istick():  # Tick
+            return self.data_handler.get_best_bid_ask(ticker)
+        # (daily) Bar
+        close_price = self.data_handler.get_last_adjclose(ticker)  # .get_latest_bar_value(ticker)
+        return close_price, close_price
+
+    def update_portfolio(self, ticker=None):
         """
-        Updates value of all positions that are currently open.
+        Updates value of all positions that are currently open,
+        or (if incremental) of the position in ticker only.
         Value of closed positions is booked into (self.)realised_pnl.
         """
+        if self.incremental and ticker is not None:
+            self._mark_position(ticker)
+            return
+
         self.unrealised_pnl = 0
         self.equity = self.realised_pnl
         self.equity += self.init_cash
+        self._marks = {}
+        self._positions_equity = 0
 
         # for each ticker gets price, update value and then sum to get port values
         for ticker in self.positions:
             pt = self.positions[ticker]
-            if self.data_handler.istick():  # Tick
-                bid, ask = self.data_handler.get_best_bid_ask(ticker)
-            else:  # (daily) Bar
-                close_price = self.data_handler.get_last_adjclose(ticker)  # .get_latest_bar_value(ticker)
-                bid, ask = close_price, close_price
+            bid, ask = self._get_bid_ask(ticker)
 
             pt.update_value(bid, ask)
             self.unrealised_pnl += pt.unrealised_pnl  # += pt.market_value - pt.cost
 
             pnl_diff = pt.realised_pnl - pt.unrealised_pnl  # NB: temporal mismatch !!!
             # equity = init_cash + {for each tkr [(curr_price - avg_botOrSld) * net_qnty]} - tot_commiss
-            self.equity += (pt.market_value - pt.cost + pnl_diff)   
-            
+            pt_equity = pt.market_value - pt.cost + pnl_diff
+            self.equity += pt_equity
+            self._marks[ticker] = (pt.unrealised_pnl, pt_equity)
+            self._positions_equity += pt_equity
+
+    def _mark_position(self, ticker):
+        """
+        Re-marks only the position in ticker (if still open),
+        replacing its previous contribution to the running sums.
+        """
+        unrealised_pnl, pt_equity = self._marks.pop(ticker, (0, 0))
+        self.unrealised_pnl -= unrealised_pnl
+        self._positions_equity -= pt_equity
+
+        pt = self.positions.get(ticker)
+        if pt is not None:
+            bid, ask = self._get_bid_ask(ticker)
+            pt.update_value(bid, ask)
+            pt_equity = pt.market_value - pt.cost + pt.realised_pnl - pt.unrealised_pnl
+            self._marks[ticker] = (pt.unrealised_pnl, pt_equity)
+            self.unrealised_pnl += pt.unrealised_pnl
+            self._positions_equity += pt_equity
+
+        self.equity = self.init_cash + self.realised_pnl + self._positions_equity
+
+    def settle(self):
+        """
+        Daily variation settlement of the futures positions at their
+        last marked prices (a vectorized pass over the FuturesBook,
+        the data handler is not queried): the variation is paid into
+        cash, i.e. moved from the unrealised pnl to the settled one,
+        and the marks of the positions are rebuilt from the book's
+        arrays (the equity is unchanged). Returns the variation.
+        """
+        if self.futures is None:
+            return 0.0
+        book = self.futures
+        self.unrealised_pnl -= book.unrealised_pnl()
+        variation = book.settle()
+        self.cur_cash += variation
+        # settled: no unrealised pnl, the equity is the settled one
+        tickers, rows = book.open_positions()
+        equity = (book.settled[rows] - book.commission[rows]).tolist()
+        self._marks.update(zip(tickers, zip([0.0] * len(tickers), equity)))
+        self.equity = self.init_cash + self.realised_pnl + self._positions_equity
+        return variation
+
+    def margin_requirement(self):
+        """
+        Initial margin of the futures positions.
+        """
+        return 0.0 if self.futures is None else self.futures.margin_requirement()
+
+    def _is_futures(self, ticker):
+        return self.futures is not None and ticker in self.futures
+
+    def _new_position(self, order_type, ticker, quantity, price, commission, bid, ask):
+        """
+        Creates the position in ticker, of the type of the instrument.
+        """
+        if self._is_futures(ticker):
+            return Futures(
+                order_type, ticker, quantity,
+                price, commission, bid, ask, book=self.futures
+            )
+        return Stock(
+            order_type, ticker, quantity,
+            price, commission, bid, ask
+        )
+
     def _add_position(
             self, order_type, ticker,
             quantity, price, commission
     ):
         """
-        Adds a new Stock position to the Portfolio.
+        Adds a new position (Stock or Futures) to the Portfolio.
 
         This requires:
          - getting bid/ask prices
-         - create the Stock object
+         - create the position object
          - update portfolio values.
         """
         if ticker not in self.positions:  # redundant, since checked in .trade_position
-            if self.data_handler.istick():
-                bid, ask = self.data_handler.get_best_bid_ask(ticker)
-            else:
-                adj_close_price = self.data_handler.get_last_adjclose(ticker)
-                bid, ask = adj_close_price, adj_close_price
+            bid, ask = self._get_bid_ask(ticker)
 
-            self.positions[ticker] = Stock(
+            self.positions[ticker] = self._new_position(
                 order_type, ticker, quantity,
                 price, commission, bid, ask
             )
-            self.update_portfolio()
+            self.update_portfolio(ticker)
         else:
             print(
                 "Ticker %s is already in the positions list. "
@@ -107,11 +198,7 @@ class Portfolio(object):
             self.positions[ticker].trade(
                 order_type, quantity, price, commission
             )
-            if self.data_handler.istick():
-                bid, ask = self.data_handler.get_best_bid_ask(ticker)
-            else:
-                close_price = self.data_handler.get_last_adjclose(ticker)  # get last adj close
-                bid, ask = close_price, close_price
+            bid, ask = self._get_bid_ask(ticker)
 
             self.positions[ticker].update_value(bid, ask)  # TODO: move in the 'if' below?
 
@@ -121,7 +208,7 @@ class Portfolio(object):
                 self.realised_pnl += closed.realised_pnl
                 self.closed_positions.append(closed)
 
-            self.update_portfolio()
+            self.update_portfolio(ticker)
         else:
             print(
                 "Ticker %s not in the current position list. "
@@ -141,7 +228,9 @@ class Portfolio(object):
         PortfolioHandler to update the Portfolio itself.
         """
 
-        if order_type == "BOT":
+        if self._is_futures(ticker):
+            self.cur_cash -= commission     # variation paid at settlement
+        elif order_type == "BOT":
             self.cur_cash -= ((quantity * price) + commission)
         elif order_type == "SLD":
             self.cur_cash += ((quantity * price) - commission)
@@ -10,7 +10,8 @@ from algo2.portfolio import Portfolio
 class PortfolioHandler(object):
     def __init__(
         self, initial_cash, events_queue,
-        data_handler, position_sizer, position_refiner
+        data_handler, position_sizer, position_refiner,
+        incremental=False, futures=None
     ):
         """
         The PortfolioHandler is designed to interact with the
@@ -29,13 +30,19 @@ class PortfolioHandler(object):
         The PortfolioHandler also takes a handle to the
         RiskManager, which is used to modify any generated
         Orders to remain in line with risk parameters.
+
+        If 'incremental' is True, the Portfolio re-marks only the
+        position of the ticker of each market event (see Portfolio).
+
+        'futures' is an OPTIONAL FuturesBook of the futures contracts
+        traded, the positions in them are settled daily (see settle).
         """
         self.initial_cash = initial_cash
         self.events_queue = events_queue
         self.data_handler = data_handler
         self.position_sizer = position_sizer
         self.position_refiner = position_refiner    # risk mgt
-        self.portfolio = Portfolio(data_handler, initial_cash)
+        self.portfolio = Portfolio(data_handler, initial_cash, incremental, futures)
 
     def _create_order_from_signal(self, signal_event):
         """
@@ -82,6 +89,9 @@ class PortfolioHandler(object):
         sized_order = self.position_sizer.size_order(
             self.portfolio, initial_order
         )
+        # Nothing to trade (e.g. a zero target weight)
+        if sized_order.quantity == 0:
+            return
         # Refine or eliminate the order via pos refiner overlay
         order_events = self.position_refiner.refine_orders(
             self.portfolio, sized_order
@@ -109,9 +119,17 @@ class PortfolioHandler(object):
         # Create or modify the position from the fill info
         self.portfolio.trade_position(action, ticker, quantity, price, commission)
         
-    def update_portfolio_value(self):
+    def update_portfolio_value(self, ticker=None):
         """
         Update the portfolio to reflect current market value as
-        based on last bid/ask of each ticker.
+        based on last bid/ask of each ticker (or only of the
+        given ticker, if the portfolio is incremental).
+        """
+        self.portfolio.update_portfolio(ticker)
+
+    def settle(self):
+        """
+        Daily variation settlement of the futures positions
+        (see Portfolio.settle).
         """
-        self.portfolio.update_portfolio()
+        return self.portfolio.settle()
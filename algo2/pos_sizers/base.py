@@ -14,6 +14,15 @@ class AbstractPositionSizer(object):
 
     __metaclass__ = ABCMeta
 
+    def on_market_event(self, event):
+        """
+        Called by the Backtest with each market event (bar or
+        tick), before the strategy, e.g. to update estimates the
+        orders are sized from (see CLAPositionSizer). Does nothing
+        by default.
+        """
+        pass
+
     @abstractmethod
     def size_order(self, portfolio, suggested_order):
         """
@@ -0,0 +1,118 @@
+# no shebang
+# -*- coding: utf-8 -*-
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import numpy as np
+
+from algo2.event import EventType
+from algo2.pos_sizers.rebalance import LiquidateRebalancePositionSizer
+from algo2.risk.covariance import WindowCovariance
+from algo2.statistics.CLA import CLA
+
+
+class CLAPositionSizer(LiquidateRebalancePositionSizer):
+    """
+    Carries out a periodic full liquidation and rebalance of the
+    Portfolio (as LiquidateRebalancePositionSizer) to the max Sharpe
+    ratio or minimum variance weights of the tickers, given by the
+    Critical Line Algorithm (see statistics.CLA) on the mean and
+    covariance matrix of their returns over a rolling window.
+
+    The returns are those of the adjusted close prices (mid prices
+    for ticks) between consecutive timestamps, once all the tickers
+    have a price, and the estimates (see risk.covariance, by default
+    over a rolling window) are updated from each market event (see
+    on_market_event, called by the Backtest) in O(n^2) for n tickers.
+
+    The weights are computed on the first order sized at a timestamp,
+    from the returns up to the previous timestamp, by a CLA warm
+    started from the previous one (see CLA.warm_start) and solved
+    down to the target portfolio only. Until 'window' returns are
+    estimated, the weights are the initial ones.
+
+    :param tickers - the tickers of the portfolio;
+    :param window - OPTIONAL no. of returns in the window, default 252;
+    :param target - OPTIONAL "max_sharpe" (default) or "min_var";
+    :param l_b - OPTIONAL lower bound(s) of the weights, default 0.0;
+    :param u_b - OPTIONAL upper bound(s) of the weights, default 1.0;
+    :param ticker_weights - OPTIONAL initial weights, a dict (default:
+        equal weights);
+    :param covariance - OPTIONAL estimator of the returns' mean and
+        covariance, e.g. EWCovariance (default: WindowCovariance over
+        'window' returns).
+    """
+    TARGETS = ("max_sharpe", "min_var")
+
+    def __init__(self, tickers, window=252, target="max_sharpe", l_b=0.0, u_b=1.0,
+                 ticker_weights=None, covariance=None):
+        if target not in self.TARGETS:
+            raise ValueError("target must be one of %s, got '%s'" % (", ".join(self.TARGETS), target))
+        tickers = list(tickers)
+        if ticker_weights is None:
+            ticker_weights = {ticker: 1.0 / len(tickers) for ticker in tickers}
+        super(CLAPositionSizer, self).__init__(dict(ticker_weights))
+        self.tickers = tickers
+        self.window = window
+        self.target = target
+        n = len(tickers)
+        self.l_b = np.array(np.broadcast_to(np.asarray(l_b, dtype=float), (n,))).reshape(-1, 1)
+        self.u_b = np.array(np.broadcast_to(np.asarray(u_b, dtype=float), (n,))).reshape(-1, 1)
+        self.covariance = WindowCovariance(n, window) if covariance is None else covariance
+        self.cla = None                         # last solution, to warm start the next one
+        self._index = {ticker: i for i, ticker in enumerate(tickers)}
+        self._prices = np.full(n, np.nan)       # last prices
+        self._last_prices = np.full(n, np.nan)  # at the previous timestamp
+        self._time = None
+        self._weights_time = None
+
+    def on_market_event(self, event):
+        """
+        Updates the tickers' prices, and the rolling estimates with the
+        returns of the previous timestamp at the first event of a new one.
+        """
+        i = self._index.get(event.ticker)
+        if i is None:
+            return
+        if event.time != self._time:
+            if self._time is not None:
+                self._end_timestamp()
+            self._time = event.time
+        if event.type == EventType.BAR:
+            self._prices[i] = event.adj_close_price
+        else:
+            self._prices[i] = (event.bid + event.ask) / 2.0
+
+    def _end_timestamp(self):
+        if not np.isnan(self._last_prices).any():
+            self.covariance.update(self._prices / self._last_prices - 1.0)
+        self._last_prices[:] = self._prices
+
+    def _update_weights(self):
+        """
+        Solves the CLA on the current estimates, sets ticker_weights to
+        its target portfolio.
+        """
+        max_sharpe = self.target == "max_sharpe"
+        # copies: the estimates are views, updated in place
+        cla = CLA(
+            np.array(self.covariance.mean()).reshape(-1, 1), np.array(self.covariance.cov()),
+            self.l_b, self.u_b
+        )
+        if self.cla is not None:
+            cla.warm_start(self.cla, max_sharpe)
+        cla.solve(stop_at_max_sharpe=max_sharpe)
+        weights = cla.get_max_sharpe()[1] if max_sharpe else cla.get_min_var()[1]
+        self.ticker_weights = dict(zip(self.tickers, weights.ravel()))
+        self.cla = cla
+
+    def size_order(self, portfolio, initial_order):
+        """
+        Size the order as LiquidateRebalancePositionSizer, to the
+        current CLA target weights.
+        """
+        if initial_order.action != "EXIT" and self._time != self._weights_time:
+            self._weights_time = self._time
+            if len(self.covariance) >= self.window:
+                self._update_weights()
+        return super(CLAPositionSizer, self).size_order(portfolio, initial_order)
@@ -32,8 +32,9 @@ class LiquidateRebalancePositionSizer(AbstractPositionSizer):
         """
         ticker = initial_order.ticker
         if initial_order.action == "EXIT":
-            # Obtain current quantity and liquidate
-            cur_quantity = portfolio.positions[ticker].quantity
+            # Obtain current quantity (none if never bought, e.g. at a zero weight) and liquidate
+            position = portfolio.positions.get(ticker)
+            cur_quantity = 0 if position is None else position.quantity
             if cur_quantity > 0:
                 initial_order.action = "SLD"
                 initial_order.quantity = cur_quantity
@@ -3,14 +3,165 @@
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
+import math
+
+from algo2.event import EventType
 from algo2.pos_sizers.base_sizer import AbstractPositionSizer   # using absolute ref
+from algo2.rolling import RollingWindow
+
+
+class _TickerVolatility(object):
+    """
+    Realized volatility (per period) of a ticker's returns, updated
+    in O(1) per price:
+    - EWMA: the exponentially weighted mean of the squared returns
+      (zero mean, as RiskMetrics), normalised by the sum of the
+      weights so that it is not biased towards 0 at the start (as
+      pandas' ewm(adjust=True));
+    - rolling: the (sample) standard deviation of the returns over
+      the last 'window' ones.
+    """
+    __slots__ = ("price", "count", "decay", "ewma_num", "ewma_den", "rolling")
+
+    def __init__(self, decay, window):
+        self.price = None
+        self.count = 0          # no. of returns
+        self.decay = decay
+        self.ewma_num = 0.0
+        self.ewma_den = 0.0
+        self.rolling = RollingWindow(window, extremes=False)
+
+    def update(self, price):
+        last = self.price
+        self.price = price
+        if last is None or last <= 0:
+            return
+        ret = price / last - 1.0
+        decay = self.decay
+        self.ewma_num = decay * self.ewma_num + ret * ret
+        self.ewma_den = decay * self.ewma_den + 1.0
+        self.rolling.append(ret)
+        self.count += 1
+
+    def ewma(self):
+        return math.sqrt(self.ewma_num / self.ewma_den) if self.count else float("nan")
+
+    def rolling_std(self):
+        return self.rolling.std()
 
 
 class VolTargetStockPositionSizer(AbstractPositionSizer):
     """
-    Carries out a volatility target sizing
-    for a Stock the order.
+    Carries out a volatility target sizing for a Stock order: each
+    position is sized so that its annualized volatility is
+    target_vol / n_positions of the equity, i.e. the portfolio is at
+    the target volatility with n_positions positions when they are
+    perfectly correlated (below it otherwise).
+
+    The volatility of each ticker is estimated from the returns of its
+    adjusted close prices (mid prices for ticks) between its market
+    events, seen before the strategy (see on_market_event, called by
+    the Backtest), in O(1) per event: an EWMA of the squared returns
+    and/or the standard deviation over a rolling window (see method).
+    Sizing an order is then a few dict lookups and float operations.
+
+    "BOT" and "SLD" orders are sized to the target position in their
+    direction (the difference with the current one, none if already
+    beyond it) or, if there is a position in the other direction,
+    to close it; "EXIT" orders close the current position. The
+    current position is the signed net quantity of the portfolio's
+    position (its quantity is unsigned until traded again). Until
+    min_periods returns of the ticker are seen, the orders are not
+    sized (a quantity of 0, i.e. no order).
+
+    :param target_vol - OPTIONAL annualized portfolio volatility, default 0.10;
+    :param n_positions - OPTIONAL no. of positions the volatility is
+        shared by, default 1;
+    :param method - OPTIONAL "ewma" (default), "rolling" or "max" (the
+        larger of both estimates);
+    :param halflife - OPTIONAL halflife of the EWMA, in periods, default 20;
+    :param window - OPTIONAL no. of returns of the rolling window, default 60;
+    :param min_periods - OPTIONAL no. of returns before sizing, default 20;
+    :param periods - OPTIONAL no. of periods per year, default 252;
+    :param max_weight - OPTIONAL cap of a position's value as a fraction
+        of the equity, default 1.0 (no leverage).
     """
-    def size_order(self, portfolio, initial_order):
+    METHODS = ("ewma", "rolling", "max")
+
+    def __init__(self, target_vol=0.10, n_positions=1, method="ewma", halflife=20,
+                 window=60, min_periods=20, periods=252, max_weight=1.0):
+        if method not in self.METHODS:
+            raise ValueError("method must be one of %s, got '%s'" % (", ".join(self.METHODS), method))
+        if target_vol <= 0 or n_positions < 1 or halflife <= 0:
+            raise ValueError("target_vol, n_positions and halflife must be positive")
+        self.target_vol = target_vol
+        self.n_positions = n_positions
+        self.method = method
+        self.halflife = halflife
+        self.window = window
+        self.min_periods = max(min_periods, 2 if method != "ewma" else 1)
+        self.periods = periods
+        self.max_weight = max_weight
+        self.decay = 0.5 ** (1.0 / halflife)
+        self.volatilities = {}  # ticker -> _TickerVolatility
+        # per-period volatility of each position, as a fraction of the equity
+        self._target = target_vol / (n_positions * math.sqrt(periods))
+
+    def on_market_event(self, event):
+        """
+        Updates the volatility estimates of the event's ticker.
+        """
+        volatility = self.volatilities.get(event.ticker)
+        if volatility is None:
+            volatility = self.volatilities[event.ticker] = _TickerVolatility(self.decay, self.window)
+        if event.type == EventType.BAR:
+            volatility.update(event.adj_close_price)
+        else:
+            volatility.update((event.bid + event.ask) / 2.0)
 
-        pass
+    def volatility(self, ticker):
+        """
+        The annualized volatility estimate of ticker (NaN until
+        min_periods returns are seen).
+        """
+        return self._volatility(self.volatilities.get(ticker)) * math.sqrt(self.periods)
+
+    def _volatility(self, volatility):
+        """
+        The per-period volatility estimate of a _TickerVolatility.
+        """
+        if volatility is None or volatility.count < self.min_periods:
+            return float("nan")
+        if self.method == "ewma":
+            return volatility.ewma()
+        if self.method == "rolling":
+            return volatility.rolling_std()
+        return max(volatility.ewma(), volatility.rolling_std())
+
+    def target_quantity(self, portfolio, ticker):
+        """
+        The (unsigned) no. of shares of the target position in ticker,
+        0 if its volatility is not estimated yet.
+        """
+        volatility = self.volatilities.get(ticker)
+        vol = self._volatility(volatility)
+        if not vol > 0 or not volatility.price > 0:
+            return 0
+        weight = min(self._target / vol, self.max_weight)
+        return int(math.floor(weight * portfolio.equity / volatility.price))
+
+    def size_order(self, portfolio, initial_order):
+        """
+        Size the order to (or towards) the target volatility position.
+        """
+        position = portfolio.positions.get(initial_order.ticker)
+        cur_quantity = 0 if position is None else position.net
+        action = initial_order.action
+        if action == "EXIT" or (action == "BOT" and cur_quantity < 0) or (action == "SLD" and cur_quantity > 0):
+            # liquidate
+            initial_order.action = "SLD" if cur_quantity > 0 else "BOT"
+            initial_order.quantity = abs(cur_quantity)
+        else:
+            quantity = self.target_quantity(portfolio, initial_order.ticker) - abs(cur_quantity)
+            initial_order.quantity = max(quantity, 0)
+        return initial_order
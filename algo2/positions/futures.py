@@ -3,13 +3,252 @@
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
+import numpy as np
+
 from algo2.positions.base_position import AbstractPosition
 
-# TODO: write futures contract
+
+class FuturesBook(object):
+    """
+    Array-backed book-keeping of futures contracts: the point value,
+    (initial) margin per contract, net quantity, reference value, last
+    price, settled variation and commissions of each open position are
+    rows of float64 arrays, so that marking or settling all of them is
+    a single vectorized operation (see settle).
+
+    The reference value of a position is the sum of its signed traded
+    quantities x prices since its last settlement (the quantity x
+    settlement price at it), i.e. its variation at a price p is:
+        point value * (quantity * p - reference value)
+    and trades through zero (reversals) need no average price.
+
+    A row is released, and re-used, once its position is closed, the
+    variation not settled yet being paid at the next settlement.
+
+    :param contracts - OPTIONAL dict of ticker -> (point value, margin);
+    :param capacity - OPTIONAL no. of rows allocated initially.
+    """
+    FIELDS = ("point_value", "margin", "quantity", "reference", "price", "settled", "commission")
+
+    def __init__(self, contracts=None, capacity=64):
+        self.contracts = {}     # ticker -> (point value, margin per contract)
+        for ticker, (point_value, margin) in (contracts or {}).items():
+            self.add_contract(ticker, point_value, margin)
+        for field in self.FIELDS:
+            setattr(self, field, np.zeros(max(capacity, 1)))
+        self._size = 0          # no. of rows used (open or released)
+        self._free = []         # released rows
+        self.rows = {}          # ticker -> row of its open position
+        self._tickers = {}      # row -> ticker
+        self.pending = 0.0      # variation of closed positions, not settled yet
+
+    def __contains__(self, ticker):
+        return ticker in self.contracts
+
+    def __len__(self):
+        """
+        No. of open positions.
+        """
+        return self._size - len(self._free)
+
+    def add_contract(self, ticker, point_value, margin=0.0):
+        """
+        Adds (or replaces) the specification of a contract.
+        """
+        if point_value <= 0 or margin < 0:
+            raise ValueError("point_value must be positive and margin non-negative, got %s, %s"
+                             % (point_value, margin))
+        self.contracts[ticker] = (float(point_value), float(margin))
+
+    def open(self, ticker):
+        """
+        Allocates a (zeroed) row to a new position in ticker, returns it.
+        """
+        point_value, margin = self.contracts[ticker]
+        if self._free:
+            row = self._free.pop()
+        else:
+            row = self._size
+            if row == len(self.quantity):
+                for field in self.FIELDS:
+                    values = getattr(self, field)
+                    grown = np.zeros(2 * len(values))
+                    grown[:row] = values
+                    setattr(self, field, grown)
+            self._size += 1
+        self.point_value[row] = point_value
+        self.margin[row] = margin
+        self.rows[ticker] = row
+        self._tickers[row] = ticker
+        return row
+
+    def release(self, row):
+        """
+        Releases the row of a closed position, its variation is
+        paid at the next settlement.
+        """
+        ticker = self._tickers.pop(row)
+        if self.rows.get(ticker) == row:
+            del self.rows[ticker]
+        self.pending += self.point_value[row] * (self.quantity[row] * self.price[row] - self.reference[row])
+        for field in self.FIELDS:
+            getattr(self, field)[row] = 0.0
+        self._free.append(row)
+
+    def settle(self, prices=None):
+        """
+        Daily variation settlement of all the positions, at their last
+        prices (or at prices, an array of the rows' prices): returns
+        the variation paid (received if negative), incl. that of the
+        positions closed since the last settlement.
+        """
+        n = self._size
+        if prices is not None:
+            self.price[:n] = prices[:n]
+        marked = self.quantity[:n] * self.price[:n]
+        variation = self.point_value[:n] * (marked - self.reference[:n])
+        self.settled[:n] += variation
+        self.reference[:n] = marked
+        total = float(variation.sum()) + self.pending
+        self.pending = 0.0
+        return total
+
+    def open_positions(self):
+        """
+        The tickers of the open positions and the array of their rows.
+        """
+        tickers = list(self.rows)
+        return tickers, np.fromiter(self.rows.values(), dtype=np.intp, count=len(tickers))
+
+    def margin_requirement(self):
+        """
+        Initial margin of all the open positions.
+        """
+        n = self._size
+        return float(np.dot(np.abs(self.quantity[:n]), self.margin[:n]))
+
+    def unrealised_pnl(self):
+        """
+        Variation of all the open positions since their last settlement.
+        """
+        n = self._size
+        return float(np.dot(
+            self.point_value[:n], self.quantity[:n] * self.price[:n] - self.reference[:n]
+        ))
+
 
 class Futures(AbstractPosition):
     """
     Book-keeping for futures contract qnty/value
     and following trades in same contracts.
+
+    The position is a row of a FuturesBook (a book of its own, if
+    none is given), with the same interface as Stock, in currency
+    units, i.e. x point value:
+    - quantity: net no. of contracts (negative if short);
+    - market_value: notional value at the last price;
+    - cost: notional value at the reference prices (see FuturesBook);
+    - unrealised_pnl: variation since the last settlement;
+    - realised_pnl: total PnL (settled and unsettled variation,
+      less commissions), incl. of the unrealised one as for Stock.
+
+    :param order_type - "BOT" or "SLD";
+    :param symbol - the ticker of the contract;
+    :param init_quantity - no. of contracts traded;
+    :param init_price, init_commission - of the trade;
+    :param bid, ask - current prices;
+    :param book - OPTIONAL FuturesBook of the position;
+    :param point_value - OPTIONAL value of a point (e.g. 50 for ES),
+        if the contract is not in the book, default 1;
+    :param margin - OPTIONAL (initial) margin per contract, if the
+        contract is not in the book, default 0.
     """
-    pass
+    def __init__(
+        self, order_type, symbol,
+        init_quantity, init_price, init_commission,
+        bid, ask, book=None, point_value=1.0, margin=0.0
+    ):
+        if book is None:
+            book = FuturesBook()
+        if symbol not in book:
+            book.add_contract(symbol, point_value, margin)
+        self.order_type = order_type
+        self.symbol = symbol
+        self.book = book
+        self.row = book.open(symbol)
+        self.point_value, self.margin_per_contract = book.contracts[symbol]
+        self.buys, self.sells = 0, 0
+        self._closed = None     # final values, once closed
+        self.trade(order_type, init_quantity, init_price, init_commission)
+        self.update_value(bid, ask)
+
+    def _get(self, field):
+        if self.row is None:
+            return self._closed[field]
+        return getattr(self.book, field).item(self.row)
+
+    @property
+    def quantity(self):
+        return self._get("quantity")
+
+    @property
+    def price(self):
+        return self._get("price")
+
+    @property
+    def total_commission(self):
+        return self._get("commission")
+
+    @property
+    def market_value(self):
+        return self.point_value * self._get("quantity") * self._get("price")
+
+    @property
+    def cost(self):
+        return self.point_value * self._get("reference")
+
+    @property
+    def unrealised_pnl(self):
+        return self.market_value - self.cost
+
+    @property
+    def realised_pnl(self):
+        return self._get("settled") + self.unrealised_pnl - self._get("commission")
+
+    @property
+    def margin(self):
+        """
+        Initial margin of the position.
+        """
+        return abs(self._get("quantity")) * self.margin_per_contract
+
+    def update_value(self, bid, ask):
+        """
+        Marks the position at the mid-price of the bid-ask spread.
+        """
+        if self.row is not None:
+            self.book.price[self.row] = (bid + ask) / 2
+
+    def trade(self, order_type, quantity, price, commission):
+        """
+        Books the trade of quantity contracts at price: the position
+        is closed (and its row released) once its quantity is zero.
+        """
+        if self.row is None:
+            raise ValueError("Position in %s is closed" % self.symbol)
+        if order_type == "BOT":
+            self.buys += quantity
+        elif order_type == "SLD":
+            self.sells += quantity
+            quantity = -quantity
+        else:
+            raise ValueError("Unsupported order_type '%s'" % order_type)
+        book, row = self.book, self.row
+        book.quantity[row] += quantity
+        book.reference[row] += quantity * price
+        book.commission[row] += commission
+        if book.quantity[row] == 0:
+            book.price[row] = price
+            self._closed = {field: getattr(book, field).item(row) for field in book.FIELDS}
+            self.row = None
+            book.release(row)
@@ -0,0 +1,282 @@
+# no shebang
+# -*- coding: utf-8 -*-
+"""
+Running estimates of the mean vector and covariance matrix of the
+returns of n tickers, for the position sizers (e.g. CLAPositionSizer)
+and refiners: updated in O(n^2) per vector of returns rather than
+re-computed from a window in O(window * n^2).
+"""
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+from abc import ABCMeta, abstractmethod
+
+import numpy as np
+
+
+class AbstractCovariance(object):
+    """
+    The AbstractCovariance abstract class estimates the mean vector and
+    covariance matrix of vectors of n values, from the weighted sums of
+    the vectors' deviations from their mean and of their products,
+    updated by West's algorithm as the vectors are added (weight 1),
+    removed or their weights decay. The covariance matrix is the
+    unbiased estimate for these weights.
+
+    If 'shrinkage' is True, the covariance matrix is shrunk towards
+    the scaled identity matrix by the Ledoit-Wolf intensity, estimated
+    from the (squared weights') sums of the vectors' moments up to the
+    4th order, also updated in O(n^2) per vector.
+
+    mean() and cov() return read-only views of internal arrays, i.e.
+    no copy: they are valid until the next update (copy to keep them).
+
+    :param n - no. of values per vector;
+    :param shrinkage - OPTIONAL Ledoit-Wolf shrinkage, default False.
+    """
+
+    __metaclass__ = ABCMeta
+
+    # if False, all the weights are 1: the squared weights' sums of x
+    # and x.x' are those of the weights, not kept
+    decaying = False
+
+    def __init__(self, n, shrinkage=False):
+        self.n = n
+        self.shrinkage = shrinkage
+        self._count = 0                 # no. of vectors in the estimates
+        self._w1 = 0.0                  # sum of the weights
+        self._w2 = 0.0                  # sum of the squared weights
+        self._mean = np.zeros(n)
+        self._m2 = np.zeros((n, n))     # weighted sums of products of the deviations
+        if shrinkage:
+            # squared weights' sums of x, x.x', |x|^2, |x|^2 * x and |x|^4
+            if self.decaying:
+                self._s_x = np.zeros(n)
+                self._s_xx = np.zeros((n, n))
+            self._s_a = 0.0
+            self._s_ax = np.zeros(n)
+            self._s_aa = 0.0
+        self._intensity = 0.0
+        self._cov = np.full((n, n), np.nan)
+        self._stale = False
+        self._mean_view = self._mean.view()
+        self._mean_view.flags.writeable = False
+        self._cov_view = self._cov.view()
+        self._cov_view.flags.writeable = False
+
+    def __len__(self):
+        return self._count
+
+    @abstractmethod
+    def update(self, values):
+        """
+        Adds the vector of values to the estimates.
+        """
+        raise NotImplementedError("Should implement update()")
+
+    def _add(self, x, decay=1.0):
+        """
+        Adds x with weight 1, after the weights of the others decay.
+        """
+        w1 = decay * self._w1 + 1.0
+        delta = x - self._mean
+        self._m2 *= decay
+        self._m2 += (w1 - 1.0) / w1 * np.outer(delta, delta)
+        self._mean += delta / w1
+        self._w1 = w1
+        self._w2 = decay ** 2 * self._w2 + 1.0
+        if self.shrinkage:
+            if self.decaying:
+                self._s_x *= decay ** 2
+                self._s_xx *= decay ** 2
+                self._s_ax *= decay ** 2
+                self._s_a *= decay ** 2
+                self._s_aa *= decay ** 2
+            self._add_moments(x, 1.0)
+        self._count += 1
+        self._stale = True
+
+    def _remove(self, x):
+        """
+        Removes x (of weight 1).
+        """
+        w1 = self._w1 - 1.0
+        if w1 <= 0.0:
+            self._mean[:] = 0.0
+            self._m2[:] = 0.0
+        else:
+            delta = x - self._mean
+            self._mean -= delta / w1
+            self._m2 -= self._w1 / w1 * np.outer(delta, delta)
+        self._w1 = w1
+        self._w2 -= 1.0
+        if self.shrinkage:
+            self._add_moments(x, -1.0)
+        self._count -= 1
+        self._stale = True
+
+    def _add_moments(self, x, sign):
+        a = np.dot(x, x)
+        if self.decaying:
+            self._s_x += sign * x
+            self._s_xx += sign * np.outer(x, x)
+        self._s_a += sign * a
+        self._s_ax += sign * a * x
+        self._s_aa += sign * a * a
+
+    def _ledoit_wolf(self):
+        """
+        Ledoit-Wolf shrinkage intensity, from the biased covariance
+        matrix S = m2 / w1 and the squared weights' sums of the
+        squared norms |y.y' - S|^2 of the deviations y = x - mean, in
+        terms of the vectors' moments (not stored).
+        """
+        w1, w2, m2 = self._w1, self._w2, self._m2
+        m = self._mean
+        mm = np.dot(m, m)
+        m_m2_m = np.dot(m, np.dot(m2, m))
+        if self.decaying:
+            s_x = self._s_x
+            m_xx_m = np.dot(m, np.dot(self._s_xx, m))
+            # sum of w^2 * y.y', scalar product with m2
+            yy_m2 = (np.vdot(self._s_xx, m2) - 2 * np.dot(s_x, np.dot(m2, m)) + w2 * m_m2_m)
+        else:
+            s_x = w1 * m
+            m_xx_m = m_m2_m + w1 * mm ** 2
+            yy_m2 = np.vdot(m2, m2)
+        # sum of w^2 * |y|^4
+        y4 = (self._s_aa + 4 * m_xx_m + w2 * mm ** 2 - 4 * np.dot(m, self._s_ax) +
+              2 * mm * self._s_a - 4 * mm * np.dot(m, s_x))
+        ss = np.vdot(m2, m2) / w1 ** 2                          # |S|^2
+        b2 = (y4 - 2 * yy_m2 / w1 + w2 * ss) / w1 ** 2
+        d2 = ss - np.trace(m2) ** 2 / (w1 ** 2 * self.n)        # |S - mu * I|^2
+        if d2 <= 0.0:
+            return 0.0
+        return min(max(b2, 0.0), d2) / d2
+
+    def _refresh(self):
+        denominator = self._w1 - self._w2 / self._w1 if self._w1 > 0 else 0.0
+        cov = self._cov
+        if denominator <= 0.0:
+            cov.fill(np.nan)
+            self._intensity = 0.0
+        else:
+            np.add(self._m2, self._m2.T, out=cov)   # symmetric, up to rounding
+            cov /= 2.0 * denominator
+            if self.shrinkage:
+                self._intensity = self._ledoit_wolf()
+                target = self._intensity * np.trace(cov) / self.n
+                cov *= 1.0 - self._intensity
+                cov.flat[::self.n + 1] += target
+        self._stale = False
+
+    def mean(self):
+        """
+        The mean vector (a read-only view, valid until the next update).
+        """
+        return self._mean_view
+
+    def cov(self):
+        """
+        The covariance matrix, shrunk if so (a read-only view, valid
+        until the next update), NaN without enough vectors.
+        """
+        if self._stale:
+            self._refresh()
+        return self._cov_view
+
+    def shrinkage_intensity(self):
+        """
+        The Ledoit-Wolf shrinkage intensity in [0, 1] (0 if no shrinkage).
+        """
+        if self._stale:
+            self._refresh()
+        return self._intensity
+
+
+class WindowCovariance(AbstractCovariance):
+    """
+    Mean and covariance matrix of the last 'window' vectors: these are
+    kept in a ring buffer backed by a preallocated (window x n) array,
+    the oldest one removed as a new one is added. The running sums are
+    re-computed from the buffer each time it wraps around (amortised
+    O(n^2)), so that rounding errors do not accumulate.
+
+    :param n - no. of values per vector;
+    :param window - no. of vectors in the window;
+    :param shrinkage - OPTIONAL Ledoit-Wolf shrinkage, default False.
+    """
+    def __init__(self, n, window, shrinkage=False):
+        if window < 1:
+            raise ValueError("window must be positive, got %s" % window)
+        super(WindowCovariance, self).__init__(n, shrinkage)
+        self.window = window
+        self._buffer = np.zeros((window, n), dtype=np.float64)
+        self._appended = 0      # no. of vectors added so far
+
+    def is_full(self):
+        return self._appended >= self.window
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        i = self._appended % self.window
+        if self._appended >= self.window:
+            self._remove(self._buffer[i])
+        self._add(values)
+        self._buffer[i] = values
+        self._appended += 1
+        if i == self.window - 1 and self._appended > self.window:
+            self._resync()
+
+    def _resync(self):
+        """
+        Re-computes the running sums from the (full) buffer.
+        """
+        buffer = self._buffer
+        self._mean[:] = buffer.mean(axis=0)
+        deviations = buffer - self._mean
+        self._m2[:] = np.dot(deviations.T, deviations)
+        if self.shrinkage:
+            a = np.einsum("ij,ij->i", buffer, buffer)
+            self._s_a = a.sum()
+            self._s_ax[:] = np.dot(a, buffer)
+            self._s_aa = np.dot(a, a)
+
+    def values(self):
+        """
+        The vectors in the window (rows), oldest first (a copy).
+        """
+        if self._appended <= self.window:
+            return self._buffer[:self._appended].copy()
+        i = self._appended % self.window
+        return np.concatenate((self._buffer[i:], self._buffer[:i]))
+
+
+class EWCovariance(AbstractCovariance):
+    """
+    Exponentially weighted mean and covariance matrix: the weight of
+    each past vector decays by (1 - alpha) per vector added, as in
+    pandas' ewm (adjust=True, bias=False).
+
+    :param n - no. of values per vector;
+    :param halflife - no. of vectors for a weight to halve, or
+    :param alpha - the smoothing factor, in (0, 1];
+    :param shrinkage - OPTIONAL Ledoit-Wolf shrinkage, default False.
+    """
+    decaying = True
+
+    def __init__(self, n, halflife=None, alpha=None, shrinkage=False):
+        if (halflife is None) == (alpha is None):
+            raise ValueError("Either halflife or alpha must be given")
+        if alpha is None:
+            if halflife <= 0:
+                raise ValueError("halflife must be positive, got %s" % halflife)
+            alpha = 1.0 - np.exp(np.log(0.5) / halflife)
+        if not 0 < alpha <= 1:
+            raise ValueError("alpha must be in (0, 1], got %s" % alpha)
+        super(EWCovariance, self).__init__(n, shrinkage)
+        self.alpha = alpha
+
+    def update(self, values):
+        self._add(np.asarray(values, dtype=np.float64), 1.0 - self.alpha)
@@ -0,0 +1,132 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+from collections import deque
+import math
+
+import numpy as np
+
+
+class RollingWindow(object):
+    """
+    Rolling statistics over the last 'window' values, updated in
+    O(1) per value: the values are kept in a ring buffer backed by
+    a preallocated float64 array, with a running sum, mean and sum
+    of squared deviations (Welford's algorithm, adding the new value
+    and removing the oldest one) and monotonic deques for min/max.
+
+    The running sums are re-computed from the buffer each time it
+    wraps around, i.e. O(window) every 'window' values (amortised
+    O(1)), so that rounding errors do not accumulate.
+
+    :param window - no. of values in the window;
+    :param extremes - if False, min/max are not tracked (a faster
+        append, e.g. when only the mean is needed).
+    """
+    def __init__(self, window, extremes=True):
+        if window < 1:
+            raise ValueError("window must be positive, got %s" % window)
+        self.window = window
+        self.extremes = extremes
+        self._buffer = np.zeros(window, dtype=np.float64)
+        self._count = 0         # no. of values appended so far
+        self._sum = 0.0
+        self._mean = 0.0
+        self._m2 = 0.0          # sum of squared deviations from the mean
+        self._min = deque()     # (count, value), increasing values
+        self._max = deque()     # (count, value), decreasing values
+
+    def __len__(self):
+        return min(self._count, self.window)
+
+    def is_full(self):
+        return self._count >= self.window
+
+    def append(self, value):
+        """
+        Adds value to the window, dropping the oldest one if full.
+        """
+        value = float(value)
+        count = self._count
+        window = self.window
+        i = count % window
+        if count < window:
+            n = count + 1
+            delta = value - self._mean
+            self._mean += delta / n
+            self._m2 += delta * (value - self._mean)
+            self._sum += value
+        else:
+            old = self._buffer.item(i)
+            mean = self._mean
+            self._mean = mean + (value - old) / window
+            self._m2 += (value - old) * (value - self._mean + old - mean)
+            self._sum += value - old
+        self._buffer[i] = value
+        self._count = count + 1
+        if i == window - 1 and count >= window:
+            self._resync()
+
+        if not self.extremes:
+            return
+        # monotonic deques: drop dominated, then expired, values
+        expired = count + 1 - window
+        lows = self._min
+        while lows and lows[-1][1] >= value:
+            lows.pop()
+        lows.append((count, value))
+        if lows[0][0] < expired:
+            lows.popleft()
+        highs = self._max
+        while highs and highs[-1][1] <= value:
+            highs.pop()
+        highs.append((count, value))
+        if highs[0][0] < expired:
+            highs.popleft()
+
+    def _resync(self):
+        """
+        Re-computes the running sums from the (full) buffer.
+        """
+        self._sum = float(self._buffer.sum())
+        self._mean = self._sum / self.window
+        self._m2 = float(((self._buffer - self._mean) ** 2).sum())
+
+    def values(self):
+        """
+        The values in the window, oldest first (a copy).
+        """
+        if self._count <= self.window:
+            return self._buffer[:self._count].copy()
+        i = self._count % self.window
+        return np.concatenate((self._buffer[i:], self._buffer[:i]))
+
+    def sum(self):
+        return self._sum
+
+    def mean(self):
+        return self._mean if self._count else np.nan
+
+    def var(self, ddof=1):
+        """
+        Variance of the values in the window (sample one by default).
+        """
+        n = len(self)
+        if n - ddof <= 0:
+            return np.nan
+        return max(self._m2, 0.0) / (n - ddof)
+
+    def std(self, ddof=1):
+        return math.sqrt(self.var(ddof))
+
+    def min(self):
+        if not self.extremes:
+            raise ValueError("min is not tracked (extremes=False)")
+        return self._min[0][1] if self._min else np.nan
+
+    def max(self):
+        if not self.extremes:
+            raise ValueError("max is not tracked (extremes=False)")
+        return self._max[0][1] if self._max else np.nan
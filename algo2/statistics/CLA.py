@@ -5,6 +5,77 @@ from __future__ import (absolute_import, division, print_function)
 import numpy as np
 
 
+# max. deviation from the identity of covar_f_inv.covar_f (free x free)
+# before the inverse is re-computed, i.e. bound on the rounding errors
+# accumulated by its incremental updates
+REFRESH_TOL = 1e-9
+
+# relative tolerance of the lambdas' comparisons: a bounded weight is
+# freed at a lambda strictly below the last one, e.g. not the weight
+# just bounded, whose lambda to be freed is the last one (up to rounding)
+LAMBDA_TOL = 1e-9
+
+# warm start (max Sharpe ratio): ratio of the starting lambda to that
+# of the previous max Sharpe ratio portfolio's segment, to start above
+# the new one
+MAX_SHARPE_MARGIN = 1.5
+
+
+class _FreeSet(object):
+    """
+    The free assets (in order) with the inverse of their covariance
+    matrix, covar_f_inv, kept through the turning points:
+    - proj = covar_f_inv.covar_f (free x all assets), whose column i
+      is covar_f_inv.covar_f_i, the regression of asset i on the
+      free ones;
+    - schur, for all assets, the Schur complement of their variance,
+      covar_ii - covar_if.covar_f_inv.covar_fi (0 for free assets).
+
+    An asset entering or leaving the free set is a rank-one update
+    of covar_f_inv, by block inversion of the bordered matrix (or
+    the reverse), in O(n * free) instead of a new inverse.
+    """
+    def __init__(self, covar, f):
+        self.covar = covar
+        self.f = list(f)
+        self.refresh()
+
+    def refresh(self):
+        f = self.f
+        self.inv = np.linalg.inv(self.covar[np.ix_(f, f)])
+        self.proj = np.dot(self.inv, self.covar[f])
+        self.schur = np.diag(self.covar) - np.einsum("ij,ij->j", self.covar[f], self.proj)
+
+    def drifted(self):
+        return np.abs(self.proj[:, self.f] - np.eye(len(self.f))).max() > REFRESH_TOL
+
+    def add(self, i):
+        u = self.proj[:, i]
+        s = self.schur[i]
+        z = (self.covar[i] - np.dot(self.covar[i, self.f], self.proj)) / s
+        n = len(self.f)
+        inv = np.empty((n + 1, n + 1))
+        inv[:n, :n] = self.inv + np.outer(u, u) / s
+        inv[:n, n] = inv[n, :n] = -u / s
+        inv[n, n] = 1.0 / s
+        self.inv = inv
+        self.proj = np.vstack([self.proj - np.outer(u, z), z])
+        self.schur -= s * z ** 2
+        self.schur[i] = 0.0
+        self.f.append(i)
+
+    def remove(self, i):
+        j = self.f.index(i)
+        keep = np.arange(len(self.f)) != j
+        d = self.inv[j, j]
+        column = self.inv[keep, j] / d
+        row = self.proj[j]
+        self.inv = self.inv[np.ix_(keep, keep)] - np.outer(column, self.inv[j, keep])
+        self.proj = self.proj[keep] - np.outer(column, row)
+        self.schur += row ** 2 / d
+        self.f.remove(i)
+
+
 # noinspection PyUnboundLocalVariable,PyUnboundLocalVariable,PyUnresolvedReferences,PyUnresolvedReferences
 class CLA:
     """
@@ -16,6 +87,11 @@ class CLA:
     - get_min_var()
     - eff_frontier()
 
+    The inverse of the free assets' covariance matrix is kept from one
+    turning point to the next and updated in O(n^2) when an asset
+    enters or leaves the free set (see _FreeSet), and the lambdas of
+    all the candidate assets are computed at once from it (no inverse
+    per candidate).
     """
     def __init__(self, mean, covar, l_b, u_b):
         # if (mean == np.ones(mean.shape) * mean.mean()).all(): mean[-1, 0] += 1e-5
@@ -28,202 +104,251 @@ class CLA:
         self.g = []  # gammas
         self.f = []  # free weights
 
-    def solve(self):
-        # Compute the turning points,free sets and weights
-        f, w = self._init_algo()
-        self.w.append(np.copy(w))  # store solution
-        self.l.append(None)
-        self.g.append(None)
-        self.f.append(f[:])
+    def solve(self, stop_at_max_sharpe=False):
+        # Compute the turning points,free sets and weights, from the
+        # highest mean one or from the point set by warm_start, down to
+        # the minimum variance one (or, if stop_at_max_sharpe, the first
+        # past the max Sharpe ratio, which is unimodal along the frontier)
+        mean = np.asarray(self.mean, dtype=float).ravel()
+        covar = np.asarray(self.covar, dtype=float)
+        l_b = np.asarray(self.l_b, dtype=float).ravel()
+        u_b = np.asarray(self.u_b, dtype=float).ravel()
+        if not self.w:
+            f, w = self._init_algo()
+            self.w.append(np.copy(w))  # store solution
+            self.l.append(None)
+            self.g.append(None)
+            self.f.append(f[:])
+        free = _FreeSet(covar, self.f[-1])
+        w = self.w[-1].ravel().copy()
         while True:
+            f = free.f
+            b = self._get_b(f)
+            # covar_fb.w_b, for all the assets
+            w_b = w.copy()
+            w_b[f] = 0.0
+            covar_w_b = np.dot(covar, w_b)
             # 1) case a): Bound one free weight
             l_in = None
             if len(f) > 1:
-                covar_f, covar_fb, mean_f, w_b = self._get_matrices(f)
-                covar_f_inv = np.linalg.inv(covar_f)
-                j = 0
-                for i in f:
-                    l, bi = self._compute_lambda(covar_f_inv, covar_fb, mean_f, w_b, j, [self.l_b[i], self.u_b[i]])
-                    if l > l_in:
-                        l_in, i_in, bi_in = l, i, bi
-                    j += 1
+                lambdas, bounds = self._lambdas_in(
+                    free.inv, mean[f], covar_w_b[f], w_b.sum(), l_b[f], u_b[f]
+                )
+                if not np.isnan(lambdas).all():
+                    j = np.nanargmax(lambdas)
+                    l_in, i_in, bi_in = lambdas[j], f[j], bounds[j]
             # 2) case b): Free one bounded weight
             l_out = None
-            if len(f) < self.mean.shape[0]:
-                b = self._get_b(f)
-                for i in b:
-                    covar_f, covar_fb, mean_f, w_b = self._get_matrices(f + [i])
-                    covar_f_inv = np.linalg.inv(covar_f)
-                    l, bi = self._compute_lambda(covar_f_inv, covar_fb, mean_f, w_b, mean_f.shape[0] - 1, self.w[-1][i])
-                    if (self.l[-1] is None or l < self.l[-1]) and l > l_out:
-                        l_out, i_out = l, i
+            if len(f) < mean.shape[0]:
+                lambdas = self._lambdas_out(free, mean, covar_w_b, w, b)
+                if self.l[-1] is not None:
+                    lambdas[~(lambdas < self.l[-1] - LAMBDA_TOL * abs(self.l[-1]))] = np.nan
+                if not np.isnan(lambdas).all():
+                    j = np.nanargmax(lambdas)
+                    l_out, i_out = lambdas[j], b[j]
             # 3) compute minimum variance solution
-            if (l_in is None or l_in < 0) and (l_out is None or l_out < 0):
+            min_var = (l_in is None or l_in < 0) and (l_out is None or l_out < 0)
+            if min_var:
                 self.l.append(0)
-                covar_f, covar_fb, mean_f, w_b = self._get_matrices(f)
-                covar_f_inv = np.linalg.inv(covar_f)
-                mean_f = np.zeros(mean_f.shape)
             else:  # 4) decide lambda
-                if l_in > l_out:
-                    self.l.append(l_in)
-                    f.remove(i_in)
+                if l_out is None or (l_in is not None and l_in > l_out):
+                    self.l.append(float(l_in))
+                    free.remove(i_in)
                     w[i_in] = bi_in  # set value at the correct boundary
                 else:
-                    self.l.append(l_out)
-                    f.append(i_out)
-                covar_f, covar_fb, mean_f, w_b = self._get_matrices(f)
-                covar_f_inv = np.linalg.inv(covar_f)
-            # 5) compute solution vector
-            w_f, g = self._compute_w(covar_f_inv, covar_fb, mean_f, w_b)
-            for i in range(len(f)):
-                w[f[i]] = w_f[i]
-            self.w.append(np.copy(w))  # store solution
+                    self.l.append(float(l_out))
+                    free.add(i_out)
+                if free.drifted():
+                    free.refresh()
+            # 5) compute solution vector (with the weight just bounded, if
+            # any, at its bound rather than at its last turning point value)
+            f = free.f
+            w_b = w.copy()
+            w_b[f] = 0.0
+            w_f, g = self._compute_w(free.inv, np.dot(covar[f], w_b), mean[f], w_b.sum())
+            w[f] = w_f
+            self.w.append(w.reshape(-1, 1).copy())  # store solution
             self.g.append(g)
             self.f.append(f[:])
-            if self.l[-1] is 0:
+            if min_var:
                 break
+            if stop_at_max_sharpe and len(self.w) > 2:
+                # past the max Sharpe ratio, up to rounding (repeated turning points)
+                sr, last_sr = self._sharpe(self.w[-1]), self._sharpe(self.w[-2])
+                if sr < last_sr - 1e-9 * abs(last_sr):
+                    break
+        if stop_at_max_sharpe and self.l[0] is not None and len(self.w) > 1 and \
+                not self._sharpe(self.w[0]) < self._sharpe(self.w[1]):
+            # warm started below the max Sharpe ratio (or at it): start from the top
+            self.w, self.l, self.g, self.f = [], [], [], []
+            return self.solve(stop_at_max_sharpe)
         # 6) Purge turning points
         self._purge_num_err(10e-10)
         self._purge_excess()
 
+    def warm_start(self, previous, max_sharpe=False):
+        """
+        Starts the turning points from the free set of a previous
+        solution (e.g. of an earlier estimate of mean and covar) rather
+        than from the highest mean portfolio: solve() then computes the
+        turning points from there down only.
+
+        The start is the solution at a lambda above the previous max
+        Sharpe ratio portfolio's segment (if max_sharpe, see
+        MAX_SHARPE_MARGIN) or in the middle of the last segment, found
+        from the previous free set there (see _start).
+
+        Returns True if warm started, else solve() starts from the top.
+        """
+        if len(previous.w) < 2:
+            return False
+        if max_sharpe:
+            k = previous._max_sharpe_segment()[1]
+            l = None if previous.l[k] is None else MAX_SHARPE_MARGIN * previous.l[k]
+        else:
+            k = len(previous.w) - 2
+            l = None if previous.l[k] is None else (previous.l[k] + previous.l[k + 1]) / 2
+        # not from the highest mean portfolio (lambda None)
+        return l is not None and self._start(previous.f[k], previous.w[k], l)
+
+    def _start(self, f, w, l, max_iter=20):
+        # Set the first solution to the one at lambda l, from free set f
+        # (with the other weights at their values in w) by a primal-dual
+        # active set method: free weights out of their bounds are bounded
+        # and bounded weights that their gradient (net of gamma) pushes
+        # inside are freed, until none, or give up after max_iter
+        mean = np.asarray(self.mean, dtype=float).ravel()
+        covar = np.asarray(self.covar, dtype=float)
+        l_b = np.asarray(self.l_b, dtype=float).ravel()
+        u_b = np.asarray(self.u_b, dtype=float).ravel()
+        f = np.asarray(f, dtype=int)
+        w = np.asarray(w, dtype=float).ravel().copy()
+        self.l = [l]    # for _compute_w
+        for _ in range(max_iter):
+            if len(f) == 0:
+                break
+            w_b = w.copy()
+            w_b[f] = 0.0
+            w_f, g = self._compute_w(
+                np.linalg.inv(covar[np.ix_(f, f)]), np.dot(covar[f], w_b), mean[f], w_b.sum()
+            )
+            w[f] = w_f
+            b = np.asarray(self._get_b(f), dtype=int)
+            gradient = np.dot(covar[b], w) - l * mean[b]
+            to_lower, to_upper = w_f <= l_b[f], w_f >= u_b[f]
+            to_free = ~(((w[b] == l_b[b]) & (gradient >= g)) | ((w[b] == u_b[b]) & (gradient <= g)))
+            if not (to_lower.any() or to_upper.any() or to_free.any()):
+                self.w, self.l, self.g, self.f = [w.reshape(-1, 1)], [l], [g], [list(f)]
+                return True
+            w[f[to_lower]] = l_b[f[to_lower]]
+            w[f[to_upper]] = u_b[f[to_upper]]
+            f = np.sort(np.concatenate([f[~(to_lower | to_upper)], b[to_free]]))
+        self.l = []
+        return False
+
     def _init_algo(self):
         # Initialize the algo
-        # 1) Form structured array
-        _dim = self.mean.shape[0]
-        _ndtype = np.dtype([('id', int), ('mu', float)])
-        a = np.zeros(_dim, dtype=_ndtype)
-        b = [self.mean[i][0] for i in range(self.mean.shape[0])]  # dump array into list
-        a[:] = zip(range(self.mean.shape[0]), b)
-        # 2) Sort structured array
-        b = np.sort(a, order='mu')
-        # 3) First free weight
-        i, w = b.shape[0], np.copy(self.l_b)
-        while sum(w) < 1:
+        # 1) Sort the assets by mean (stable, for ties)
+        mean = np.asarray(self.mean, dtype=float).ravel()
+        order = np.argsort(mean, kind="mergesort")
+        # 2) Starting from the lowest bounds, give their upper bounds
+        # to the assets of highest mean until the weights sum to 1
+        w = np.array(self.l_b, dtype=float).reshape(-1, 1)
+        i = order.shape[0]
+        while w.sum() < 1:
             i -= 1
-            w[b[i][0]] = self.u_b[b[i][0]]
-        w[b[i][0]] += 1 - sum(w)
-        return [b[i][0]], w
+            w[order[i]] = self.u_b[order[i]]
+        # 3) First free weight
+        w[order[i]] += 1 - w.sum()
+        return [int(order[i])], w
 
-    @staticmethod
-    def _compute_bi(c, bi):
-        if c > 0:
-            bi = bi[1][0]
-        if c < 0:
-            bi = bi[0][0]
-        return bi
-
-    def _compute_w(self, covar_f_inv, covar_fb, mean_f, w_b):
-        # 1) compute gamma
-        ones_f = np.ones(mean_f.shape)
-        g1 = np.dot(np.dot(ones_f.T, covar_f_inv), mean_f)
-        g2 = np.dot(np.dot(ones_f.T, covar_f_inv), ones_f)
-        if w_b is None:
-            g, w1 = float(-self.l[-1] * g1 / g2 + 1 / g2), 0
-        else:
-            ones_b = np.ones(w_b.shape)
-            g3 = np.dot(ones_b.T, w_b)
-            g4 = np.dot(covar_f_inv, covar_fb)
-            w1 = np.dot(g4, w_b)
-            g4 = np.dot(ones_f.T, w1)
-            g = float(-self.l[-1] * g1 / g2 + (1 - g3 + g4) / g2)
-        # 2) compute weights
-        w2 = np.dot(covar_f_inv, ones_f)
+    def _compute_w(self, covar_f_inv, covar_w_b, mean_f, sum_w_b):
+        # 1) compute gamma (no mean at the minimum variance, lambda 0)
+        w2 = covar_f_inv.sum(axis=0)            # covar_f_inv.1 (symmetric)
         w3 = np.dot(covar_f_inv, mean_f)
+        g1, g2 = w3.sum(), w2.sum()
+        w1 = np.dot(covar_f_inv, covar_w_b)     # 0 if no bounded weights
+        g = float(-self.l[-1] * g1 / g2 + (1 - sum_w_b + w1.sum()) / g2)
+        # 2) compute weights
         return -w1 + g * w2 + self.l[-1] * w3, g
 
-    def _compute_lambda(self, covar_f_inv, covar_fb, mean_f, w_b, i, bi):
-        # 1 ) C
-        ones_f = np.ones(mean_f.shape)
-        c1 = np.dot(np.dot(ones_f.T, covar_f_inv), ones_f)
+    @staticmethod
+    def _lambdas_in(covar_f_inv, mean_f, covar_w_b, sum_w_b, l_b, u_b):
+        """
+        Lambdas at which each free weight would reach its bound, and
+        that bound (NaN if it does not move with lambda).
+        """
+        c4 = covar_f_inv.sum(axis=0)
         c2 = np.dot(covar_f_inv, mean_f)
-        c3 = np.dot(np.dot(ones_f.T, covar_f_inv), mean_f)
-        c4 = np.dot(covar_f_inv, ones_f)
-        c = -c1 * c2[i] + c3 * c4[i]
-        if c is 0:
-            return
-        # 2) bi
-        if type(bi) is list:
-            bi = self._compute_bi(c, bi)
-        # 3) Lambda
-        if w_b is None:
-            # All free assets
-            return float((c4[i] - c1 * bi) / c), bi
-        else:
-            ones_b = np.ones(w_b.shape)
-            l1 = np.dot(ones_b.T, w_b)
-            l2 = np.dot(covar_f_inv, covar_fb)
-            l3 = np.dot(l2, w_b)
-            l2 = np.dot(ones_f.T, l3)
-            return float(((1 - l1 + l2) * c4[i] - c1 * (bi + l3[i])) / c), bi
-
-    def _get_matrices(self, f):
-        # Slice covar_f,covar_f_b,covarB,mean_f,meanB,wF,w_b
-        covar_f = self._reduce_matrix(self.covar, f, f)
-        mean_f = self._reduce_matrix(self.mean, f, [0])
-        b = self._get_b(f)
-        covar_f_b = self._reduce_matrix(self.covar, f, b)
-        w_b = self._reduce_matrix(self.w[-1], b, [0])
-        return covar_f, covar_f_b, mean_f, w_b
+        c1, c3 = c4.sum(), c2.sum()
+        c = -c1 * c2 + c3 * c4
+        bounds = np.where(c > 0, u_b, l_b)
+        l3 = np.dot(covar_f_inv, covar_w_b)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            lambdas = ((1 - sum_w_b + l3.sum()) * c4 - c1 * (bounds + l3)) / c
+        lambdas[c == 0] = np.nan
+        return lambdas, bounds
+
+    @staticmethod
+    def _lambdas_out(free, mean, covar_w_b, w, b):
+        """
+        Lambdas at which each bounded weight would become free, i.e.
+        the lambdas of the last weight of the free sets f + [i] for
+        all i in b, from the bordered inverses (see _FreeSet.add)
+        without computing them: for a vector v over the assets,
+        p(v)_i = v_i - proj_i.v_f is its component along asset i.
+        """
+        f, s = free.f, free.schur[b]
+        c4_f = free.inv.sum(axis=0)
+
+        def p(v):
+            return v[b] - np.dot(v[f], free.proj[:, b])
+
+        p1, pm, pt = p(np.ones(len(w))), p(mean), p(covar_w_b)
+        c1 = c4_f.sum() + p1 ** 2 / s
+        c3 = np.dot(c4_f, mean[f]) + p1 * pm / s
+        c2_i, c4_i = pm / s, p1 / s
+        w_b = w[b]
+        # bounded weights but i: sum, and covar_f_inv.covar_fb.w_b
+        l1 = w_b.sum() - w_b
+        l3_i = pt / s - w_b
+        l2 = np.dot(c4_f, covar_w_b[f]) - (1 - p1) * w_b + p1 * (pt - w_b * s) / s
+        c = -c1 * c2_i + c3 * c4_i
+        with np.errstate(divide="ignore", invalid="ignore"):
+            lambdas = ((1 - l1 + l2) * c4_i - c1 * (w_b + l3_i)) / c
+        lambdas[c == 0] = np.nan
+        return lambdas
 
     def _get_b(self, f):
-        return list(set(range(self.mean.shape[0])) - set(f))
+        free = np.zeros(self.mean.shape[0], dtype=bool)
+        free[f] = True
+        return list(np.flatnonzero(~free))
 
-    @staticmethod
-    def _reduce_matrix(matrix, list_x, list_y):
-        # Reduce a matrix to the provided list of rows and columns
-        if len(list_x) is 0 or len(list_y) is 0:
-            return
-        matrix_ = matrix[:, list_y[0]:list_y[0] + 1]
-        for i in list_y[1:]:
-            a = matrix[:, i:i + 1]
-            matrix_ = np.append(matrix_, a, 1)
-        matrix__ = matrix_[list_x[0]:list_x[0] + 1, :]
-        for i in list_x[1:]:
-            a = matrix_[i:i + 1, :]
-            matrix__ = np.append(matrix__, a, 0)
-        return matrix__
+    def _purge(self, keep):
+        # Keep the turning points where keep is True
+        for values in (self.w, self.l, self.g, self.f):
+            values[:] = [value for value, kept in zip(values, keep) if kept]
 
     def _purge_num_err(self, tol):
         # Purge violations of inequality constraints (associated with ill-conditioned covar matrix)
-        i = 0
-        while True:
-            if i == len(self.w):
-                break
-            w = self.w[i]
-            for j in range(w.shape[0]):
-                if w[j] - self.l_b[j] < -tol or w[j] - self.u_b[j] > tol:
-                    del self.w[i]
-                    del self.l[i]
-                    del self.g[i]
-                    del self.f[i]
-                    break
-            i += 1
+        if not self.w:
+            return
+        w = np.hstack(self.w)
+        l_b = np.asarray(self.l_b, dtype=float).reshape(-1, 1)
+        u_b = np.asarray(self.u_b, dtype=float).reshape(-1, 1)
+        keep = ((w - l_b >= -tol) & (w - u_b <= tol)).all(axis=0)
+        self._purge(keep)
 
     def _purge_excess(self):
-        # Remove violations of the convex hull
-        i, repeat = 0, False
-        while True:
-            if repeat is False:
-                i += 1
-            if i == len(self.w) - 1:
-                break
-            w = self.w[i]
-            mu = np.dot(w.T, self.mean)[0, 0]
-            j, repeat = i + 1, False
-            while True:
-                if j == len(self.w):
-                    break
-                w = self.w[j]
-                mu_ = np.dot(w.T, self.mean)[0, 0]
-                if mu < mu_:
-                    del self.w[i]
-                    del self.l[i]
-                    del self.g[i]
-                    del self.f[i]
-                    repeat = True
-                    break
-                else:
-                    j += 1
+        # Remove violations of the convex hull: the inner turning points
+        # whose mean is below that of any later one
+        if len(self.w) < 3:
+            return
+        mu = np.dot(np.hstack(self.w).T, self.mean).ravel()
+        later_max = np.maximum.accumulate(mu[::-1])[::-1]
+        keep = np.ones(len(mu), dtype=bool)
+        keep[1:-1] = ~(mu[1:-1] < later_max[2:])
+        self._purge(keep)
 
     # exposed method
     def get_min_var(self):
@@ -234,77 +359,84 @@ class CLA:
             var.append(a)
         return min(var) ** .5, self.w[var.index(min(var))]
 
+    def _turning_points(self):
+        # Stacked turning points (assets x points), their means and
+        # covariances (points x points), one matrix product each
+        w = np.hstack(self.w)
+        mu = np.dot(w.T, np.asarray(self.mean, dtype=float)).ravel()
+        covar_w = np.dot(w.T, np.dot(self.covar, w))
+        return w, mu, covar_w
+
+    def _sharpe(self, w):
+        w = w.ravel()
+        return np.dot(np.ravel(self.mean), w) / np.dot(np.dot(w, self.covar), w) ** .5
+
+    def _max_sharpe_segment(self):
+        # The max Sharpe ratio, its segment k and a, i.e. the portfolio
+        # a * w[k] + (1 - a) * w[k + 1]
+        # 1) Compute the local max SR portfolio between any two neighbor turning
+        # points, w = a * w0 + (1 - a) * w1, of mean p + q * a and variance
+        # c + 2 * d * a + e * a^2: the SR's derivative is 0 at a single a
+        w, mu, covar_w = self._turning_points()
+        i = np.arange(len(mu) - 1)
+        p, q = mu[1:], mu[:-1] - mu[1:]
+        c = covar_w[i + 1, i + 1]
+        d = covar_w[i, i + 1] - c
+        e = covar_w[i, i] - 2 * covar_w[i, i + 1] + c
+        with np.errstate(divide="ignore", invalid="ignore"):
+            a = (p * d - q * c) / (q * d - p * e)
+        a[~((a > 0) & (a < 1))] = 0
+        # 2) the max SR of each segment at that a or at a turning point
+        a = np.column_stack([np.zeros(len(i)), np.ones(len(i)), a])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            sr = (p[:, None] + q[:, None] * a) / np.sqrt(c[:, None] + 2 * d[:, None] * a + e[:, None] * a ** 2)
+        k, j = np.unravel_index(np.nanargmax(sr), sr.shape)
+        return sr[k, j], k, a[k, j]
+
     # exposed method
     def get_max_sharpe(self):
         # Get the max Sharpe ratio portfolio
-        # 1) Compute the local max SR portfolio between any two neighbor turning points
-        w_sr, sr = [], []
-        for i in range(len(self.w) - 1):
-            w0 = np.copy(self.w[i])
-            w1 = np.copy(self.w[i + 1])
-            kargs = {'minimum': False, 'args': (w0, w1)}
-            a, b = self._golden_section(self._eval_sharpe, 0, 1, **kargs)
-            w_sr.append(a * w0 + (1 - a) * w1)
-            sr.append(b)
-        return max(sr), w_sr[sr.index(max(sr))]
-
-    def _eval_sharpe(self, a, w0, w1):
-        # Evaluate SR of the portfolio within the convex combination
-        w = a * w0 + (1 - a) * w1
-        # noinspection PyUnresolvedReferences
-        b = np.dot(w.T, self.mean)[0, 0]
-        c = np.dot(np.dot(w.T, self.covar), w)[0, 0] ** .5
-        return b / c
-
-    @staticmethod
-    def _golden_section(obj, a, b, **kargs):
-        # Golden section method. Maximum if kargs['minimum']==False is passed
-        from math import log, ceil
-        tol, sign, args = 1.0e-9, 1, None
-        if 'minimum' in kargs and kargs['minimum'] is False:
-            sign = -1
-        if 'args' in kargs:
-            args = kargs['args']
-        num_iter = int(ceil(-2.078087 * log(tol / abs(b - a))))
-        r = 0.618033989
-        c = 1.0 - r
-        # Initialize
-        x1 = r * a + c * b
-        x2 = c * a + r * b
-        f1 = sign * obj(x1, *args)
-        f2 = sign * obj(x2, *args)
-        # Loop
-        for _ in range(num_iter):
-            if f1 > f2:
-                a = x1
-                x1 = x2
-                f1 = f2
-                x2 = c * a + r * b
-                f2 = sign * obj(x2, *args)
-            else:
-                b = x2
-                x2 = x1
-                f2 = f1
-                x1 = r * a + c * b
-                f1 = sign * obj(x1, *args)
-        if f1 < f2:
-            return x1, sign * f1
-        else:
-            return x2, sign * f2
+        sr, k, a = self._max_sharpe_segment()
+        return sr, a * self.w[k] + (1 - a) * self.w[k + 1]
 
     # exposed method
     def eff_frontier(self, points):
-        # Get the efficient frontier
-        mu, sigma, weights = [], [], []
-        a = np.linspace(0, 1, points / len(self.w))[:-1]  # remove the 1, to avoid duplications
-        b = range(len(self.w) - 1)
-        for i in b:
-            w0, w1 = self.w[i], self.w[i + 1]
-            if i == b[-1]:
-                a = np.linspace(0, 1, points / len(self.w))  # include the 1 in the last iteration
-            for j in a:
-                w = w1 * j + (1 - j) * w0
-                weights.append(np.copy(w))
-                mu.append(np.dot(w.T, self.mean)[0, 0])
-                sigma.append(np.dot(np.dot(w.T, self.covar), w)[0, 0] ** .5)
-        return mu, sigma, weights
+        # Get the efficient frontier: points / no. of turning points per
+        # segment between two neighbor turning points, w = (1 - a) * w0 + a * w1,
+        # their mean and variance interpolated from those of the turning points
+        w, mu, covar_w = self._turning_points()
+        a = np.linspace(0, 1, max(points // len(self.w), 2))
+        i = np.arange(len(self.w) - 1)
+        # remove the 1, to avoid duplications, but in the last segment
+        a, i = np.tile(a[:-1], len(i)), np.repeat(i, len(a) - 1)
+        a, i = np.append(a, 1.0), np.append(i, i[-1])
+        weights = w[:, i] * (1 - a) + w[:, i + 1] * a
+        mu = mu[i] * (1 - a) + mu[i + 1] * a
+        var = ((1 - a) ** 2 * covar_w[i, i] + 2 * a * (1 - a) * covar_w[i, i + 1] +
+               a ** 2 * covar_w[i + 1, i + 1])
+        return list(mu), list(np.sqrt(var)), list(weights.T.reshape(len(a), -1, 1))
+
+
+def solve_batch(means, covars, l_b, u_b):
+    """
+    Solves the CLA for each of a batch of (mean, covar) problems over
+    the same assets and bounds, e.g. rolling window estimates for
+    periodic rebalancing.
+
+    :param means - (problems x assets) array (or of (assets x 1) columns);
+    :param covars - (problems x assets x assets) array;
+    :param l_b, u_b - lower and upper bounds, (assets x 1) columns.
+
+    Returns the list of solved CLA objects.
+    """
+    means = np.asarray(means, dtype=float)
+    covars = np.asarray(covars, dtype=float)
+    means = means.reshape(covars.shape[0], covars.shape[1], 1)
+    l_b = np.asarray(l_b, dtype=float).reshape(-1, 1)
+    u_b = np.asarray(u_b, dtype=float).reshape(-1, 1)
+    solved = []
+    for mean, covar in zip(means, covars):
+        cla = CLA(mean, covar, l_b, u_b)
+        cla.solve()
+        solved.append(cla)
+    return solved
@@ -5,10 +5,7 @@ from __future__ import (absolute_import, division, print_function,
 
 import numpy as np
 import pandas as pd
-from scipy.stats import linregress
-from itertools import groupby
 
-from algo2.utilities import range   # for compatibility
 
 # #################################### #
 #   Some useful financial functions
@@ -17,24 +14,42 @@ from algo2.utilities import range   # for compatibility
 
 def aggregate_returns(returns, convert_to):
     """
-    Aggregates returns by day, week, month, or year.
+    Aggregates returns by week (year, month, week no.), month
+    (year, month) or year: the compounded return of each period,
+    from the sums of log(1 + returns) by period. The calendar keys
+    are computed once per distinct day (e.g. not per minute bar).
+    NaN returns are skipped (e.g. the first of pct_change), periods
+    with no returns but NaN are NaN.
     """
-    def cumulate_returns(x):
-        return np.exp(np.log(1 + x).cumsum())[-1] - 1
-
+    if convert_to not in ('weekly', 'monthly', 'yearly'):
+        raise ValueError('convert_to must be weekly, monthly or yearly')
+    index = pd.DatetimeIndex(returns.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)     # local dates
+    days, day_of_row = np.unique(index.values.astype('datetime64[D]'), return_inverse=True)
+    days = pd.DatetimeIndex(days)
+    keys = [days.year.values.astype(np.int64)]
+    if convert_to != 'yearly':
+        keys.append(days.month.values.astype(np.int64))
     if convert_to == 'weekly':
-        return returns.groupby(
-            [lambda x: x.year,
-             lambda x: x.month,
-             lambda x: x.isocalendar()[1]]).apply(cumulate_returns)
-    elif convert_to == 'monthly':
-        return returns.groupby(
-            [lambda x: x.year, lambda x: x.month]).apply(cumulate_returns)
-    elif convert_to == 'yearly':
-        return returns.groupby(
-            [lambda x: x.year]).apply(cumulate_returns)
-    else:
-        ValueError('convert_to must be weekly, monthly or yearly')
+        keys.append(days.isocalendar().week.values.astype(np.int64))
+    # single int64 code per day: year, month and week no. as digits
+    codes = np.zeros(len(days), dtype=np.int64)
+    for key in keys:
+        codes = codes * 100 + key
+    periods, period_of_row = np.unique(codes[day_of_row], return_inverse=True)
+    log_returns = np.log1p(np.asarray(returns, dtype=np.float64))
+    valid = ~np.isnan(log_returns)
+    sums = np.bincount(period_of_row, weights=np.where(valid, log_returns, 0.0), minlength=len(periods))
+    counts = np.bincount(period_of_row, weights=valid, minlength=len(periods))
+    aggregated = np.where(counts > 0, np.expm1(sums), np.nan)
+    if len(keys) == 1:
+        return pd.Series(aggregated, index=pd.Index(periods))
+    levels = []
+    for _ in keys[1:]:
+        periods, level = np.divmod(periods, 100)
+        levels.insert(0, level)
+    return pd.Series(aggregated, index=pd.MultiIndex.from_arrays([periods] + levels))
 
 
 def create_cagr(equity, periods=252):
@@ -76,7 +91,202 @@ def create_sortino_ratio(returns, periods=252):
     return np.sqrt(periods) * (np.mean(returns)) / np.std(returns[returns < 0])
 
 
-def create_drawdowns(returns):
+def _longest_run(mask):
+    """
+    Length of the longest run of True in a boolean array.
+    """
+    mask = np.concatenate(([False], mask, [False])).astype(np.int8)
+    changes = np.flatnonzero(np.diff(mask))
+    if len(changes) == 0:
+        return 0
+    return int((changes[1::2] - changes[::2]).max())
+
+
+def _drawdown_episodes(curve, hwm, index=None, relative=True):
+    """
+    Table of the drawdown episodes of a curve, i.e. of the runs of
+    points below its high water mark hwm (see get_drawdown_episodes).
+    """
+    n = len(curve)
+    with np.errstate(invalid="ignore"):
+        under = curve < hwm
+    previous = np.concatenate(([False], under[:-1]))
+    following = np.concatenate((under[1:], [False]))
+    starts = np.flatnonzero(under & ~previous)
+    ends = np.flatnonzero(under & ~following)
+
+    # trough: lowest point of each run, the first one if repeated (the
+    # points from the end of a run to the next start are not lower)
+    troughs = np.zeros(len(starts), dtype=np.int64)
+    if len(starts):
+        lows = np.fmin.reduceat(curve, starts)
+        segments = np.diff(np.append(starts, n))
+        positions = np.arange(starts[0], n)
+        is_low = curve[starts[0]:] == np.repeat(lows, segments)
+        troughs = np.minimum.reduceat(np.where(is_low, positions, n), starts - starts[0])
+
+    peaks = np.maximum(starts - 1, 0)
+    peak_values = hwm[starts]
+    recovered = ends + 1 < n
+    recoveries = np.where(recovered, ends + 1, n - 1)
+    depth = peak_values - curve[troughs]
+    if relative:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            depth = depth / peak_values
+
+    labels = np.arange(n) if index is None else np.asarray(index)
+    recovery = pd.Series(labels[recoveries]).where(recovered)
+    return pd.DataFrame({
+        "start": labels[peaks],
+        "trough": labels[troughs],
+        "recovery": recovery.values,
+        "depth": depth,
+        "length": np.where(recovered, recoveries, n - 1) - peaks
+    }, columns=["start", "trough", "recovery", "depth", "length"])
+
+
+def get_drawdown_episodes(equity):
+    """
+    Table of the drawdown episodes of an equity curve, one row per
+    run of points below the high water mark, with columns:
+    start - the peak the drawdown started from;
+    trough - the lowest point of the drawdown;
+    recovery - the first point back at the peak (NaN/NaT if never);
+    depth - (peak - trough) / peak;
+    length - no. of periods from start to recovery (or to the end).
+    The points are labelled by the index of equity, if any.
+    """
+    curve = np.asarray(equity, dtype=np.float64)
+    hwm = np.fmax.accumulate(curve)
+    return _drawdown_episodes(curve, hwm, getattr(equity, "index", None))
+
+
+def get_max_drawdown_pct(equity):
+    """
+    The largest drawdown (from the high water mark) of an equity
+    curve, in % of its peak, rounded to 4 decimals; NaN if none.
+    """
+    curve = np.asarray(equity, dtype=np.float64)
+    if len(curve) == 0:
+        return np.nan
+    hwm = np.maximum.accumulate(curve)
+    drawdowns = hwm - curve
+    bottom = drawdowns.argmax()     # the first worst bottom, its peak at hwm
+    if not drawdowns[bottom] > 0:
+        return np.nan
+    return round(drawdowns[bottom] / hwm[bottom] * 100, 4)
+
+
+def _window_sums(values, window=None):
+    """
+    Sums over rolling windows of 'window' rows, via a cumulative
+    sum (expanding windows if None).
+    """
+    sums = np.cumsum(values, dtype=np.float64)
+    if window is not None:
+        rolled = sums.copy()
+        rolled[window:] -= sums[:-window]
+        sums = rolled
+    return sums
+
+
+def _window_moments(values, window=None, min_periods=None):
+    """
+    No. of values, sums of the values and of their squares over rolling
+    windows of 'window' rows (expanding windows if None), via cumulative
+    sums; NaN are ignored. The values are centred on their mean first,
+    to limit the cancellation in the variances. The no. of values is NaN
+    for windows with less than min_periods (default: window, or 2 if
+    expanding) values.
+    """
+    valid = ~np.isnan(values)
+    centred = np.where(valid, values - (np.nanmean(values) if valid.any() else 0.0), 0.0)
+    counts = _window_sums(valid, window)
+    if min_periods is None:
+        min_periods = 2 if window is None else window
+    counts[counts < min_periods] = np.nan
+    return counts, _window_sums(centred, window), _window_sums(centred ** 2, window)
+
+
+def _as_window_series(values, like):
+    """
+    Series with the index of 'like' if it has one, else values.
+    """
+    index = getattr(like, "index", None)
+    return values if index is None else pd.Series(values, index=index)
+
+
+def rolling_volatility(returns, window=252, periods=252, ddof=1, min_periods=None):
+    """
+    Annualised volatility (standard deviation) of the returns over
+    rolling windows of 'window' periods, or expanding ones if window
+    is None. NaN are ignored; windows with less than min_periods
+    returns (default: window) are NaN.
+    """
+    values = np.asarray(returns, dtype=np.float64)
+    n, s1, s2 = _window_moments(values, window, min_periods)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        var = np.where(n > ddof, (s2 - s1 ** 2 / n) / (n - ddof), np.nan)
+    return _as_window_series(np.sqrt(periods * np.maximum(var, 0.0)), returns)
+
+
+def rolling_sharpe_ratio(returns, window=252, periods=252, min_periods=None):
+    """
+    Sharpe ratio over rolling windows of 'window' periods, or expanding
+    ones if window is None, as create_sharpe_ratio over each window.
+    """
+    values = np.asarray(returns, dtype=np.float64)
+    n, s1, s2 = _window_moments(values, window, min_periods)
+    mean = np.nanmean(values) if len(values) else 0.0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        std = np.sqrt(np.maximum(s2 / n - (s1 / n) ** 2, 0.0))
+        sharpe = np.sqrt(periods) * (s1 / n + mean) / std
+    return _as_window_series(sharpe, returns)
+
+
+def rolling_sortino_ratio(returns, window=252, periods=252, min_periods=None):
+    """
+    Sortino ratio over rolling windows of 'window' periods, or expanding
+    ones if window is None, as create_sortino_ratio over each window.
+    """
+    values = np.asarray(returns, dtype=np.float64)
+    n, s1, _ = _window_moments(values, window, min_periods)
+    mean = np.nanmean(values) if len(values) else 0.0
+    with np.errstate(invalid="ignore"):
+        negative = np.where(values < 0, values, np.nan)
+    n_neg, s1_neg, s2_neg = _window_moments(negative, window, min_periods=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        std_neg = np.sqrt(np.maximum(s2_neg / n_neg - (s1_neg / n_neg) ** 2, 0.0))
+        sortino = np.sqrt(periods) * (s1 / n + mean) / std_neg
+    return _as_window_series(sortino, returns)
+
+
+def rolling_beta(returns, benchmark_returns, window=252, min_periods=None):
+    """
+    Beta of the returns against the benchmark's (e.g. SP500TR) over
+    rolling windows of 'window' periods, or expanding ones if window is
+    None: cov(returns, benchmark) / var(benchmark). Periods where either
+    return is NaN are ignored.
+    """
+    values = np.asarray(returns, dtype=np.float64)
+    benchmark = np.asarray(benchmark_returns, dtype=np.float64)
+    both = ~(np.isnan(values) | np.isnan(benchmark))
+    values = np.where(both, values, np.nan)
+    benchmark = np.where(both, benchmark, np.nan)
+    n, s1, _ = _window_moments(values, window, min_periods)
+    _, b1, b2 = _window_moments(benchmark, window, min_periods)
+    # sums of the products of the centred values, as in _window_moments
+    if both.any():
+        products = (values - np.nanmean(values)) * (benchmark - np.nanmean(benchmark))
+    else:
+        products = values
+    products = _window_sums(np.where(both, products, 0.0), window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        beta = (products - s1 * b1 / n) / (b2 - b1 ** 2 / n)
+    return _as_window_series(beta, returns)
+
+
+def create_drawdowns(returns, episodes=False):
     """
     Calculate the largest peak-to-trough drawdown of the equity curve
     as well as the duration of the drawdown. Requires that the
@@ -84,41 +294,42 @@ def create_drawdowns(returns):
 
     Parameters:
     equity - A pandas Series representing period percentage returns.
+    episodes - OPTIONAL also return the table of the drawdown episodes
+        (see get_drawdown_episodes).
 
     Returns:
-    drawdown, drawdown_max, duration
+    drawdown, drawdown_max, duration(, episodes)
     """
-    # Calculate the cumulative returns curve
-    # and set up the High Water Mark
-    idx = returns.index
-    hwm = np.zeros(len(idx))
-
-    # Create the high water mark
-    for t in range(1, len(idx)):
-        hwm[t] = max(hwm[t - 1], returns.ix[t])
+    # The High Water Mark, from the second point onwards (NaN ignored)
+    curve = np.asarray(returns, dtype=np.float64)
+    hwm = np.zeros(len(curve))
+    if len(curve) > 1:
+        hwm[1:] = np.fmax.accumulate(np.fmax(curve[1:], 0.0))
 
     # Calculate the drawdown and duration statistics
-    perf = pd.DataFrame(index=idx)
-    # noinspection PyPep8
-    perf["Drawdown"] = (hwm - returns) / hwm; perf["Drawdown"].ix[0] = 0.0
-    perf["DurationCheck"] = np.where(perf["Drawdown"] == 0, 0, 1)
-    duration = max(
-        sum(1 for i in g if i == 1)
-        for k, g in groupby(perf["DurationCheck"])
-    )
-    return perf["Drawdown"], np.max(perf["Drawdown"]), duration
+    with np.errstate(divide="ignore", invalid="ignore"):
+        drawdown = (hwm - curve) / hwm
+    drawdown[:1] = 0.0
+    drawdown = pd.Series(drawdown, index=returns.index, name="Drawdown")
+    duration = _longest_run(drawdown.values != 0)
+    results = (drawdown, np.max(drawdown), duration)
+    if episodes:
+        results += (_drawdown_episodes(curve, hwm, returns.index),)
+    return results
 
 
 def rsquared(x, y):
     """
     Return R^2 where x and y are array-like.
     """
+    from scipy.stats import linregress  # scipy.stats is slow to import
+
     slope, intercept, r_value, p_value, std_err = linregress(x, y)
     return r_value**2
 
 
 ########################################
-def get_drawdowns_slow(returns):
+def get_drawdowns_slow(returns, episodes=False):
     """
     Calculate the largest peak-to-trough drawdown of the PnL curve
     as well as the duration of the drawdown. Requires that the
@@ -126,24 +337,29 @@ def get_drawdowns_slow(returns):
 
     Parameters:
     returns - A pandas Series representing period percentage returns.
+    episodes - OPTIONAL also return the table of the drawdown episodes
+        (see get_drawdown_episodes, but with absolute depths).
 
     Returns:
     drawdown, duration - Highest peak-to-trough drawdown and duration.
     """
-    # set up
-    idx = returns.index
-    _len = len(idx)  # cdef double[:]
-    hwm = np.zeros(_len)  # was: hwm = [0]
-    drawdown = np.zeros(_len)  # drawdown = pd.Series(index = idx) # VERY SLOW IN LOOP BELOW
-    duration = np.zeros(_len)  # duration = pd.Series(index = idx) # VERY SLOW IN LOOP BELOW
+    # the hwm from the second point onwards (NaN ignored)
+    curve = np.asarray(returns, dtype=np.float64)
+    hwm = np.zeros(len(curve))
+    if len(curve) > 1:
+        hwm[1:] = np.fmax.accumulate(np.fmax(curve[1:], 0.0))
+    drawdown = curve - hwm
+    drawdown[:1] = 0.0
 
-    # Loop over the index range
-    for t in range(1, _len):
-        hwm[t] = max(hwm[t - 1], returns[t])  # was:  hwm.append(max(hwm[t-1], returns[t]))
-        drawdown[t] = (returns[t] - hwm[t])
-        duration[t] = (0 if drawdown[t] == 0 else duration[t - 1] + 1)
+    # duration: no. of periods since the last point without drawdown
+    positions = np.arange(len(curve))
+    last_flat = np.maximum.accumulate(np.where(drawdown == 0, positions, 0))
+    duration = (positions - last_flat).astype(np.float64)
 
-    return drawdown, drawdown.min(), duration.max()
+    results = (drawdown, drawdown.min(), duration.max())
+    if episodes:
+        results += (_drawdown_episodes(curve, hwm, getattr(returns, "index", None), relative=False),)
+    return results
 
 
 """    # with percentage inputs:
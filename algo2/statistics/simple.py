@@ -6,10 +6,8 @@ from __future__ import (absolute_import, division, print_function,
 import datetime
 import os
 
-import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
-import seaborn as sns
 
 from algo2.statistics.base_statistics import AbstractStatistics
 from algo2.utilities import pickle
@@ -104,26 +102,19 @@ class SimpleStatistics(AbstractStatistics):
     def _calculate_max_drawdown_pct(self):
         """
         Calculate the percentage drop related to the "worst"
-        drawdown seen.
+        drawdown seen (see perf.get_max_drawdown_pct).
         """
-        drawdown_series = pd.Series(self.drawdowns)
-        equity_series = pd.Series(self.equity)
-        bottom_index = drawdown_series.idxmax()
-        try:
-            top_index = equity_series[:bottom_index].idxmax()   # top preceding the worse bottom
-            pct = (
-                (equity_series.ix[top_index] - equity_series.ix[bottom_index]) / 
-                equity_series.ix[top_index] * 100
-            )
-            return round(pct, 4)
-        except ValueError:
-            return np.nan
+        return perf.get_max_drawdown_pct(self.equity)
 
     def plot_results(self):
         """
         A simple script to plot the balance of the portfolio, or
         "equity curve", as a function of time.
         """
+        # imported here, the plotting libraries being slow to import
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+
         sns.set_palette("deep", desat=.6)
         sns.set_context(rc={"figure.figsize": (8, 4)})
 
@@ -0,0 +1,208 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import math
+
+import numpy as np
+import pandas as pd
+
+from algo2.statistics.simple import SimpleStatistics
+
+
+class GrowableArray(object):
+    """
+    Append-only numpy array, preallocated and doubled in capacity
+    when full (amortised O(1) append, no Python object per value).
+    """
+    def __init__(self, dtype=np.float64, capacity=1024):
+        self._data = np.empty(max(capacity, 1), dtype=dtype)
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def append(self, value):
+        if self._size == len(self._data):
+            data = np.empty(2 * len(self._data), dtype=self._data.dtype)
+            data[:self._size] = self._data
+            self._data = data
+        self._data[self._size] = value
+        self._size += 1
+
+    @property
+    def values(self):
+        """
+        The values appended so far (a view, valid until the next append).
+        """
+        return self._data[:self._size]
+
+
+class StreamingStatistics(SimpleStatistics):
+    """
+    StreamingStatistics collects the same statistics as SimpleStatistics
+    in constant memory, i.e. without a Python list growing by several
+    elements per timestamp (e.g. for intraday tick backtests):
+    - Sharpe Ratio, from the running mean and variance of the equity
+      returns (Welford's algorithm);
+    - Drawdown, Max Drawdown (and its %) and Max Drawdown Duration,
+      from the running high water mark;
+    - CAGR, from the first and last equity.
+
+    If 'store_equity' is True (the default), the equity curve and its
+    timestamps are also stored, in growable float64/int64 arrays, from
+    which the equity, equity returns and drawdowns series are derived
+    (vectorized) when needed; else these series are None in the results
+    and the equity curve can not be plotted or saved.
+
+    :param config - as SimpleStatistics;
+    :param portfolio_handler - as SimpleStatistics;
+    :param store_equity - OPTIONAL store the equity curve, default True;
+    :param capacity - OPTIONAL initial no. of equity values allocated.
+    """
+    def __init__(self, config, portfolio_handler, store_equity=True, capacity=1024):
+        self.config = config
+        self.store_equity = store_equity
+        current_equity = portfolio_handler.portfolio.equity
+        self._first_equity = current_equity
+        self._last_equity = current_equity
+        self._last_timestamp = None
+        self._count = 1             # no. of equity values, incl. the initial one
+        # returns (in %, rounded as SimpleStatistics): running mean/variance
+        self._returns_mean = 0.0    # incl. the initial 0.0 return
+        self._returns_m2 = 0.0
+        # high water mark and drawdowns
+        self._hwm = current_equity
+        self._max_drawdown = 0.0
+        self._max_drawdown_pct = np.nan
+        self._duration = 0          # no. of updates in the current drawdown
+        self._max_duration = 0
+        if store_equity:
+            self._equity = GrowableArray(np.float64, capacity)
+            self._times = GrowableArray(np.int64, capacity)    # ns since the epoch
+            self._equity.append(current_equity)
+            self._times.append(0)   # correct timestamp not available yet
+
+    def update(self, timestamp, portfolio_handler):
+        """
+        Update all statistics with the equity at a new timestamp.
+        """
+        if timestamp == self._last_timestamp:
+            return
+        self._last_timestamp = timestamp
+        equity = portfolio_handler.portfolio.equity
+        pct = round((equity - self._last_equity) / self._last_equity * 100, 4)
+        self._last_equity = equity
+        self._count += 1
+
+        delta = pct - self._returns_mean
+        self._returns_mean += delta / self._count
+        self._returns_m2 += delta * (pct - self._returns_mean)
+
+        hwm = self._hwm
+        drawdown = hwm - equity
+        if drawdown > self._max_drawdown:
+            # top preceding the worse bottom, i.e. the previous hwm
+            self._max_drawdown = drawdown
+            self._max_drawdown_pct = round(drawdown / hwm * 100, 4)
+        if drawdown > 0:
+            self._duration += 1
+            self._max_duration = max(self._max_duration, self._duration)
+        else:
+            self._hwm = equity
+            self._duration = 0
+
+        if self.store_equity:
+            self._equity.append(equity)
+            value = getattr(timestamp, "value", None)
+            self._times.append(pd.Timestamp(timestamp).value if value is None else value)
+
+    def _get_index(self):
+        """
+        Timestamps of the stored equity curve, the initial one at
+        the day before the first update (as SimpleStatistics).
+        """
+        times = pd.DatetimeIndex(self._times.values.astype("datetime64[ns]"))
+        if len(times) > 1:
+            times = times[1:].insert(0, times[1] - pd.Timedelta(days=1))
+        return times
+
+    @property
+    def equity(self):
+        return self._equity.values if self.store_equity else None
+
+    @property
+    def hwm(self):
+        return np.maximum.accumulate(self.equity) if self.store_equity else None
+
+    @property
+    def drawdowns(self):
+        return self.hwm - self.equity if self.store_equity else None
+
+    @property
+    def equity_returns(self):
+        if not self.store_equity:
+            return None
+        equity = self.equity
+        returns = np.zeros(len(equity))
+        returns[1:] = np.round(np.diff(equity) / equity[:-1] * 100, 4)
+        return returns
+
+    @property
+    def timeseries(self):
+        return self._get_index() if self.store_equity else None
+
+    def get_results(self):
+        """
+        Return a dict with all important results & stats
+        (the series are None if the equity curve is not stored).
+        """
+        statistics = {}
+        statistics["sharpe"] = self._calculate_sharpe()
+        statistics["max_drawdown"] = self._max_drawdown
+        statistics["max_drawdown_pct"] = self._max_drawdown_pct
+        statistics["max_drawdown_duration"] = self._max_duration
+        statistics["CAGR"] = self._calculate_cagr()
+        statistics["drawdowns"] = None
+        statistics["equity"] = None
+        statistics["equity_returns"] = None
+        if self.store_equity:
+            index = self._get_index()
+            statistics["drawdowns"] = pd.Series(self.drawdowns, index=index)
+            statistics["equity"] = pd.Series(self.equity, index=index)
+            statistics["equity_returns"] = pd.Series(self.equity_returns, index=index)
+        return statistics
+
+    def _calculate_sharpe(self, benchmark_return=0.00, period=252):
+        """
+        Calculate the sharpe ratio of our equity_returns.
+        Expects benchmark_return to be, for example, 0.01 for 1%
+        """
+        if self._count < 2:
+            return np.nan
+        std = math.sqrt(self._returns_m2 / (self._count - 1))
+        xs_mean = self._returns_mean - benchmark_return / 252
+        with np.errstate(divide="ignore", invalid="ignore"):
+            annualised_sharpe = np.sqrt(period) * xs_mean / np.float64(std)
+        return round(annualised_sharpe, 4)
+
+    def _calculate_max_drawdown_pct(self):
+        return self._max_drawdown_pct
+
+    def _calculate_cagr(self, periods=252):
+        """
+        Compound Annual Growth Rate, as performance.create_cagr.
+        """
+        years = self._count / float(periods)
+        return (self._last_equity / self._first_equity) ** (1.0 / years) - 1.0
+
+    def _get_equity_df(self):
+        if not self.store_equity:
+            raise ValueError("The equity curve is not stored (store_equity=False)")
+        index = self._get_index()[1:]
+        df = pd.DataFrame(index=index)
+        df["equity"] = self.equity[1:]
+        df["equity_returns"] = self.equity_returns[1:]
+        df["drawdowns"] = self.drawdowns[1:]
+        return df
@@ -0,0 +1,176 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Tearsheets: a one page report of a backtest's results (equity curve,
+drawdowns, monthly returns and rolling Sharpe ratio) rendered to an
+image or PDF file with matplotlib's non-interactive Agg canvas, i.e.
+without a display nor pyplot's global state. The plotting libraries
+are only imported when rendering.
+"""
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+from concurrent.futures import ProcessPoolExecutor
+import os
+
+import numpy as np
+import pandas as pd
+
+from algo2.statistics.simple import SimpleStatistics
+import algo2.statistics.performance as perf
+
+
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun",
+          "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+
+def tearsheet_data(results, periods=252, rolling_window=126):
+    """
+    The series plotted in a tearsheet, from the results of a
+    statistics' get_results (i.e. with an "equity" Series):
+    - equity: the equity curve;
+    - drawdowns: drawdowns from the high water mark, in %;
+    - monthly_returns: compounded returns in % (year x month);
+    - rolling_sharpe: Sharpe ratio over rolling_window periods.
+    """
+    equity = results["equity"]
+    equity = pd.Series(
+        np.asarray(equity, dtype=np.float64), index=pd.DatetimeIndex(pd.to_datetime(equity.index))
+    )
+    returns = equity.pct_change().iloc[1:]
+    drawdowns = (equity / np.fmax.accumulate(equity.values) - 1.0) * 100
+    monthly = perf.aggregate_returns(returns, "monthly") * 100
+    monthly = monthly.unstack().reindex(columns=range(1, 13))
+    monthly.columns = MONTHS
+    window = min(rolling_window, len(returns))
+    return {
+        "equity": equity,
+        "drawdowns": drawdowns,
+        "monthly_returns": monthly,
+        "rolling_sharpe": perf.rolling_sharpe_ratio(returns, max(window, 2), periods),
+    }
+
+
+def render_tearsheet(results, filename, title="", periods=252, rolling_window=126, dpi=100):
+    """
+    Renders the tearsheet of the results (see tearsheet_data) to
+    filename, the format given by its extension (e.g. .png, .pdf).
+    Returns the filename.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    import seaborn as sns
+
+    data = tearsheet_data(results, periods, rolling_window)
+    palette = sns.color_palette("deep", desat=.6)
+    n_years = max(len(data["monthly_returns"]), 1)
+
+    fig = Figure(figsize=(10, 10 + 0.3 * n_years))
+    FigureCanvasAgg(fig)
+    fig.patch.set_facecolor('white')
+    grid = fig.add_gridspec(4, 1, height_ratios=[3, 2, 1 + 0.3 * n_years, 2])
+    summary = "Sharpe %.2f   CAGR %.2f%%   Max Drawdown %.2f%%" % (
+        results.get("sharpe", np.nan),
+        100 * results.get("CAGR", np.nan),
+        -data["drawdowns"].min() if len(data["drawdowns"]) else np.nan
+    )
+    fig.suptitle("%s\n%s" % (title, summary) if title else summary)
+
+    # the time series panels share their dates axis
+    equity = data["equity"]
+    ax_equity = fig.add_subplot(grid[0], ylabel='Equity Value')
+    ax_equity.plot(equity.index, equity.values, color=palette[0])
+    if len(equity) > 1:
+        ax_equity.set_xlim(equity.index[0], equity.index[-1])
+
+    ax = fig.add_subplot(grid[1], ylabel='Drawdowns (%)', sharex=ax_equity)
+    drawdowns = data["drawdowns"]
+    ax.fill_between(drawdowns.index, drawdowns.values, 0, color=palette[2], alpha=.5)
+
+    ax = fig.add_subplot(grid[2])
+    monthly = data["monthly_returns"]
+    if len(monthly):
+        sns.heatmap(
+            monthly, ax=ax, annot=True, fmt=".1f", center=0, cmap="RdYlGn",
+            cbar=False, annot_kws={"size": 8}
+        )
+    ax.set_title('Monthly Returns (%)')
+    ax.set_ylabel('')
+
+    ax = fig.add_subplot(grid[3], ylabel='Rolling Sharpe', sharex=ax_equity)
+    sharpe = data["rolling_sharpe"]
+    ax.plot(sharpe.index, sharpe.values, color=palette[1])
+    ax.axhline(0, color='grey', lw=.5)
+
+    fig.tight_layout(rect=(0, 0, 1, 0.95))
+    fig.savefig(filename, dpi=dpi)
+    return filename
+
+
+def _render_saved(args):
+    """
+    Worker entry point: renders the tearsheet of saved statistics.
+    """
+    statistics_filename, filename, kwargs = args
+    statistics = SimpleStatistics.load(statistics_filename)
+    kwargs.setdefault("title", os.path.splitext(os.path.basename(statistics_filename))[0])
+    return render_tearsheet(statistics.get_results(), filename, **kwargs)
+
+
+def render_tearsheets(statistics_filenames, output_dir=None, extension=".png",
+                      max_workers=None, **kwargs):
+    """
+    Renders the tearsheets of saved statistics (e.g. by
+    SimpleStatistics.save) on a process pool, each next to its
+    statistics file or in output_dir, named after it.
+
+    :param statistics_filenames - the pickled statistics;
+    :param output_dir - OPTIONAL directory of the tearsheets;
+    :param extension - OPTIONAL file format, default .png;
+    :param max_workers - no. of processes (default: no. of CPUs);
+    :param kwargs - passed to render_tearsheet (title, periods...).
+
+    Returns the list of the tearsheets' filenames.
+    """
+    tasks = []
+    for statistics_filename in statistics_filenames:
+        directory, name = os.path.split(statistics_filename)
+        filename = os.path.splitext(name)[0] + extension
+        tasks.append((
+            statistics_filename,
+            os.path.join(directory if output_dir is None else output_dir, filename),
+            dict(kwargs)
+        ))
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(_render_saved, tasks))
+
+
+class TearsheetStatistics(SimpleStatistics):
+    """
+    TearsheetStatistics collects the same statistics as
+    SimpleStatistics, but plot_results renders them as a tearsheet
+    (see render_tearsheet) to a file instead of showing them.
+
+    :param config - as SimpleStatistics;
+    :param portfolio_handler - as SimpleStatistics;
+    :param title - OPTIONAL title of the tearsheet;
+    :param periods - OPTIONAL no. of periods per year, default 252;
+    :param rolling_window - OPTIONAL window of the rolling Sharpe.
+    """
+    def __init__(self, config, portfolio_handler, title="", periods=252, rolling_window=126):
+        super(TearsheetStatistics, self).__init__(config, portfolio_handler)
+        self.title = title
+        self.periods = periods
+        self.rolling_window = rolling_window
+
+    def plot_results(self, filename=""):
+        """
+        Renders the tearsheet to filename (default: a .png file in
+        the output directory, named as by save), returns it.
+        """
+        if filename == "":
+            filename = os.path.splitext(self._get_filename())[0] + ".png"
+        print("Render tearsheet to '%s'" % filename)
+        return render_tearsheet(
+            self.get_results(), filename, self.title, self.periods, self.rolling_window
+        )
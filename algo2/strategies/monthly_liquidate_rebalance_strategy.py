@@ -5,7 +5,7 @@ from __future__ import (absolute_import, division, print_function,
 
 import calendar
 
-from base_strategy import AbstractStrategy
+from algo2.strategies.base_strategy import AbstractStrategy
 from algo2.event import (SignalEvent, EventType)
 # from algo2.pos_sizers.rebalance import RebalancePositionSizer
 
@@ -3,9 +3,7 @@
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
-from collections import deque
-import numpy as np
-
+from algo2.rolling import RollingWindow
 from algo2.strategies.base_strategy import AbstractStrategy
 from algo2.event import (SignalEvent, EventType)
 
@@ -37,18 +35,19 @@ class MovingAverageCrossStrategy(AbstractStrategy):
         self.bars = {ticker: 0 for ticker in self.tickers}  # self.bars = 0
         self.invested = {ticker: False for ticker in self.tickers}  # self.invested = False
 
-        # initialise deque's for sma and lma
+        # initialise rolling windows for sma and lma
         self.sw_bars, self.lw_bars = self._calculate_initial()
 
     def _calculate_initial(self):
         """
-        Adds default values to sw_bars/lw_bars
+        Adds default values to sw_bars/lw_bars, i.e. empty
+        rolling windows with O(1) update of their mean
         """
         sw_bars = {}
         lw_bars = {}
         for tkr in self.tickers:
-            sw_bars[tkr] = deque(maxlen=self.short_window)
-            lw_bars[tkr] = deque(maxlen=self.long_window)
+            sw_bars[tkr] = RollingWindow(self.short_window, extremes=False)
+            lw_bars[tkr] = RollingWindow(self.long_window, extremes=False)
         return sw_bars, lw_bars
 
     def calculate_signals(self, event):
@@ -64,8 +63,8 @@ class MovingAverageCrossStrategy(AbstractStrategy):
             # Enough bars are present for trading
             if self.bars[tkr] > self.long_window:
                 # Calculate the simple moving averages
-                short_sma = np.mean(self.sw_bars[tkr])
-                long_sma = np.mean(self.lw_bars[tkr])
+                short_sma = self.sw_bars[tkr].mean()
+                long_sma = self.lw_bars[tkr].mean()
 
                 # Trading signals based on moving average cross
                 if short_sma > long_sma and not self.invested[tkr]:
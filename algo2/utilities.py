@@ -6,7 +6,6 @@ from __future__ import (absolute_import, division, print_function,
 import sys
 import itertools
 import os
-from munch import munchify
 
 PY2 = sys.version_info[0] == 2  # PY2 = sys.version_info.major == 2
 # PY3 = (sys.version_info[0] >= 3)
@@ -27,10 +26,26 @@ def get_updir_wfld(folder_string):
     return os.path.join(algo2_dir, folder_string)  # ~/folder
 
 
-DEFAULT = munchify({
-    "CSV_DATA_DIR": get_updir_wfld("data"),
-    "OUTPUT_DIR": get_updir_wfld("out")
-})
+def _get_default_config():
+    from munch import munchify
+    return munchify({
+        "CSV_DATA_DIR": get_updir_wfld("data"),
+        "OUTPUT_DIR": get_updir_wfld("out")
+    })
+
+
+# DEFAULT is created on first access (module __getattr__, Python 3.7+),
+# so that importing algo2 does not import munch
+if sys.version_info < (3, 7):
+    DEFAULT = _get_default_config()
+
+
+def __getattr__(name):
+    if name == "DEFAULT":
+        global DEFAULT
+        DEFAULT = _get_default_config()
+        return DEFAULT
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
 
 ################################################
 # Python 2.7 vs. Python 3.x, compatibility
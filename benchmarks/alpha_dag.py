@@ -0,0 +1,50 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Benchmark of computing all the 101 formulaic alphas on a synthetic
+(time x ticker) panel: one alpha at a time (each recomputing its
+intermediates) vs. a single pass over their expression DAG, with
+the report of the shared subexpressions.
+
+$ python -m benchmarks.alpha_dag [n_bars] [n_tickers]
+"""
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from algo2.alphas.world_quant_101 import FORMULAS, Alphas
+
+
+def main(n_bars=1000, n_tickers=500):
+    np.random.seed(42)
+    close = pd.DataFrame(
+        100 * np.exp(np.cumsum(np.random.normal(0, 0.01, (n_bars, n_tickers)), axis=0))
+    )
+    open = close * np.exp(np.random.normal(0, 0.005, close.shape))
+    high = np.maximum(open, close) * 1.01
+    low = np.minimum(open, close) * 0.99
+    volume = pd.DataFrame(np.random.lognormal(12, 0.5, close.shape))
+    alphas = Alphas(open, high, low, close, volume)
+    print("%d alphas, %d bars x %d tickers" % (len(FORMULAS), n_bars, n_tickers))
+
+    start = timeit.default_timer()
+    for name in FORMULAS:
+        getattr(alphas, name)()
+    print("one by one:  %.2fs" % (timeit.default_timer() - start))
+
+    start = timeit.default_timer()
+    alphas.compute()
+    print("single pass: %.2fs" % (timeit.default_timer() - start))
+    print(alphas.report)
+    print("time per operation:")
+    for op, seconds in alphas.report.seconds.most_common(5):
+        print("  %-12s %.2fs" % (op, seconds))
+
+
+##############################################
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
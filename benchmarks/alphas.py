@@ -0,0 +1,62 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the alpha operators on a synthetic (time x ticker)
+panel: the pandas ones of samples/world_quant_101alphas.py (rolling
+apply with Python callbacks for ts_rank, product, ts_argmax/min) vs.
+the vectorized algo2.alphas.operators.
+
+$ python -m benchmarks.alphas [n_bars] [n_tickers] [window]
+"""
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from algo2.alphas import operators
+import samples.world_quant_101alphas as wq
+
+
+def timed(func, *args):
+    start = timeit.default_timer()
+    func(*args)
+    return timeit.default_timer() - start
+
+
+def main(n_bars=250, n_tickers=200, window=10):
+    np.random.seed(42)
+    prices = pd.DataFrame(
+        100 * np.exp(np.cumsum(np.random.normal(0, 0.01, (n_bars, n_tickers)), axis=0))
+    )
+    volumes = pd.DataFrame(np.random.lognormal(12, 0.5, (n_bars, n_tickers)))
+    cases = [
+        ("ts_sum", (prices, window)),
+        ("sma", (prices, window)),
+        ("stddev", (prices, window)),
+        ("correlation", (prices, volumes, window)),
+        ("covariance", (prices, volumes, window)),
+        ("ts_rank", (prices, window)),
+        ("product", (prices / 100, window)),
+        ("ts_min", (prices, window)),
+        ("ts_max", (prices, window)),
+        ("ts_argmax", (prices, window)),
+        ("ts_argmin", (prices, window)),
+        ("delta", (prices, window)),
+        ("delay", (prices, window)),
+        ("rank", (prices,)),
+        ("scale", (prices,)),
+    ]
+    print("%d bars x %d tickers, window %d" % (n_bars, n_tickers, window))
+    print("%-12s %10s %10s %9s" % ("operator", "pandas", "numpy", "speedup"))
+    for name, args in cases:
+        slow = timed(getattr(wq, name), *args)
+        fast = timed(getattr(operators, name), *args)
+        print("%-12s %9.3fs %9.3fs %8.1fx" % (name, slow, fast, slow / fast))
+
+
+##############################################
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
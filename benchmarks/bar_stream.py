@@ -0,0 +1,65 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Benchmark of HistoricCSVBarDataHandler streaming speed,
+DataFrame.iterrows() rows vs. columnar (NumPy arrays) mode.
+
+$ python -m benchmarks.bar_stream
+"""
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+import timeit
+
+from algo2 import utilities
+from algo2.feeds.csv_files import HistoricCSVBarDataHandler
+
+
+class _NullQueue(object):
+    """
+    Events are dropped, so that only the data handler is timed.
+    """
+    def put(self, event):
+        pass
+
+
+def stream_bars(csv_dir, tickers, columnar):
+    """
+    Streams all bars and returns (no. of events, seconds),
+    excluding CSV reading and merging.
+    """
+    data_handler = HistoricCSVBarDataHandler(
+        csv_dir, _NullQueue(), tickers, columnar=columnar
+    )
+    events = 0
+    start = timeit.default_timer()
+    while data_handler.continue_backtest:
+        data_handler.stream_next()
+        events += 1
+    return events - 1, timeit.default_timer() - start
+
+
+def run(config, tickers, repeat=3):
+    results = {}
+    for name, columnar in [("iterrows", False), ("columnar", True)]:
+        events, seconds = min(
+            (stream_bars(config.CSV_DATA_DIR, tickers, columnar) for _ in range(repeat)),
+            key=lambda x: x[1]
+        )
+        results[name] = events / seconds
+        print("%-10s %8d events in %7.4fs: %12.0f events/sec" % (
+            name, events, seconds, results[name])
+        )
+    print("speed-up: %.1fx" % (results["columnar"] / results["iterrows"]))
+    return results
+
+
+##############################################
+def main():
+    config = utilities.DEFAULT
+    tickers = ["SPY", "AGG", "SP500TR", "AAPL"]
+    run(config, tickers)
+
+
+##############################################
+if __name__ == "__main__":
+    main()
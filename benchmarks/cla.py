@@ -0,0 +1,84 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Benchmark of statistics.CLA: solving random problems of 50 to 500
+assets (weights bounded to 5%), their max Sharpe ratio portfolio and
+10k points efficient frontier, a batch of rolling window problems
+(solve_batch) for monthly rebalancing of 100 assets, and the same
+rebalances warm started from the previous solution (as by
+pos_sizers.cla.CLAPositionSizer) vs. cold.
+
+$ python -m benchmarks.cla [max_assets]
+"""
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+import sys
+import timeit
+
+import numpy as np
+
+from algo2.statistics.CLA import CLA, solve_batch
+
+
+def random_problem(n_assets, n_returns, state):
+    returns = state.normal(0.0004, 0.01, (n_returns, n_assets))
+    return returns.mean(axis=0).reshape(-1, 1), np.cov(returns.T)
+
+
+def main(max_assets=500):
+    state = np.random.RandomState(42)
+    for n_assets in (50, 100, 200, 500):
+        if n_assets > max_assets:
+            break
+        mean, covar = random_problem(n_assets, 3 * n_assets, state)
+        cla = CLA(mean, covar, np.zeros((n_assets, 1)), np.full((n_assets, 1), 0.05))
+        start = timeit.default_timer()
+        cla.solve()
+        solved = timeit.default_timer()
+        cla.get_max_sharpe()
+        max_sharpe = timeit.default_timer()
+        cla.eff_frontier(10000)
+        print("%3d assets: %3d turning points in %6.3fs, max Sharpe %6.3fs, frontier %6.3fs" % (
+            n_assets, len(cla.w), solved - start, max_sharpe - solved,
+            timeit.default_timer() - max_sharpe
+        ))
+
+    # 10 years of daily returns, 1 year windows rolled monthly
+    n_assets, window, step = 100, 252, 21
+    returns = state.normal(0.0004, 0.01, (2520, n_assets))
+    starts = range(0, len(returns) - window + 1, step)
+    means = np.array([returns[i:i + window].mean(axis=0) for i in starts])
+    covars = np.array([np.cov(returns[i:i + window].T) for i in starts])
+    start = timeit.default_timer()
+    for cla in solve_batch(means, covars, np.zeros((n_assets, 1)), np.full((n_assets, 1), 0.05)):
+        cla.get_max_sharpe()
+    print("solve_batch + max Sharpe: %d problems of %d assets in %6.3fs" % (
+        len(means), n_assets, timeit.default_timer() - start
+    ))
+
+    for max_sharpe in (True, False):
+        cold = warm = 0.0
+        previous = None
+        for mean, covar in zip(means, covars):
+            args = (mean.reshape(-1, 1), covar, np.zeros((n_assets, 1)), np.full((n_assets, 1), 0.05))
+            start = timeit.default_timer()
+            cla = CLA(*args)
+            cla.solve()
+            cla.get_max_sharpe() if max_sharpe else cla.get_min_var()
+            cold += timeit.default_timer() - start
+            start = timeit.default_timer()
+            cla = CLA(*args)
+            if previous is not None:
+                cla.warm_start(previous, max_sharpe)
+            cla.solve(stop_at_max_sharpe=max_sharpe)
+            cla.get_max_sharpe() if max_sharpe else cla.get_min_var()
+            warm += timeit.default_timer() - start
+            previous = cla
+        print("rebalances to the %s portfolio: cold %6.3fs, warm started %6.3fs" % (
+            "max Sharpe" if max_sharpe else "min variance", cold, warm
+        ))
+
+
+##############################################
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,51 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Benchmark of risk.covariance: a covariance matrix per bar of the
+returns of 100 and 500 tickers over a 252 bars window (with and
+without Ledoit-Wolf shrinkage) and exponentially weighted, vs. np.cov
+of the window re-computed per bar.
+
+$ python -m benchmarks.covariance [n_bars]
+"""
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+import sys
+import timeit
+
+import numpy as np
+
+from algo2.risk.covariance import EWCovariance, WindowCovariance
+
+
+def per_bar(covariance, returns):
+    start = timeit.default_timer()
+    for vector in returns:
+        covariance.update(vector)
+        covariance.cov()
+    return (timeit.default_timer() - start) / len(returns)
+
+
+def window_np_cov(returns, window):
+    start = timeit.default_timer()
+    for i in range(1, len(returns)):
+        np.cov(returns[max(0, i + 1 - window):i + 1].T)
+    return (timeit.default_timer() - start) / len(returns)
+
+
+def main(n_bars=1000):
+    window = 252
+    np.random.seed(42)
+    for n in (100, 500):
+        returns = np.random.normal(0.0004, 0.01, (n_bars, n))
+        print("%d tickers, per bar: np.cov %7.3fms, window %7.3fms, shrunk %7.3fms, EW %7.3fms" % (
+            n, 1e3 * window_np_cov(returns, window),
+            1e3 * per_bar(WindowCovariance(n, window), returns),
+            1e3 * per_bar(WindowCovariance(n, window, shrinkage=True), returns),
+            1e3 * per_bar(EWCovariance(n, halflife=63), returns),
+        ))
+
+
+##############################################
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,63 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Benchmark of HistoricCSVBarDataHandler construction on a
+synthetic universe of daily bar CSV files (dd/mm/yyyy dates),
+without cache, then with a cold and a warm CSVCache.
+
+$ python -m benchmarks.csv_cache [n_tickers] [n_bars]
+"""
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from algo2.event_bus import DequeEventBus
+from algo2.feeds.cache import CSVCache
+from algo2.feeds.csv_files import HistoricCSVBarDataHandler
+
+
+def write_universe(csv_dir, n_tickers, n_bars):
+    """
+    Writes n_tickers Yahoo-like CSV files of n_bars daily bars.
+    """
+    dates = pd.bdate_range("2000-01-03", periods=n_bars).strftime("%d/%m/%Y")
+    tickers = ["T%04d" % i for i in range(n_tickers)]
+    for ticker in tickers:
+        close = 100 * np.exp(np.cumsum(np.random.normal(0, 0.01, n_bars)))
+        df = pd.DataFrame({
+            "Date": dates, "Open": close, "High": close * 1.01, "Low": close * 0.99,
+            "Close": close, "Volume": np.random.randint(1e5, 1e6, n_bars), "Adj Close": close
+        })
+        df.to_csv(os.path.join(csv_dir, "%s.csv" % ticker), index=False, float_format="%.6f")
+    return tickers
+
+
+def construct(csv_dir, tickers, cache):
+    start = timeit.default_timer()
+    HistoricCSVBarDataHandler(csv_dir, DequeEventBus(), tickers, cache=cache)
+    return timeit.default_timer() - start
+
+
+def main(n_tickers=100, n_bars=5000):
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        tickers = write_universe(tmp_dir, n_tickers, n_bars)
+        cache = CSVCache(os.path.join(tmp_dir, "cache"))
+        print("%d tickers x %d bars" % (n_tickers, n_bars))
+        print("no cache:   %.2fs" % construct(tmp_dir, tickers, None))
+        print("cold cache: %.2fs" % construct(tmp_dir, tickers, cache))
+        print("warm cache: %.2fs" % construct(tmp_dir, tickers, cache))
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+##############################################
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,80 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the drawdown statistics of statistics.performance on a
+long (e.g. minute bars) random walk equity curve: the vectorized
+create_drawdowns/get_drawdowns_slow (with the episode tables) vs. the
+Python loops they replaced, the latter timed on the first n_loop
+points only and extrapolated.
+
+$ python -m benchmarks.drawdowns [n_points] [n_loop]
+"""
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+from itertools import groupby
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+import algo2.statistics.performance as perf
+
+
+def create_drawdowns_loop(returns):
+    """
+    create_drawdowns as it was (with .iloc as .ix is gone).
+    """
+    idx = returns.index
+    hwm = np.zeros(len(idx))
+    for t in range(1, len(idx)):
+        hwm[t] = max(hwm[t - 1], returns.iloc[t])
+    drawdown = pd.Series((hwm - returns.values) / hwm, index=idx)
+    drawdown.iloc[0] = 0.0
+    duration = max(sum(1 for i in g if i == 1) for k, g in groupby(np.where(drawdown == 0, 0, 1)))
+    return drawdown, np.max(drawdown), duration
+
+
+def get_drawdowns_loop(returns):
+    """
+    get_drawdowns_slow as it was.
+    """
+    hwm = np.zeros(len(returns))
+    drawdown = np.zeros(len(returns))
+    duration = np.zeros(len(returns))
+    for t in range(1, len(returns)):
+        hwm[t] = max(hwm[t - 1], returns[t])
+        drawdown[t] = (returns[t] - hwm[t])
+        duration[t] = (0 if drawdown[t] == 0 else duration[t - 1] + 1)
+    return drawdown, drawdown.min(), duration.max()
+
+
+def timed(func, *args, **kwargs):
+    start = timeit.default_timer()
+    func(*args, **kwargs)
+    return timeit.default_timer() - start
+
+
+def main(n_points=10000000, n_loop=200000):
+    np.random.seed(42)
+    index = pd.date_range("2000-01-03", periods=n_points, freq="min")
+    equity = pd.Series(1e6 * np.exp(np.cumsum(np.random.normal(0, 1e-4, n_points))), index=index)
+    pnl = equity - equity.iloc[0]
+    print("%d points (loops: %d points, extrapolated)" % (n_points, min(n_loop, n_points)))
+    scale = n_points / float(min(n_loop, n_points))
+    print("create_drawdowns:   loop %8.1fs, vectorized %6.2fs (+ episodes %6.2fs)" % (
+        timed(create_drawdowns_loop, equity.iloc[:n_loop]) * scale,
+        timed(perf.create_drawdowns, equity),
+        timed(perf.create_drawdowns, equity, episodes=True)
+    ))
+    print("get_drawdowns_slow: loop %8.1fs, vectorized %6.2fs (+ episodes %6.2fs)" % (
+        timed(get_drawdowns_loop, pnl.values[:n_loop]) * scale,
+        timed(perf.get_drawdowns_slow, pnl),
+        timed(perf.get_drawdowns_slow, pnl, episodes=True)
+    ))
+    print("%d drawdown episodes" % len(perf.get_drawdown_episodes(equity)))
+
+
+##############################################
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
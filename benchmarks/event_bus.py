@@ -0,0 +1,109 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the backtest event loop, queue.Queue (polled via
+get(False) and queue.Empty) vs. DequeEventBus with the per
+EventType handler table.
+
+$ python -m benchmarks.event_bus
+"""
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+import timeit
+
+from algo2 import utilities
+from algo2.utilities import queue
+from algo2.event import BarEvent, SignalEvent
+from algo2.event_bus import DequeEventBus, QueueEventBus
+
+
+def queue_loop(n_bars):
+    """
+    The loop as it was: a signal per bar and an exception per bar.
+    """
+    events_queue = queue.Queue()
+    bar = BarEvent("SPY", None, 86400, 1.0, 1.0, 1.0, 1.0, 100, 1.0)
+    signal = SignalEvent("SPY", "BOT")
+    events = 0
+    bars = 0
+    while bars < n_bars:
+        try:
+            event = events_queue.get(False)
+        except queue.Empty:
+            events_queue.put(bar)
+            bars += 1
+        else:
+            events += 1
+            if event.type == bar.type:
+                events_queue.put(signal)
+    return events
+
+
+def bus_loop(bus, n_bars):
+    """
+    The loop as it is: poll() returns None when empty.
+    """
+    bar = BarEvent("SPY", None, 86400, 1.0, 1.0, 1.0, 1.0, 100, 1.0)
+    signal = SignalEvent("SPY", "BOT")
+    counter = [0]
+
+    def on_bar(event):
+        counter[0] += 1
+        bus.put(signal)
+
+    def on_signal(event):
+        counter[0] += 1
+
+    handlers = {bar.type: on_bar, signal.type: on_signal}
+    poll = bus.poll
+    bars = 0
+    while bars < n_bars:
+        event = poll()
+        if event is None:
+            bus.put(bar)
+            bars += 1
+            continue
+        handlers[event.type](event)
+    return counter[0]
+
+
+def run_backtests():
+    """
+    Full MAC sample backtest with both buses.
+    """
+    from samples.mac_xstocks_backtest import create_backtest
+    from algo2.feeds.csv_files import HistoricCSVBarDataHandler
+
+    config = utilities.DEFAULT
+    for name, bus in [("Queue", QueueEventBus), ("deque", DequeEventBus)]:
+        data_handler = HistoricCSVBarDataHandler(
+            config.CSV_DATA_DIR, bus(), ["SP500TR"], columnar=True
+        )
+        backtest = create_backtest(data_handler)
+        start = timeit.default_timer()
+        backtest._run_backtest()
+        print("MAC backtest, %-5s bus: %.4fs" % (name, timeit.default_timer() - start))
+
+
+def main(n_bars=200000):
+    results = {}
+    for name, loop in [
+        ("queue.Queue", lambda: queue_loop(n_bars)),
+        ("QueueEventBus", lambda: bus_loop(QueueEventBus(), n_bars)),
+        ("DequeEventBus", lambda: bus_loop(DequeEventBus(), n_bars)),
+    ]:
+        start = timeit.default_timer()
+        events = loop()
+        seconds = timeit.default_timer() - start
+        results[name] = events / seconds
+        print("%-14s %8d events in %7.4fs: %12.0f events/sec" % (
+            name, events, seconds, results[name])
+        )
+    print("speed-up: %.1fx" % (results["DequeEventBus"] / results["queue.Queue"]))
+    run_backtests()
+    return results
+
+
+##############################################
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Allocation speed and memory of TickEvents, __dict__ based (as
+the events were) vs. slotted, and of a tick replay allocating
+a new TickEvent per tick vs. re-using one (reuse_events).
+
+$ python -m benchmarks.events_memory [n_ticks]
+"""
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+import sys
+import timeit
+import tracemalloc
+
+import numpy as np
+
+from algo2.event import EventType, TickEvent
+from algo2.event_bus import DequeEventBus
+
+
+class DictTickEvent(object):
+    """
+    TickEvent as it was, i.e. with a per-instance __dict__.
+    """
+    def __init__(self, ticker, time, bid, ask):
+        self.type = EventType.TICK
+        self.ticker = ticker
+        self.time = time
+        self.bid = bid
+        self.ask = ask
+
+
+def memory_per_event(event_class, n=100000):
+    """
+    Bytes allocated per live event, measured by tracemalloc.
+    """
+    tracemalloc.start()
+    start, _ = tracemalloc.get_traced_memory()
+    events = [event_class("SPY", None, 1.0, 1.1) for _ in range(n)]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del events
+    return (current - start) / n - 8   # less the list pointer
+
+
+def allocation_rate(event_class, n):
+    """
+    Events allocated (and freed) per second.
+    """
+    start = timeit.default_timer()
+    for _ in range(n):
+        event_class("SPY", None, 1.0, 1.1)
+    return n / (timeit.default_timer() - start)
+
+
+def replay(n_ticks, reuse_events):
+    """
+    Replays n_ticks ticks (from arrays, as a columnar handler
+    would) through a DequeEventBus; returns the seconds taken
+    and the no. of TickEvents allocated.
+    """
+    bids = np.random.uniform(100, 101, 1000).tolist()
+    bus = DequeEventBus()
+    event = None
+    allocated = 0
+    start = timeit.default_timer()
+    for i in range(n_ticks):
+        bid = bids[i % 1000]
+        if event is not None:
+            tev = event.renew("SPY", i, bid, bid + 0.01)
+        else:
+            tev = TickEvent("SPY", i, bid, bid + 0.01)
+            allocated += 1
+        if reuse_events:
+            event = tev
+        bus.put(tev)
+        bus.poll()
+    return timeit.default_timer() - start, allocated
+
+
+def main(n_ticks=10000000):
+    print("Bytes per live event: dict %.0f, slotted %.0f" % (
+        memory_per_event(DictTickEvent), memory_per_event(TickEvent))
+    )
+    n = min(n_ticks, 1000000)
+    print("Allocations/sec: dict %.0f, slotted %.0f" % (
+        allocation_rate(DictTickEvent, n), allocation_rate(TickEvent, n))
+    )
+    for reuse_events in [False, True]:
+        seconds, allocated = replay(n_ticks, reuse_events)
+        print("Replay of %d ticks, reuse_events=%s: %.2fs, %d TickEvents allocated" % (
+            n_ticks, reuse_events, seconds, allocated)
+        )
+
+
+##############################################
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
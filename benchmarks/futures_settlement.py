@@ -0,0 +1,89 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Benchmark of positions.futures: the daily variation settlement of
+1000 futures positions by the FuturesBook (a vectorized pass over
+its arrays) vs. settling each position in a Python loop, and by the
+Portfolio (incl. rebuilding its marks) vs. re-marking all positions.
+
+$ python -m benchmarks.futures_settlement [n_contracts] [n_days]
+"""
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+import sys
+import timeit
+
+import numpy as np
+
+from algo2.portfolio import Portfolio
+from algo2.positions.futures import Futures, FuturesBook
+
+
+class DataHandler(object):
+    def __init__(self, prices):
+        self.prices = prices
+
+    def istick(self):
+        return True
+
+    def get_best_bid_ask(self, ticker):
+        return self.prices[ticker], self.prices[ticker]
+
+
+def loop_settle(positions, prices):
+    """
+    Settles each position (a dict of its book-keeping) at its price.
+    """
+    total = 0.0
+    for position, price in zip(positions, prices):
+        variation = position["point_value"] * (position["quantity"] * price - position["reference"])
+        position["reference"] = position["quantity"] * price
+        total += variation
+    return total
+
+
+def main(n_contracts=1000, n_days=252):
+    np.random.seed(42)
+    book = FuturesBook()
+    prices = np.random.uniform(50, 5000, n_contracts)
+    positions = [
+        Futures("BOT", "C%d" % i, 1 + i % 5, prices[i], 1.0, prices[i], prices[i],
+                book=book, point_value=float(1 + i % 50))
+        for i in range(n_contracts)
+    ]
+    dicts = [
+        {"point_value": p.point_value, "quantity": p.quantity, "reference": p.cost / p.point_value}
+        for p in positions
+    ]
+    days = prices * np.cumprod(np.random.normal(1, 0.01, (n_days, n_contracts)), axis=0)
+
+    start = timeit.default_timer()
+    for day in days:
+        book.settle(day)
+    vectorized = (timeit.default_timer() - start) / n_days
+    day_prices = days.tolist()
+    start = timeit.default_timer()
+    for day in day_prices:
+        loop_settle(dicts, day)
+    loop = (timeit.default_timer() - start) / n_days
+    print("%d contracts, per settlement: book %7.1fus, loop %7.1fus" % (
+        n_contracts, 1e6 * vectorized, 1e6 * loop
+    ))
+
+    tickers = ["C%d" % i for i in range(n_contracts)]
+    portfolio = Portfolio(
+        DataHandler(dict(zip(tickers, prices.tolist()))), 1e7,
+        futures=FuturesBook({ticker: (50.0, 1000.0) for ticker in tickers})
+    )
+    for ticker, price in zip(tickers, prices.tolist()):
+        portfolio.trade_position("BOT", ticker, 1, price, 1.0)
+    settle = timeit.timeit(portfolio.settle, number=100) / 100
+    re_mark = timeit.timeit(portfolio.update_portfolio, number=100) / 100
+    print("%d contracts, per settlement: portfolio %7.1fus, re-marking all positions %7.1fus" % (
+        n_contracts, 1e6 * settle, 1e6 * re_mark
+    ))
+
+
+##############################################
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
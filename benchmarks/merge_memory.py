@@ -0,0 +1,57 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the peak (traced) memory and time of streaming all
+the bars of a synthetic universe through HistoricCSVBarDataHandler,
+concatenating and sorting the whole data vs. the chunked k-way merge.
+
+$ python -m benchmarks.merge_memory [n_tickers] [n_bars] [chunksize]
+"""
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+import shutil
+import sys
+import tempfile
+import timeit
+import tracemalloc
+
+from algo2.event_bus import DequeEventBus
+from algo2.feeds.csv_files import HistoricCSVBarDataHandler
+from benchmarks.csv_cache import write_universe
+
+
+def replay(csv_dir, tickers, chunksize):
+    """
+    Streams all the bars, returns (no. of bars, peak MB, seconds).
+    """
+    tracemalloc.start()
+    start = timeit.default_timer()
+    events_queue = DequeEventBus()
+    price_handler = HistoricCSVBarDataHandler(
+        csv_dir, events_queue, tickers, chunksize=chunksize
+    )
+    n_bars = 0
+    while price_handler.continue_backtest:
+        price_handler.stream_next()
+        while events_queue.poll() is not None:
+            n_bars += 1
+    elapsed = timeit.default_timer() - start
+    peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+    tracemalloc.stop()
+    return n_bars, peak, elapsed
+
+
+def main(n_tickers=100, n_bars=5000, chunksize=500):
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        tickers = write_universe(tmp_dir, n_tickers, n_bars)
+        print("%d tickers x %d bars" % (n_tickers, n_bars))
+        print("concat + sort: %d bars, peak %.1f MB, %.2fs" % replay(tmp_dir, tickers, None))
+        print("k-way merge:   %d bars, peak %.1f MB, %.2fs" % replay(tmp_dir, tickers, chunksize))
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+##############################################
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
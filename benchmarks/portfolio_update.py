@@ -0,0 +1,62 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the Portfolio valuation on each bar, with N open
+positions and one bar per ticker per timestamp: full re-valuation
+of all positions (O(N^2) per timestamp) vs. incremental (O(N)).
+
+$ python -m benchmarks.portfolio_update [n_tickers] [n_timestamps]
+"""
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+import sys
+import timeit
+
+import numpy as np
+
+from algo2.feeds.base_feed import AbstractBarDataHandler
+from algo2.portfolio import Portfolio
+
+
+class PricesDataHandler(AbstractBarDataHandler):
+    """
+    Bar data handler serving the last adjusted close from a dict.
+    """
+    def __init__(self):
+        self.tickers = {}
+
+    def get_last_adjclose(self, ticker):
+        return self.tickers[ticker]
+
+
+def revalue(n_tickers, n_timestamps, incremental):
+    """
+    Opens a position per ticker, then streams the bars and updates
+    the portfolio on each. Returns (final equity, seconds).
+    """
+    np.random.seed(42)
+    tickers = ["T%04d" % i for i in range(n_tickers)]
+    prices = 100 * np.exp(np.cumsum(np.random.normal(0, 0.01, (n_timestamps, n_tickers)), axis=0))
+    data_handler = PricesDataHandler()
+    portfolio = Portfolio(data_handler, 1e9, incremental)
+    for ticker, price in zip(tickers, prices[0]):
+        data_handler.tickers[ticker] = price
+        portfolio.trade_position("BOT", ticker, 100, price, 1.0)
+
+    start = timeit.default_timer()
+    for row in prices[1:].tolist():
+        for ticker, price in zip(tickers, row):
+            data_handler.tickers[ticker] = price
+            portfolio.update_portfolio(ticker)
+    return portfolio.equity, timeit.default_timer() - start
+
+
+def main(n_tickers=500, n_timestamps=20):
+    print("%d positions x %d timestamps" % (n_tickers, n_timestamps))
+    print("full:        equity %.4f, %.2fs" % revalue(n_tickers, n_timestamps, False))
+    print("incremental: equity %.4f, %.2fs" % revalue(n_tickers, n_timestamps, True))
+
+
+##############################################
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
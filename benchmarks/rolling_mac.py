@@ -0,0 +1,69 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Benchmark of MovingAverageCrossStrategy.calculate_signals on a
+synthetic universe: moving averages via np.mean over deques (as it
+was) vs. the O(1) RollingWindow.
+
+$ python -m benchmarks.rolling_mac [n_tickers] [n_bars] [long_window]
+"""
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+from collections import deque
+import contextlib
+import io
+import sys
+import timeit
+
+import numpy as np
+
+from algo2.event import BarEvent
+from algo2.event_bus import DequeEventBus
+from algo2.strategies.moving_average_cross_xstocks import MovingAverageCrossStrategy
+
+
+class DequeWindow(deque):
+    """
+    The bars window as it was: np.mean converts the deque on each call.
+    """
+    def mean(self):
+        return np.asarray(self).mean()
+
+
+class DequeMovingAverageCrossStrategy(MovingAverageCrossStrategy):
+    def _calculate_initial(self):
+        sw_bars = dict((tkr, DequeWindow(maxlen=self.short_window)) for tkr in self.tickers)
+        lw_bars = dict((tkr, DequeWindow(maxlen=self.long_window)) for tkr in self.tickers)
+        return sw_bars, lw_bars
+
+
+def run(strategy_class, tickers, prices, long_window):
+    """
+    Streams a bar per ticker per timestamp to the strategy,
+    returns (no. of signals, seconds).
+    """
+    events_queue = DequeEventBus()
+    strategy = strategy_class(tickers, events_queue, long_window // 4, long_window)
+    bar = BarEvent(None, None, 86400, 0.0, 0.0, 0.0, 0.0, 0, 0.0)
+    start = timeit.default_timer()
+    with contextlib.redirect_stdout(io.StringIO()):     # LONG/SHORT prints
+        for row in prices.tolist():
+            for ticker, price in zip(tickers, row):
+                strategy.calculate_signals(bar.renew(ticker, None, 86400, price, price, price, price, 0, price))
+    return len(events_queue), timeit.default_timer() - start
+
+
+def main(n_tickers=1000, n_bars=400, long_window=200):
+    np.random.seed(42)
+    tickers = ["T%05d" % i for i in range(n_tickers)]
+    prices = 100 * np.exp(np.cumsum(np.random.normal(0, 0.01, (n_bars, n_tickers)), axis=0))
+    print("%d tickers x %d bars, windows %d/%d" % (n_tickers, n_bars, long_window // 4, long_window))
+    print("deque + np.mean: %d signals, %.2fs" % run(
+        DequeMovingAverageCrossStrategy, tickers, prices, long_window))
+    print("RollingWindow:   %d signals, %.2fs" % run(
+        MovingAverageCrossStrategy, tickers, prices, long_window))
+
+
+##############################################
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
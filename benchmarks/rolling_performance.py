@@ -0,0 +1,82 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the rolling performance metrics of statistics.performance
+on 10 years of minute returns (252 days of 390 minutes): 252-day
+rolling Sharpe, Sortino, volatility and beta (cumulative sums) vs.
+pandas' rolling Sharpe, and aggregate_returns vs. the groupby/apply
+it replaced.
+
+$ python -m benchmarks.rolling_performance [n_years]
+"""
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+import algo2.statistics.performance as perf
+
+MINUTES = 390
+
+
+def aggregate_returns_groupby(returns, convert_to):
+    """
+    aggregate_returns as it was.
+    """
+    def cumulate_returns(x):
+        return np.exp(np.log(1 + x).cumsum()).iloc[-1] - 1
+
+    keys = {
+        "weekly": [lambda x: x.year, lambda x: x.month, lambda x: x.isocalendar()[1]],
+        "monthly": [lambda x: x.year, lambda x: x.month],
+        "yearly": [lambda x: x.year],
+    }[convert_to]
+    return returns.groupby(keys).apply(cumulate_returns)
+
+
+def pandas_sharpe(returns, window, periods):
+    rolling = returns.rolling(window)
+    return np.sqrt(periods) * rolling.mean() / rolling.std(ddof=0)
+
+
+def timed(func, *args, **kwargs):
+    start = timeit.default_timer()
+    func(*args, **kwargs)
+    return timeit.default_timer() - start
+
+
+def main(n_years=10):
+    n_points = n_years * 252 * MINUTES
+    window = 252 * MINUTES
+    periods = 252 * MINUTES
+    np.random.seed(42)
+    days = pd.bdate_range("2005-01-03", periods=n_years * 252)
+    index = (days.values[:, None] + np.arange(MINUTES) * np.timedelta64(1, "m")).ravel()
+    index = pd.DatetimeIndex(index + np.timedelta64(570, "m"))
+    benchmark = pd.Series(np.random.normal(2e-6, 5e-4, n_points), index=index)
+    returns = 0.8 * benchmark + np.random.normal(0, 3e-4, n_points)
+    print("%d minute returns, window %d" % (n_points, window))
+    print("rolling Sharpe:     pandas %6.2fs, cumulative sums %6.2fs" % (
+        timed(pandas_sharpe, returns, window, periods),
+        timed(perf.rolling_sharpe_ratio, returns, window, periods)
+    ))
+    print("rolling Sortino %6.2fs, volatility %6.2fs, beta %6.2fs, expanding Sharpe %6.2fs" % (
+        timed(perf.rolling_sortino_ratio, returns, window, periods),
+        timed(perf.rolling_volatility, returns, window, periods),
+        timed(perf.rolling_beta, returns, benchmark, window),
+        timed(perf.rolling_sharpe_ratio, returns, None, periods)
+    ))
+    for convert_to in ("weekly", "monthly", "yearly"):
+        print("aggregate_returns %-8s groupby %6.2fs, vectorized %6.2fs" % (
+            convert_to,
+            timed(aggregate_returns_groupby, returns, convert_to),
+            timed(perf.aggregate_returns, returns, convert_to)
+        ))
+
+
+##############################################
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,53 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Benchmark of getting the newest row of the alpha operators when a new
+bar per ticker arrives: re-computing the batch operator over the whole
+history vs. updating the streaming one.
+
+$ python -m benchmarks.streaming_alphas [n_bars] [n_tickers] [window]
+"""
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+import sys
+import timeit
+
+import numpy as np
+
+from algo2.alphas import operators, streaming
+
+
+def main(n_bars=1000, n_tickers=5000, window=20):
+    np.random.seed(42)
+    prices = 100 * np.exp(np.cumsum(np.random.normal(0, 0.01, (n_bars, n_tickers)), axis=0))
+    volumes = np.random.lognormal(12, 0.5, (n_bars, n_tickers))
+    cases = [
+        ("ts_sum", streaming.StreamingSum, (prices,)),
+        ("sma", streaming.StreamingMean, (prices,)),
+        ("stddev", streaming.StreamingStddev, (prices,)),
+        ("covariance", streaming.StreamingCovariance, (prices, volumes)),
+        ("correlation", streaming.StreamingCorrelation, (prices, volumes)),
+        ("ts_min", streaming.StreamingMin, (prices,)),
+        ("ts_max", streaming.StreamingMax, (prices,)),
+        ("delay", streaming.StreamingDelay, (prices,)),
+        ("delta", streaming.StreamingDelta, (prices,)),
+        ("decay_linear", streaming.StreamingDecayLinear, (prices,)),
+    ]
+    print("%d bars x %d tickers, window %d, time per new bar:" % (n_bars, n_tickers, window))
+    print("%-12s %10s %10s" % ("operator", "batch", "streaming"))
+    for name, streaming_class, inputs in cases:
+        start = timeit.default_timer()
+        getattr(operators, name)(*(inputs + (window,)))
+        batch = timeit.default_timer() - start
+
+        operator = streaming_class(window)
+        start = timeit.default_timer()
+        for i in range(n_bars):
+            operator.update(*[values[i] for values in inputs])
+        update = (timeit.default_timer() - start) / n_bars
+        print("%-12s %8.2fms %8.3fms" % (name, batch * 1e3, update * 1e3))
+
+
+##############################################
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
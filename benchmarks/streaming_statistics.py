@@ -0,0 +1,79 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Update time and memory of the statistics over a long (e.g. intraday
+tick) equity curve: SimpleStatistics (Python lists) vs.
+StreamingStatistics, storing the equity curve in arrays or not.
+
+$ python -m benchmarks.streaming_statistics [n_updates]
+"""
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+import sys
+import timeit
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from algo2 import utilities
+from algo2.statistics.simple import SimpleStatistics
+from algo2.statistics.streaming import StreamingStatistics
+
+
+class PortfolioMock(object):
+    def __init__(self, equity):
+        self.equity = equity
+
+
+class PortfolioHandlerMock(object):
+    def __init__(self, portfolio):
+        self.portfolio = portfolio
+
+
+def _update_all(make_statistics, timestamps, curve):
+    """
+    Updates the statistics at every point of the curve,
+    then returns the results.
+    """
+    portfolio_handler = PortfolioHandlerMock(PortfolioMock(curve[0]))
+    statistics = make_statistics(portfolio_handler)
+    portfolio = portfolio_handler.portfolio
+    for timestamp, equity in zip(timestamps, curve):
+        portfolio.equity = equity
+        statistics.update(timestamp, portfolio_handler)
+    return statistics.get_results()
+
+
+def run(make_statistics, timestamps, curve):
+    """
+    Returns (seconds, peak MB traced, sharpe), timed and
+    traced (by tracemalloc) in separate runs.
+    """
+    start = timeit.default_timer()
+    results = _update_all(make_statistics, timestamps, curve)
+    seconds = timeit.default_timer() - start
+    tracemalloc.start()
+    _update_all(make_statistics, timestamps, curve)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak / 2.0 ** 20, results["sharpe"]
+
+
+def main(n_updates=500000):
+    np.random.seed(42)
+    curve = (1e6 * np.exp(np.cumsum(np.random.normal(0, 1e-4, n_updates)))).tolist()
+    timestamps = list(pd.date_range("2016-01-04", periods=n_updates, freq="s"))
+    config = utilities.DEFAULT
+    print("%d updates" % n_updates)
+    for name, make_statistics in (
+        ("SimpleStatistics", lambda ph: SimpleStatistics(config, ph)),
+        ("Streaming, stored", lambda ph: StreamingStatistics(config, ph)),
+        ("Streaming, not stored", lambda ph: StreamingStatistics(config, ph, store_equity=False)),
+    ):
+        print("%-22s %6.2fs %8.1fMB peak, sharpe %s" % ((name,) + run(make_statistics, timestamps, curve)))
+
+
+##############################################
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,69 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Rendering time of the tearsheets of many saved statistics (10 years
+of daily equity each), with 1 worker process vs. max_workers.
+
+$ python -m benchmarks.tearsheets [n_results] [max_workers]
+"""
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from algo2 import utilities
+from algo2.statistics import tearsheet
+
+
+class PortfolioMock(object):
+    def __init__(self, equity):
+        self.equity = equity
+
+
+class PortfolioHandlerMock(object):
+    def __init__(self, portfolio):
+        self.portfolio = portfolio
+
+
+def save_results(directory, n_results, n_days=2520):
+    """
+    Saves the statistics of n_results random equity curves.
+    """
+    timestamps = pd.bdate_range("2010-01-01", periods=n_days)
+    filenames = []
+    for i in range(n_results):
+        curve = 1e6 * np.exp(np.cumsum(np.random.normal(3e-4, 0.01, n_days)))
+        portfolio_handler = PortfolioHandlerMock(PortfolioMock(1e6))
+        statistics = tearsheet.TearsheetStatistics(utilities.DEFAULT, portfolio_handler)
+        for timestamp, equity in zip(timestamps, curve):
+            portfolio_handler.portfolio.equity = equity
+            statistics.update(timestamp, portfolio_handler)
+        filenames.append(os.path.join(directory, "statistics_%03d.pkl" % i))
+        statistics.save(filenames[-1], csv=False)
+    return filenames
+
+
+def main(n_results=16, max_workers=None):
+    np.random.seed(42)
+    directory = tempfile.mkdtemp()
+    try:
+        filenames = save_results(directory, n_results)
+        for workers in (1, max_workers):
+            start = timeit.default_timer()
+            tearsheet.render_tearsheets(filenames, max_workers=workers)
+            print("%d tearsheets, %s workers: %.2fs" % (
+                n_results, workers or os.cpu_count(), timeit.default_timer() - start
+            ))
+    finally:
+        shutil.rmtree(directory)
+
+
+##############################################
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
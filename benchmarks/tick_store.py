@@ -0,0 +1,85 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Benchmark of replaying a synthetic universe of tick CSV files with
+HistoricCSVTickDataHandler vs. MemmapTickDataHandler on the converted
+tick store: start-up time, replay time and peak (traced) memory.
+
+$ python -m benchmarks.tick_store [n_tickers] [n_ticks]
+"""
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from algo2.event_bus import DequeEventBus
+from algo2.feeds.csv_files import HistoricCSVTickDataHandler
+from algo2.feeds.memmap import MemmapTickDataHandler, convert_tick_csvs
+
+
+def write_ticks(csv_dir, n_tickers, n_ticks):
+    """
+    Writes n_tickers tick CSV files of n_ticks (Ticker, Time, Bid, Ask).
+    """
+    tickers = ["T%04d" % i for i in range(n_tickers)]
+    for ticker in tickers:
+        ms = np.sort(np.random.randint(0, 5 * 86400 * 1000, n_ticks))
+        times = pd.to_datetime("2016-02-01") + pd.to_timedelta(ms, unit="ms")
+        bid = 100 * np.exp(np.cumsum(np.random.normal(0, 1e-4, n_ticks)))
+        pd.DataFrame({
+            "Ticker": ticker,
+            "Time": times.strftime("%d.%m.%Y %H:%M:%S.%f").str[:-3],
+            "Bid": bid, "Ask": bid + 0.01
+        }).to_csv(os.path.join(csv_dir, "%s.csv" % ticker), index=False, float_format="%.5f")
+    return tickers
+
+
+def replay(create_handler):
+    """
+    Creates the data handler and streams all the ticks, returns
+    (start-up seconds, replay seconds, peak MB).
+    """
+    tracemalloc.start()
+    start = timeit.default_timer()
+    price_handler = create_handler()
+    started = timeit.default_timer()
+    events_queue = price_handler.events_queue
+    while price_handler.continue_backtest:
+        price_handler.stream_next()
+        events_queue.poll()
+    end = timeit.default_timer()
+    peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+    tracemalloc.stop()
+    return started - start, end - started, peak
+
+
+def main(n_tickers=10, n_ticks=20000):
+    tmp_dir = tempfile.mkdtemp()
+    store_dir = os.path.join(tmp_dir, "store")
+    try:
+        tickers = write_ticks(tmp_dir, n_tickers, n_ticks)
+        start = timeit.default_timer()
+        convert_tick_csvs(tmp_dir, tickers, store_dir)
+        print("%d tickers x %d ticks, converted in %.2fs" % (
+            n_tickers, n_ticks, timeit.default_timer() - start
+        ))
+        print("csv:    start-up %.2fs, replay %.2fs, peak %.1f MB" % replay(
+            lambda: HistoricCSVTickDataHandler(tmp_dir, DequeEventBus(), tickers)
+        ))
+        print("memmap: start-up %.2fs, replay %.2fs, peak %.1f MB" % replay(
+            lambda: MemmapTickDataHandler(store_dir, DequeEventBus(), reuse_events=True)
+        ))
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+##############################################
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,78 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Benchmark of a buy and hold Backtest on a synthetic universe of
+daily bars, re-valuing the portfolio on every bar vs. once per
+timestamp ('batch_timestamps'), with a full or incremental Portfolio.
+
+$ python -m benchmarks.timestamp_batch [n_tickers] [n_bars]
+"""
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+import shutil
+import sys
+import tempfile
+import timeit
+
+from algo2 import utilities
+from algo2.backtest import Backtest
+from algo2.brokers.simulated_broker import IBSimulatedExecutionHandler
+from algo2.event_bus import DequeEventBus
+from algo2.feeds.csv_files import HistoricCSVBarDataHandler
+from algo2.pos_refiners.naive import NaivePositionRefiner
+from algo2.pos_sizers.naive import FixedPositionSizer
+from algo2.portfolio_handler import PortfolioHandler
+from algo2.statistics.simple import SimpleStatistics
+from algo2.strategies.buy_and_hold import BuyAndHoldStrategy
+from benchmarks.csv_cache import write_universe
+
+
+def run(csv_dir, tickers, batch_timestamps, incremental):
+    """
+    Runs the backtest, returns (final equity, seconds).
+    """
+    data_handler = HistoricCSVBarDataHandler(
+        csv_dir, DequeEventBus(), tickers, columnar=True
+    )
+    events_queue = data_handler.events_queue
+    position_sizer = FixedPositionSizer()
+    position_refiner = NaivePositionRefiner()
+    portfolio_handler = PortfolioHandler(
+        1e9, events_queue, data_handler,
+        position_sizer, position_refiner, incremental
+    )
+    backtest = Backtest(
+        data_handler, BuyAndHoldStrategy(tickers, events_queue),
+        portfolio_handler, IBSimulatedExecutionHandler(events_queue, data_handler),
+        position_sizer, position_refiner,
+        SimpleStatistics(utilities.DEFAULT, portfolio_handler), 1e9,
+        batch_timestamps=batch_timestamps
+    )
+    start = timeit.default_timer()
+    backtest.simulate_trading(testing=True)
+    return portfolio_handler.portfolio.equity, timeit.default_timer() - start
+
+
+def main(n_tickers=100, n_bars=250):
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        tickers = write_universe(tmp_dir, n_tickers, n_bars)
+        timings = [
+            (name, run(tmp_dir, tickers, batch, incremental))
+            for name, batch, incremental in [
+                ("per bar, full", False, False),
+                ("per bar, incremental", False, True),
+                ("per timestamp, full", True, False),
+                ("per timestamp, incremental", True, True)
+            ]
+        ]
+        print("%d tickers x %d bars" % (n_tickers, n_bars))
+        for name, (equity, seconds) in timings:
+            print("%-28s equity %.2f, %.2fs" % (name + ":", equity, seconds))
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+##############################################
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,55 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Benchmark of pos_sizers.vol_target: the volatility estimates'
+update per bar and the sizing per order of 5000 tickers over
+252 bars (a signal per ticker and bar).
+
+$ python -m benchmarks.vol_target [n_tickers] [n_bars]
+"""
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+import sys
+import timeit
+
+import numpy as np
+
+from algo2.event import BarEvent, SuggestedOrderEvent
+from algo2.pos_sizers.vol_target import VolTargetStockPositionSizer
+
+
+class Portfolio(object):
+    def __init__(self, equity):
+        self.equity = equity
+        self.positions = {}
+
+
+def main(n_tickers=5000, n_bars=252):
+    np.random.seed(42)
+    tickers = ["T%d" % i for i in range(n_tickers)]
+    prices = 100 * np.cumprod(1 + np.random.normal(0.0004, 0.01, (n_bars, n_tickers)), axis=0)
+    portfolio = Portfolio(1e7)
+    for method in VolTargetStockPositionSizer.METHODS:
+        sizer = VolTargetStockPositionSizer(n_positions=n_tickers, method=method)
+        event = BarEvent(None, 0, 86400, 0, 0, 0, 0, 0)
+        update = size = 0.0
+        for i, bar in enumerate(prices.tolist()):
+            start = timeit.default_timer()
+            for ticker, price in zip(tickers, bar):
+                event.renew(ticker, i, 86400, price, price, price, price, 0, price)
+                sizer.on_market_event(event)
+            update += timeit.default_timer() - start
+            orders = [SuggestedOrderEvent(ticker, "BOT") for ticker in tickers]
+            start = timeit.default_timer()
+            for order in orders:
+                sizer.size_order(portfolio, order)
+            size += timeit.default_timer() - start
+        n = n_bars * n_tickers
+        print("%-7s update %5.2fus per ticker and bar, size %5.2fus per order" % (
+            method, 1e6 * update / n, 1e6 * size / n
+        ))
+
+
+##############################################
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
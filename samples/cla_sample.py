@@ -1,7 +1,6 @@
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 import os
-import matplotlib.pyplot as plt
 import numpy as np
 
 import algo2.utilities as utilities
@@ -60,6 +59,7 @@ def run(config, testing, tickers_filename):
 
     # plot if not in testing
     if testing is False:
+        import matplotlib.pyplot as plt
 
         # plot efficient frontier
         plot2D(sigma, mu, 'Risk', 'Expected Excess Return', 'CLA-derived Efficient Frontier')
@@ -0,0 +1,41 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+from algo2 import utilities
+from algo2.optimize import sweep
+
+from samples.mac_xstocks_backtest import create_backtest
+
+
+def run(config, testing, tickers, grid, max_workers=None):
+    """
+    Grid search over the MAC windows: the prices are loaded once
+    and each combination is backtested on a process pool.
+    """
+    results = sweep(
+        create_backtest, grid,
+        config.CSV_DATA_DIR, tickers,
+        max_workers=max_workers
+    )
+    if not testing:
+        print(results.sort_values(by="sharpe", ascending=False).to_string())
+    return results
+
+
+##############################################
+def main():
+    config = utilities.DEFAULT
+    testing = False
+    tickers = ['SP500TR']
+    grid = {
+        "short_window": [20, 50, 100],
+        "long_window": [200, 300, 400],
+    }
+    run(config, testing, tickers, grid)
+
+
+##############################################
+if __name__ == "__main__":
+    main()
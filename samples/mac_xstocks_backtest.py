@@ -4,7 +4,7 @@ from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
 from algo2 import utilities
-from algo2.utilities import queue
+from algo2.event_bus import DequeEventBus
 from algo2.feeds.csv_files import HistoricCSVBarDataHandler
 
 from algo2.strategies.moving_average_cross_xstocks import MovingAverageCrossStrategy
@@ -17,22 +17,20 @@ from algo2.statistics.simple import SimpleStatistics
 from algo2.backtest import Backtest
 
 
-def run(config, testing, tickers, filename, sw=100, lw=400):
-
-    # ####################################
-    # get the data via quandl for two vol ETFs: VXX (long vol) and XIV (short vol)
-    # and merge
-
-    # Set up variables needed for backtest
-    events_queue = queue.Queue()
-    csv_dir = config.CSV_DATA_DIR
+def create_backtest(data_handler, short_window=100, long_window=400, config=None):
+    """
+    Wires the MAC backtest components around a data handler,
+    e.g. as backtest factory for algo2.optimize.sweep.
+    The config defaults to utilities.DEFAULT (loaded on first use).
+    """
+    if config is None:
+        config = utilities.DEFAULT
+    events_queue = data_handler.events_queue
+    tickers = list(data_handler.tickers.keys())
     initial_equity = 500000.00
 
-    # Use historic data Handler
-    data_handler = HistoricCSVBarDataHandler(csv_dir, events_queue, tickers)
-
     # Use the MAC Strategy
-    strategy = MovingAverageCrossStrategy(tickers, events_queue, sw, lw)
+    strategy = MovingAverageCrossStrategy(tickers, events_queue, short_window, long_window)
 
     # Use an example Position Sizer and Refiner (risk mgt)
     position_sizer = FixedPositionSizer()
@@ -57,8 +55,26 @@ def run(config, testing, tickers, filename, sw=100, lw=400):
         position_sizer, position_refiner,
         statistics, initial_equity
     )
+    return backtest
+
+
+def run(config, testing, tickers, filename, sw=100, lw=400):
+
+    # ####################################
+    # get the data via quandl for two vol ETFs: VXX (long vol) and XIV (short vol)
+    # and merge
+
+    # Set up variables needed for backtest
+    events_queue = DequeEventBus()
+    csv_dir = config.CSV_DATA_DIR
+
+    # Use historic data Handler
+    data_handler = HistoricCSVBarDataHandler(csv_dir, events_queue, tickers)
+
+    # Set up the backtest
+    backtest = create_backtest(data_handler, sw, lw, config)
     results = backtest.simulate_trading(testing=testing)
-    statistics.save(filename, False)    # if True: also saves a .csv file with main curves
+    backtest.statistics.save(filename, False)    # if True: also saves a .csv file with main curves
     return results
 
 
@@ -5,7 +5,7 @@ from __future__ import (absolute_import, division, print_function,
 import datetime
 
 from algo2 import utilities
-from algo2.utilities import queue
+from algo2.event_bus import DequeEventBus
 from algo2.feeds.csv_files import HistoricCSVBarDataHandler
 
 #   thi strategy needs the relevant position sizer
@@ -22,7 +22,7 @@ from algo2.backtest import Backtest
 def run(config, testing, tickers, filename):
 
     # Set up variables needed for backtest
-    events_queue = queue.Queue()
+    events_queue = DequeEventBus()
     csv_dir = config.CSV_DATA_DIR
     initial_equity = 500000.00
 
@@ -5,12 +5,11 @@ from __future__ import (absolute_import, division, print_function,
 import os
 import pandas as pd
 import datetime as dt
-import pandas_datareader.data as web  # then use df = web.DataReader(stocks, 'yahoo',start,end)
 
 from algo2.utilities import range
 
 from algo2 import utilities, statistics
-from algo2.utilities import queue
+from algo2.event_bus import DequeEventBus
 from algo2.feeds.csv_files import HistoricCSVBarDataHandler
 
 from algo2.strategies.buy_and_hold import BuyAndHoldStrategy
@@ -39,6 +38,7 @@ def get_merged_data(config, ticker, all_in_fee, testing):
     df_new, df_old = {}, {}
     # 1. download new data # and drop unwanted columns (keep only 'Adj Close')
     try:
+        import pandas_datareader.data as web  # imported here, only needed to download
         _start, _end = dt.datetime(1900, 1, 1), dt.date.today()
         df_new = web.DataReader(ticker.upper(), 'yahoo', _start, _end)
         # df_new.drop(['Open', 'High', 'Low', 'Close', 'Volume'], axis=1, inplace=True)
@@ -102,7 +102,7 @@ def run(config, testing, tickers, filename, all_in_fee):
     # ##############################################
     #   USUAL SET-UP
     # Set up variables for backtest()
-    events_queue = queue.Queue()
+    events_queue = DequeEventBus()
     # csv_dir = config.CSV_DATA_DIR
     initial_equity = 500000.00
 
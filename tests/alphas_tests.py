@@ -0,0 +1,210 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import numpy as np
+import pandas as pd
+from nose.tools import assert_equal, assert_true
+
+from algo2.alphas import operators, streaming
+from algo2.alphas.expression import (
+    Evaluator, abs_, correlation, delta, field, log, rank, sma, where
+)
+from algo2.alphas.world_quant_101 import Alphas
+import samples.world_quant_101alphas as wq
+
+
+def _random_panel(n=300, m=40):
+    """
+    Random walk prices with NaN, a constant run and cross-sectional
+    ties, and positive volumes.
+    """
+    np.random.seed(0)
+    prices = pd.DataFrame(100 + np.cumsum(np.random.normal(0, 1, (n, m)), axis=0))
+    prices.iloc[50:60, 3] = np.nan
+    prices.iloc[:20, 7] = np.nan
+    prices.iloc[100:130, 5] = 7.0
+    prices.iloc[200, :10] = prices.iloc[200, 10]
+    volumes = pd.DataFrame(np.random.lognormal(10, 1, (n, m)))
+    volumes.iloc[70, 2] = np.nan
+    return prices, volumes
+
+
+def _assert_close(actual, expected, **kwargs):
+    np.testing.assert_allclose(
+        actual, np.asarray(expected, dtype=float), equal_nan=True, **kwargs
+    )
+
+
+def test_operators():
+    """
+    Test the vectorized operators against the pandas ones of
+    samples/world_quant_101alphas.py.
+    """
+    prices, volumes = _random_panel()
+    for window in (1, 2, 5, 20):
+        for name in ("ts_sum", "sma", "ts_rank", "ts_min", "ts_max", "ts_argmax", "ts_argmin"):
+            _assert_close(
+                getattr(operators, name)(prices, window), getattr(wq, name)(prices, window),
+                rtol=1e-7, atol=1e-6
+            )
+        _assert_close(
+            operators.product(prices / 100, window), wq.product(prices / 100, window), rtol=1e-7
+        )
+        _assert_close(operators.delay(prices, window), wq.delay(prices, window))
+        _assert_close(operators.delta(prices, window), wq.delta(prices, window))
+        if window > 1:
+            _assert_close(operators.stddev(prices, window), wq.stddev(prices, window), atol=1e-6)
+            _assert_close(
+                operators.covariance(prices, volumes, window),
+                wq.covariance(prices, volumes, window), rtol=1e-7, atol=1e-2
+            )
+    for window in (5, 20):
+        # NaN over constant windows, where pandas may give +/-inf
+        expected = wq.correlation(prices, volumes, window).values
+        expected[~np.isfinite(expected)] = np.nan
+        _assert_close(operators.correlation(prices, volumes, window), expected, atol=1e-6)
+    _assert_close(operators.rank(prices), wq.rank(prices))
+    # an all-NaN row ranks to NaN, without floating point warnings
+    with np.errstate(all="raise"):
+        ranks = operators.rank(np.array([[np.nan, np.nan], [2.0, 1.0]]))
+    _assert_close(ranks, np.array([[np.nan, np.nan], [1.0, 0.5]]))
+    _assert_close(operators.scale(prices, 2), wq.scale(prices, 2))
+    # as wq.decay_linear, which relies on the removed DataFrame.as_matrix
+    filled = prices.ffill().bfill().fillna(0)
+    weights = np.arange(1, 11) / 55.0
+    expected = filled.rolling(10).apply(lambda x: np.dot(x, weights), raw=True)
+    expected.iloc[:9] = filled.iloc[:9]
+    _assert_close(operators.decay_linear(prices, 10), expected)
+
+
+def test_constant_windows():
+    """
+    Test that the variance over a constant window is exactly zero
+    and the correlation NaN.
+    """
+    values = np.array([[1.0], [5.0], [5.0], [5.0], [2.0]])
+    var = operators.variance(values, 3)[:, 0]
+    np.testing.assert_allclose(var[2:], [16.0 / 3, 0.0, 3.0])
+    assert_equal(var[3], 0.0)
+    corr = operators.correlation(values, np.arange(5.0)[:, None], 3)[:, 0]
+    assert_true(np.isnan(corr[3]))
+    assert_true(np.isfinite(corr[2]) and np.isfinite(corr[4]))
+
+
+def test_alphas():
+    """
+    Test the alphas against the ones of samples/world_quant_101alphas.py,
+    without modifying the input data.
+    """
+    np.random.seed(1)
+    n, m = 300, 20
+    index = pd.date_range("2010-01-01", periods=n)
+    columns = ["T%d" % i for i in range(m)]
+    close = pd.DataFrame(
+        100 * np.exp(np.cumsum(np.random.normal(0, 0.01, (n, m)), axis=0)), index, columns
+    )
+    close.iloc[40:45, 2] = np.nan
+    open = close * np.exp(np.random.normal(0, 0.005, (n, m)))
+    high = np.maximum(open, close) * 1.01
+    low = np.minimum(open, close) * 0.99
+    volume = pd.DataFrame(np.random.lognormal(12, 0.5, (n, m)).round(), index, columns)
+    data = (open, high, low, close, volume)
+    copies = [df.copy() for df in data]
+
+    alphas = Alphas(*data)
+    expected = wq.Alphas.__new__(wq.Alphas)
+    # ranks of tied values depend on rounding (e.g. covariances of ranks
+    # or window-2 correlations), decay_linear on the deprecated as_matrix
+    skipped = ("alpha013", "alpha015", "alpha016", "alpha029", "alpha031",
+               "alpha039", "alpha045")
+    names = sorted(name for name in dir(alphas) if name.startswith("alpha"))
+    assert_equal(len(names), 45)
+    for name in names:
+        actual = getattr(alphas, name)()
+        assert_true(actual.index.equals(index))
+        assert_equal(list(actual.columns), columns)
+        if name in skipped:
+            continue
+        expected.open, expected.high, expected.low, expected.close, expected.volume = [
+            df.copy() for df in data
+        ]
+        expected.returns = expected.close.pct_change()
+        _assert_close(actual.values, getattr(expected, name)(), rtol=1e-6, atol=1e-6)
+    for df, copy in zip(data, copies):
+        pd.testing.assert_frame_equal(df, copy)
+
+
+def test_expressions():
+    """
+    Test that identical subexpressions are evaluated once, and that
+    computing all the alphas in a single pass gives the same values
+    as computing them one by one.
+    """
+    x = field("x")
+    shared = rank(delta(log(x), 2))
+    expressions = {
+        "a": correlation(shared, rank(delta(log(field("x")), 2)), 5),
+        "b": -1 * shared + sma(x, 3),
+        "c": where(shared > 0.5, shared, 0.0),
+    }
+    assert_equal(str(expressions["b"]), "((-1 * rank(delta(log(x), 2))) + sma(x, 3))")
+    # the builtin abs is not shadowed, and builds the same node
+    assert_equal((str(abs_(x)), str(abs(x)), abs(-2)), ("abs(x)", "abs(x)", 2))
+    values = np.abs(np.random.normal(size=(30, 6)))
+    evaluator = Evaluator({"x": values})
+    results = evaluator.evaluate(expressions)
+    report = evaluator.report
+    # log, delta, rank, correlation, mul, sma, add, gt, where
+    assert_equal(report.evaluated, 9)
+    assert_equal(report.hits, 4)
+    assert_equal(report.shared["rank(delta(log(x), 2))"], 4)
+    expected = operators.rank(operators.delta(np.log(values), 2))
+    _assert_close(results["c"], np.where(expected > 0.5, expected, 0.0))
+
+    prices, volumes = _random_panel(240, 12)
+    prices = prices.abs() + 1
+    alphas = Alphas(prices, prices * 1.01, prices * 0.99, prices, volumes)
+    everything = alphas.compute()
+    assert_true(alphas.report.hits > 0)
+    assert_true(alphas.report.evaluated < alphas.report.nodes)
+    for name in ("alpha001", "alpha012", "alpha030", "alpha046", "alpha060"):
+        pd.testing.assert_frame_equal(everything[name], getattr(alphas, name)())
+
+
+def test_streaming_operators():
+    """
+    Test the streaming operators against the batch ones, row by row.
+    """
+    prices, volumes = _random_panel(240, 12)
+    prices, volumes = prices.values, volumes.values
+    filled = prices.copy()
+    filled[:20, 7] = 100.0    # leading NaN can not be back filled when streaming
+    cases = [
+        (streaming.StreamingSum, operators.ts_sum, (prices,)),
+        (streaming.StreamingMean, operators.sma, (prices,)),
+        (streaming.StreamingVariance, operators.variance, (prices,)),
+        (streaming.StreamingStddev, operators.stddev, (prices,)),
+        (streaming.StreamingCovariance, operators.covariance, (prices, volumes)),
+        (streaming.StreamingCorrelation, operators.correlation, (prices, volumes)),
+        (streaming.StreamingMin, operators.ts_min, (prices,)),
+        (streaming.StreamingMax, operators.ts_max, (prices,)),
+        (streaming.StreamingDelay, operators.delay, (prices,)),
+        (streaming.StreamingDelta, operators.delta, (prices,)),
+        (streaming.StreamingDecayLinear, operators.decay_linear, (filled,)),
+    ]
+    for window in (1, 2, 5, 20):
+        for streaming_class, batch, inputs in cases:
+            if window == 1 and batch in (operators.variance, operators.stddev,
+                                         operators.covariance, operators.correlation):
+                continue
+            expected = batch(*(inputs + (window,)))
+            # window-2 correlations are +/-1 up to (batch) rounding
+            atol = {operators.covariance: 1e-2, operators.correlation: 1e-5}.get(batch, 1e-6)
+            operator = streaming_class(window)
+            for i in range(len(prices)):
+                _assert_close(
+                    operator.update(*[values[i] for values in inputs]), expected[i],
+                    rtol=1e-7, atol=atol, err_msg="%s(%d) row %d" % (batch.__name__, window, i)
+                )
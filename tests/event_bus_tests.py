@@ -0,0 +1,43 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+from nose.tools import assert_equal, assert_raises, assert_true
+
+from algo2.event import SignalEvent
+from algo2.event_bus import DequeEventBus, QueueEventBus, as_event_bus
+from algo2.utilities import queue
+
+
+def _check_event_bus(bus):
+    assert_true(bus.empty())
+    assert_true(bus.poll() is None)
+    assert_raises(queue.Empty, bus.get, False)
+
+    # first-in, first-out
+    for ticker in ["GOOG", "AMZN", "MSFT"]:
+        bus.put(SignalEvent(ticker, "BOT"))
+    assert_equal(len(bus), 3)
+    assert_equal(bus.poll().ticker, "GOOG")
+    assert_equal(bus.get(False).ticker, "AMZN")
+    assert_equal(bus.poll().ticker, "MSFT")
+    assert_true(bus.poll() is None)
+
+
+def test_deque_event_bus():
+    _check_event_bus(DequeEventBus())
+
+
+def test_queue_event_bus():
+    _check_event_bus(QueueEventBus())
+
+
+def test_as_event_bus():
+    bus = DequeEventBus()
+    assert_true(as_event_bus(bus) is bus)
+
+    events_queue = queue.Queue()
+    wrapped = as_event_bus(events_queue)
+    events_queue.put(SignalEvent("GOOG", "SLD"))
+    assert_equal(wrapped.poll().ticker, "GOOG")
@@ -4,9 +4,16 @@ from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
 from nose.tools import assert_equal, assert_raises, assert_true
-# import os
+import os
+import shutil
+import tempfile
 
-from algo2.feeds.csv_files import HistoricCSVTickDataHandler
+import pandas as pd
+
+from algo2.feeds.csv_files import (HistoricCSVBarDataHandler,
+                                   HistoricCSVTickDataHandler)
+from algo2.feeds.cache import CSVCache
+from algo2.feeds.memmap import MemmapTickDataHandler, convert_tick_csvs
 import algo2.utilities as utils
 from algo2.utilities import queue
 
@@ -17,6 +24,137 @@ def test_historic_csv_bar():
     pass
 
 
+def _stream_all_bars(price_handler):
+    """
+    Stream a bar data handler to the end and
+    return the list of events put onto its queue.
+    """
+    events = []
+    while price_handler.continue_backtest:
+        price_handler.stream_next()
+        while not price_handler.events_queue.empty():
+            events.append(price_handler.events_queue.get(False))
+    return events
+
+
+def test_historic_csv_bar_columnar():
+    """
+    Test the columnar Bar DataHandler mode produces exactly
+    the same BarEvent sequence as the DataFrame.iterrows() one.
+    """
+    csv_path = utils.DEFAULT.CSV_DATA_DIR
+    init_tickers = ["SPY", "AGG", "SP500TR"]
+    rows_handler = HistoricCSVBarDataHandler(
+        csv_path, queue.Queue(), init_tickers
+    )
+    cols_handler = HistoricCSVBarDataHandler(
+        csv_path, queue.Queue(), init_tickers, columnar=True
+    )
+    rows_events = _stream_all_bars(rows_handler)
+    cols_events = _stream_all_bars(cols_handler)
+
+    assert_equal(len(rows_events), len(cols_events))
+    fields = (
+        "type", "ticker", "time", "period", "open_price", "high_price",
+        "low_price", "close_price", "volume", "adj_close_price"
+    )
+    for rows_bev, cols_bev in zip(rows_events, cols_events):
+        for field in fields:
+            assert_equal(getattr(rows_bev, field), getattr(cols_bev, field))
+    assert_equal(rows_handler.tickers, cols_handler.tickers)
+
+
+def test_historic_csv_bar_streaming():
+    """
+    Test the streaming (chunked k-way merge) Bar DataHandler mode
+    produces exactly the same BarEvent sequence as the default one,
+    including descending files (AGG) and start/end dates (also as
+    strings).
+    """
+    csv_path = utils.DEFAULT.CSV_DATA_DIR
+    init_tickers = ["SPY", "AGG", "SP500TR"]
+    fields = (
+        "type", "ticker", "time", "period", "open_price", "high_price",
+        "low_price", "close_price", "volume", "adj_close_price"
+    )
+    for start_date, end_date in [
+        (None, None), (pd.Timestamp("2010-01-04"), pd.Timestamp("2012-06-01")),
+        ("2010-01-01", "2013-03-15")
+    ]:
+        rows_handler = HistoricCSVBarDataHandler(
+            csv_path, queue.Queue(), init_tickers,
+            start_date=start_date, end_date=end_date
+        )
+        merge_handler = HistoricCSVBarDataHandler(
+            csv_path, queue.Queue(), init_tickers,
+            start_date=start_date, end_date=end_date, chunksize=100
+        )
+        rows_events = _stream_all_bars(rows_handler)
+        merge_events = _stream_all_bars(merge_handler)
+
+        assert_equal(len(rows_events), len(merge_events))
+        for rows_bev, merge_bev in zip(rows_events, merge_events):
+            for field in fields:
+                assert_equal(getattr(rows_bev, field), getattr(merge_bev, field))
+        assert_equal(rows_handler.tickers, merge_handler.tickers)
+
+    assert_raises(
+        ValueError, HistoricCSVBarDataHandler,
+        csv_path, queue.Queue(), init_tickers, columnar=True, chunksize=100
+    )
+
+
+def test_historic_csv_tick_streaming():
+    """
+    Test the streaming Tick DataHandler mode produces the
+    same TickEvent sequence as the default one.
+    """
+    csv_path = utils.DEFAULT.CSV_DATA_DIR
+    init_tickers = ["GOOG", "AMZN", "MSFT"]
+    events = []
+    for chunksize in (None, 3):
+        price_handler = HistoricCSVTickDataHandler(
+            csv_path, queue.Queue(), init_tickers, chunksize=chunksize
+        )
+        events.append([
+            (tev.ticker, tev.time, tev.bid, tev.ask)
+            for tev in _stream_all_bars(price_handler)
+        ])
+    assert_equal(len(events[0]), 30)
+    assert_equal(events[0], events[1])
+
+
+def test_stream_next_timestamp():
+    """
+    Test streaming a timestamp at a time gives the same events
+    as streaming them one by one, each batch sharing one time.
+    """
+    csv_path = utils.DEFAULT.CSV_DATA_DIR
+    init_tickers = ["SPY", "AGG", "SP500TR"]
+    for kwargs in [{}, {"columnar": True}, {"chunksize": 100}]:
+        bars_handler = HistoricCSVBarDataHandler(
+            csv_path, queue.Queue(), init_tickers, **kwargs
+        )
+        expected = _stream_all_bars(bars_handler)
+        price_handler = HistoricCSVBarDataHandler(
+            csv_path, queue.Queue(), init_tickers, **kwargs
+        )
+        events = []
+        while price_handler.continue_backtest:
+            price_handler.stream_next_timestamp()
+            batch = []
+            while not price_handler.events_queue.empty():
+                batch.append(price_handler.events_queue.get(False))
+            assert_true(len(set(bev.time for bev in batch)) <= 1)
+            assert_true(not events or not batch or batch[0].time > events[-1].time)
+            events.extend(batch)
+        assert_equal(
+            [(bev.ticker, bev.time, bev.adj_close_price) for bev in expected],
+            [(bev.ticker, bev.time, bev.adj_close_price) for bev in events]
+        )
+        assert_equal(price_handler.tickers, bars_handler.tickers)
+
+
 def test_historic_csv_tick():
     """
     Test Tick DataHandler object with 3 tickers:
@@ -96,3 +234,106 @@ def test_historic_csv_tick():
     price_handler.unsubscribe_ticker("GOOG")
     assert_true("GOOG" not in price_handler.tickers)
     assert_true("GOOG" not in price_handler.tickers_data)
+
+
+def test_historic_csv_bar_reuse_events():
+    """
+    Test the Bar DataHandler re-using a single (slotted) BarEvent
+    streams the same values as allocating a new one per bar.
+    """
+    csv_path = utils.DEFAULT.CSV_DATA_DIR
+    init_tickers = ["SPY", "AGG"]
+    fields = (
+        "ticker", "time", "period", "open_price", "high_price",
+        "low_price", "close_price", "volume", "adj_close_price"
+    )
+    for columnar in [False, True]:
+        new_handler = HistoricCSVBarDataHandler(
+            csv_path, queue.Queue(), init_tickers, columnar=columnar
+        )
+        reuse_handler = HistoricCSVBarDataHandler(
+            csv_path, queue.Queue(), init_tickers, columnar=columnar,
+            reuse_events=True
+        )
+        first_event = None
+        for i in range(50):
+            new_handler.stream_next()
+            reuse_handler.stream_next()
+            new_bev = new_handler.events_queue.get(False)
+            reuse_bev = reuse_handler.events_queue.get(False)
+            if first_event is None:
+                first_event = reuse_bev
+            assert_true(reuse_bev is first_event)
+            assert_true(not hasattr(reuse_bev, "__dict__"))
+            for field in fields:
+                assert_equal(getattr(new_bev, field), getattr(reuse_bev, field))
+
+
+def test_csv_cache():
+    """
+    Test the CSVCache returns the same frames as pd.read_csv,
+    both for bars and ticks, and is invalidated by a CSV change.
+    """
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        csv_path = os.path.join(tmp_dir, "csv")
+        os.makedirs(csv_path)
+        for ticker in ["SPY", "GOOG", "MSFT"]:
+            shutil.copy(os.path.join(utils.DEFAULT.CSV_DATA_DIR, "%s.csv" % ticker), csv_path)
+        cache = CSVCache(os.path.join(tmp_dir, "cache"))
+
+        expected = HistoricCSVBarDataHandler(csv_path, queue.Queue(), ["SPY"])
+        for i in range(2):  # miss, then hit
+            cached = HistoricCSVBarDataHandler(csv_path, queue.Queue(), ["SPY"], cache=cache)
+            pd.testing.assert_frame_equal(expected.tickers_data["SPY"], cached.tickers_data["SPY"])
+        assert_equal((cache.misses, cache.hits), (1, 1))
+
+        expected = HistoricCSVTickDataHandler(csv_path, queue.Queue(), ["GOOG", "MSFT"])
+        for i in range(2):
+            cached = HistoricCSVTickDataHandler(csv_path, queue.Queue(), ["GOOG", "MSFT"], cache=cache)
+            for ticker in ["GOOG", "MSFT"]:
+                pd.testing.assert_frame_equal(expected.tickers_data[ticker], cached.tickers_data[ticker])
+        assert_equal((cache.misses, cache.hits), (3, 3))
+
+        # changing the CSV invalidates its cache entry
+        spy_path = os.path.join(csv_path, "SPY.csv")
+        with open(spy_path) as fd:
+            lines = fd.readlines()
+        with open(spy_path, "w") as fd:
+            fd.writelines(lines[:-10])
+        cached = HistoricCSVBarDataHandler(csv_path, queue.Queue(), ["SPY"], cache=cache)
+        assert_equal(cache.misses, 4)
+        assert_equal(len(cached.tickers_data["SPY"]), len(lines) - 11)  # less header
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def test_memmap_tick():
+    """
+    Test the memory mapped tick store: converted from the CSV files,
+    the MemmapTickDataHandler streams the same TickEvents, and has
+    the same subscriptions, as HistoricCSVTickDataHandler.
+    """
+    csv_path = utils.DEFAULT.CSV_DATA_DIR
+    init_tickers = ["GOOG", "AMZN", "MSFT"]
+    store_dir = tempfile.mkdtemp()
+    try:
+        assert_equal(convert_tick_csvs(csv_path, init_tickers, store_dir, chunksize=4), 30)
+        csv_handler = HistoricCSVTickDataHandler(csv_path, queue.Queue(), init_tickers)
+        memmap_handler = MemmapTickDataHandler(store_dir, queue.Queue(), block_size=7)
+        assert_equal(csv_handler.tickers, memmap_handler.tickers)
+        csv_events = _stream_all_bars(csv_handler)
+        memmap_events = _stream_all_bars(memmap_handler)
+        assert_equal(
+            [(tev.ticker, tev.time, tev.bid, tev.ask) for tev in csv_events],
+            [(tev.ticker, tev.time, tev.bid, tev.ask) for tev in memmap_events]
+        )
+        assert_equal(csv_handler.tickers, memmap_handler.tickers)
+
+        # only the subscribed tickers are streamed
+        memmap_handler = MemmapTickDataHandler(store_dir, queue.Queue(), ["AMZN"])
+        memmap_events = _stream_all_bars(memmap_handler)
+        assert_equal(len(memmap_events), 10)
+        assert_true(all(tev.ticker == "AMZN" for tev in memmap_events))
+    finally:
+        shutil.rmtree(store_dir)
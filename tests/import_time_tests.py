@@ -0,0 +1,78 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Import time regression tests: each module is imported in a new
+interpreter with -X importtime (Python 3.7+), after numpy and pandas,
+which every backtest needs anyway.
+"""
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import os
+import subprocess
+import sys
+
+from nose.tools import assert_equal, assert_true
+
+# imported on first use only, see e.g. SimpleStatistics.plot_results
+HEAVY = ("matplotlib", "seaborn", "scipy", "munch", "pandas_datareader")
+
+# import time budget of each module (numpy and pandas excluded), relative
+# to numpy's in the same interpreter, i.e. lenient on a loaded machine
+RELATIVE_BUDGET = 1.0
+
+MODULES = (
+    "algo2.backtest",
+    "algo2.portfolio_handler",
+    "algo2.optimize",
+    "algo2.vectorized_backtest",
+    "algo2.feeds.csv_files",
+    "algo2.feeds.cache",
+    "algo2.statistics.performance",
+    "algo2.statistics.simple",
+    "algo2.statistics.streaming",
+    "algo2.statistics.tearsheet",
+    "algo2.statistics.CLA",
+    "algo2.alphas.world_quant_101",
+    "algo2.pos_sizers.vol_target",
+    "algo2.pos_sizers.cla",
+    "algo2.risk.covariance",
+    "algo2.strategies.moving_average_cross_xstocks",
+    "samples.mac_xstocks_backtest",
+)
+
+
+def import_times(module):
+    """
+    Imports module in a new interpreter, returns the dict of
+    the modules it imported -> cumulative import time (seconds).
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.check_output(
+        [sys.executable, "-X", "importtime", "-c", "import numpy, pandas; import %s" % module],
+        cwd=root, stderr=subprocess.STDOUT
+    ).decode("utf-8")
+    times = {}
+    for line in output.splitlines():
+        fields = line.split("|")
+        if line.startswith("import time:") and fields[1].strip().isdigit():
+            times[fields[2].strip()] = int(fields[1]) / 1e6
+    return times
+
+
+def test_import_times():
+    """
+    Test that importing the algo2 modules does not import the heavy
+    dependencies, and takes less time than importing numpy.
+    """
+    if sys.version_info < (3, 7):
+        return
+    for module in MODULES:
+        times = import_times(module)
+        heavy = sorted(name for name in times if name.split(".")[0] in HEAVY)
+        assert_equal(heavy, [], "%s imports %s" % (module, ", ".join(heavy)))
+        budget = RELATIVE_BUDGET * times["numpy"]
+        assert_true(
+            times[module] < budget,
+            "%s takes %.3fs to import (budget %.3fs, numpy's import time)" % (module, times[module], budget)
+        )
@@ -3,12 +3,24 @@
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
-from nose.tools import assert_equal
+import numpy as np
+from nose.tools import assert_equal, assert_almost_equal, assert_true
 
+from algo2 import utilities
+from algo2.backtest import Backtest
+from algo2.brokers.simulated_broker import IBSimulatedExecutionHandler
+from algo2.event_bus import DequeEventBus
 from algo2.feeds.base_feed import AbstractTickDataHandler
+from algo2.feeds.csv_files import HistoricCSVBarDataHandler
 from algo2.portfolio import Portfolio
-
-# TODO: test Bar, but mainly Futures (besides stock positions)
+from algo2.portfolio_handler import PortfolioHandler
+from algo2.pos_refiners.naive import NaivePositionRefiner
+from algo2.pos_sizers.naive import FixedPositionSizer
+from algo2.positions.futures import Futures, FuturesBook
+from algo2.positions.stock import Stock
+from algo2.statistics.simple import SimpleStatistics
+from algo2.strategies.moving_average_cross_xstocks import MovingAverageCrossStrategy
+from samples.mac_xstocks_backtest import create_backtest
 
 
 # mock class to use in Portfolio __init__
@@ -94,5 +106,180 @@ def test_tick_stock_portfolio():
     assert_equal(portfolio.realised_pnl, -899.50)
 
 
+def test_incremental_tick_stock_portfolio():
+    """
+    Test the incremental Portfolio against the full re-valuation,
+    trade by trade, on the round-trips of test_tick_stock_portfolio.
+    """
+    dh = DataHandlerMock()
+    cash = 500000.00
+    portfolio = Portfolio(dh, cash)
+    incremental = Portfolio(dh, cash, incremental=True)
+    trades = [
+        ("BOT", "AMZN", 100, 566.56, 1.00), ("BOT", "AMZN", 200, 566.395, 1.00),
+        ("BOT", "GOOG", 200, 707.50, 1.00), ("SLD", "AMZN", 100, 565.83, 1.00),
+        ("BOT", "GOOG", 200, 705.545, 1.00), ("SLD", "AMZN", 200, 565.59, 1.00),
+        ("SLD", "GOOG", 100, 704.92, 1.00), ("SLD", "GOOG", 100, 704.90, 0.0),
+        ("SLD", "GOOG", 100, 704.92, 0.50), ("SLD", "GOOG", 100, 704.78, 1.00)
+    ]
+    for trade in trades:
+        portfolio.trade_position(*trade)
+        incremental.trade_position(*trade)
+        incremental.update_portfolio(trade[1])
+        assert_almost_equal(incremental.equity, portfolio.equity, places=6)
+        assert_almost_equal(incremental.unrealised_pnl, portfolio.unrealised_pnl, places=6)
+        assert_equal(incremental.realised_pnl, portfolio.realised_pnl)
+
+    assert_equal(len(incremental.positions), 0)
+    assert_almost_equal(incremental.equity, 499100.50, places=6)
+    incremental.update_portfolio()  # full re-valuation
+    assert_equal(incremental.equity, 499100.50)
+
+
+def test_incremental_bar_portfolio():
+    """
+    Test the incremental Portfolio gives the same equity curve
+    as the full re-valuation in a multi-ticker MAC backtest, and
+    the same equity as a full re-valuation at the end.
+    """
+    tickers = ["SPY", "AGG", "SP500TR"]
+    equity = []
+    for incremental in (False, True):
+        data_handler = HistoricCSVBarDataHandler(
+            utilities.DEFAULT.CSV_DATA_DIR, DequeEventBus(), tickers
+        )
+        backtest = create_backtest(data_handler, 50, 200)
+        portfolio = backtest.portfolio_handler.portfolio
+        portfolio.incremental = incremental
+        backtest.simulate_trading(testing=True)
+        equity.append(backtest.statistics.equity)
+
+    assert_equal(len(equity[0]), len(equity[1]))
+    for full_value, incremental_value in zip(*equity):
+        assert_almost_equal(full_value, incremental_value, places=6)
+    running_equity = portfolio.equity
+    portfolio.update_portfolio()
+    assert_almost_equal(running_equity, portfolio.equity, places=6)
+
+
+class FuturesDataHandlerMock(AbstractTickDataHandler):
+    def __init__(self, prices):
+        self.prices = prices    # ticker -> mid price
+
+    def get_best_bid_ask(self, ticker):
+        return self.prices[ticker], self.prices[ticker]
+
+
+def test_futures_portfolio():
+    """
+    Test a portfolio of stock and futures positions: the futures
+    trades pay commissions only, their variation is paid into cash
+    by the daily settlement, and the equity is the same as if the
+    variation were not settled.
+    """
+    dh = FuturesDataHandlerMock({"AMZN": 565.0, "ES": 4000.0, "NQ": 15000.0})
+    cash = 500000.00
+    portfolio = Portfolio(dh, cash, futures=FuturesBook({"ES": (50.0, 12000.0), "NQ": (20.0, 16000.0)}))
+    portfolio.trade_position("BOT", "AMZN", 100, 565.0, 1.00)
+    portfolio.trade_position("BOT", "ES", 4, 4000.0, 2.50)
+    portfolio.trade_position("SLD", "NQ", 2, 15000.0, 1.25)
+    assert_true(isinstance(portfolio.positions["AMZN"], Stock))
+    assert_true(isinstance(portfolio.positions["ES"], Futures))
+    assert_equal(portfolio.cur_cash, cash - 56500.00 - 4.75)
+    assert_equal(portfolio.margin_requirement(), 4 * 12000.0 + 2 * 16000.0)
+
+    # day 1: ES +10 points, NQ +25 points (the stock's unrealised
+    # pnl is its commission)
+    dh.prices.update(ES=4010.0, NQ=15025.0)
+    portfolio.update_portfolio()
+    pnl = 4 * 10 * 50.0 - 2 * 25 * 20.0
+    assert_almost_equal(portfolio.unrealised_pnl, pnl - 1.00)
+    assert_almost_equal(portfolio.equity, cash + pnl - 4.75)
+    # settled at the marked prices, the data handler is not queried
+    dh.prices["ES"] = None
+    assert_almost_equal(portfolio.settle(), pnl)
+    dh.prices["ES"] = 4010.0
+    assert_almost_equal(portfolio.cur_cash, cash - 56500.00 - 4.75 + pnl)
+    assert_almost_equal(portfolio.unrealised_pnl, -1.00)
+    assert_almost_equal(portfolio.equity, cash + pnl - 4.75)
+    # the marks rebuilt from the book: as re-marking the positions
+    portfolio.incremental = True
+    portfolio.update_portfolio("ES")
+    assert_almost_equal(portfolio.unrealised_pnl, -1.00)
+    assert_almost_equal(portfolio.equity, cash + pnl - 4.75)
+    portfolio.incremental = False
+
+    # day 2: ES closed 5 points lower, NQ halved and 25 points lower
+    portfolio.trade_position("SLD", "ES", 4, 4005.0, 2.50)
+    portfolio.trade_position("BOT", "NQ", 1, 15020.0, 1.25)
+    dh.prices.update(NQ=15000.0)
+    portfolio.update_portfolio()
+    assert_equal(sorted(portfolio.positions), ["AMZN", "NQ"])
+    assert_almost_equal(portfolio.realised_pnl, 4 * 5 * 50.0 - 2.50 - 2.50)
+    day2 = -4 * 5 * 50.0 + 1 * 5 * 20.0 + 1 * 25 * 20.0
+    assert_almost_equal(portfolio.equity, cash + pnl + day2 - 4.75 - 3.75)
+    assert_almost_equal(portfolio.settle(), day2)
+    assert_almost_equal(portfolio.equity, cash + pnl + day2 - 4.75 - 3.75)
+    assert_almost_equal(portfolio.cur_cash, cash - 56500.00 + pnl + day2 - 4.75 - 3.75)
+    assert_equal(portfolio.margin_requirement(), 16000.0)
+
+
+def test_futures_book_settlement():
+    """
+    Test the vectorized settlement of 1000 contracts against
+    their positions' variation.
+    """
+    np.random.seed(1)
+    n = 1000
+    book = FuturesBook(capacity=16)
+    prices = np.random.uniform(50, 5000, n)
+    positions = [
+        Futures("BOT" if i % 2 else "SLD", "C%d" % i, 1 + i % 7, prices[i], 1.0,
+                prices[i], prices[i], book=book, point_value=float(1 + i % 50))
+        for i in range(n)
+    ]
+    assert_equal(len(book), n)
+    prices *= np.random.uniform(0.95, 1.05, n)
+    for position, price in zip(positions, prices):
+        position.update_value(price, price)
+    variation = sum(position.unrealised_pnl for position in positions)
+    assert_almost_equal(book.unrealised_pnl(), variation, places=6)
+    total = sum(position.realised_pnl for position in positions)
+    assert_almost_equal(book.settle(), variation, places=6)
+    assert_almost_equal(book.unrealised_pnl(), 0.0, places=6)
+    assert_almost_equal(sum(position.realised_pnl for position in positions), total, places=6)
+
+
+def test_futures_backtest():
+    """
+    Test a MAC backtest trading futures contracts only: they are
+    settled daily, incl. at the end of the last day, i.e. the cash
+    is the equity.
+    """
+    tickers = ["SPY", "AGG"]
+    events_queue = DequeEventBus()
+    data_handler = HistoricCSVBarDataHandler(utilities.DEFAULT.CSV_DATA_DIR, events_queue, tickers)
+    position_sizer = FixedPositionSizer(10)
+    position_refiner = NaivePositionRefiner()
+    futures = FuturesBook({"SPY": (50.0, 12000.0), "AGG": (1000.0, 5000.0)})
+    portfolio_handler = PortfolioHandler(
+        500000.00, events_queue, data_handler, position_sizer, position_refiner, futures=futures
+    )
+    backtest = Backtest(
+        data_handler, MovingAverageCrossStrategy(tickers, events_queue, 50, 200),
+        portfolio_handler, IBSimulatedExecutionHandler(events_queue, data_handler),
+        position_sizer, position_refiner,
+        SimpleStatistics(utilities.DEFAULT, portfolio_handler), 500000.00
+    )
+    backtest.simulate_trading(testing=True)
+    portfolio = portfolio_handler.portfolio
+    commissions = sum(position.total_commission for position in portfolio.closed_positions) + \
+        sum(position.total_commission for position in portfolio.positions.values())
+    assert_true(len(portfolio.closed_positions) > 0)
+    assert_true(abs(portfolio.cur_cash - (500000.00 - commissions)) > 1.0)
+    assert_almost_equal(futures.unrealised_pnl(), 0.0, places=6)
+    assert_almost_equal(portfolio.equity, portfolio.cur_cash, places=4)
+
+
 # if __name__ == "__main__":
 #     test_tick_stock_portfolio()
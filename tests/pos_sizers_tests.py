@@ -0,0 +1,187 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import datetime
+import os
+
+import numpy as np
+import pandas as pd
+from nose.tools import assert_equal, assert_raises, assert_true
+
+from algo2 import utilities
+from algo2.backtest import Backtest
+from algo2.brokers.simulated_broker import IBSimulatedExecutionHandler
+from algo2.event import BarEvent, SuggestedOrderEvent
+from algo2.event_bus import DequeEventBus
+from algo2.feeds.csv_files import HistoricCSVBarDataHandler
+from algo2.portfolio_handler import PortfolioHandler
+from algo2.pos_refiners.naive import NaivePositionRefiner
+from algo2.pos_sizers.cla import CLAPositionSizer
+from algo2.pos_sizers.vol_target import VolTargetStockPositionSizer
+from algo2.positions.stock import Stock
+from algo2.risk.covariance import EWCovariance
+from algo2.statistics.CLA import CLA
+from algo2.statistics.simple import SimpleStatistics
+from algo2.strategies.monthly_liquidate_rebalance_strategy import MonthlyLiquidateRebalanceStrategy
+
+
+def _run_rebalance_backtest(position_sizer, tickers, start_date, end_date):
+    """
+    Backtest of a monthly liquidate and rebalance strategy, sized
+    by position_sizer.
+    """
+    config = utilities.DEFAULT
+    events_queue = DequeEventBus()
+    data_handler = HistoricCSVBarDataHandler(
+        config.CSV_DATA_DIR, events_queue, tickers,
+        start_date=start_date, end_date=end_date
+    )
+    strategy = MonthlyLiquidateRebalanceStrategy(tickers, events_queue)
+    position_refiner = NaivePositionRefiner()
+    portfolio_handler = PortfolioHandler(
+        500000.00, events_queue, data_handler, position_sizer, position_refiner
+    )
+    broker = IBSimulatedExecutionHandler(events_queue, data_handler)
+    statistics = SimpleStatistics(config, portfolio_handler)
+    backtest = Backtest(
+        data_handler, strategy, portfolio_handler, broker,
+        position_sizer, position_refiner, statistics, 500000.00
+    )
+    return backtest.simulate_trading(testing=True)
+
+
+def test_cla_position_sizer():
+    """
+    Test the CLA position sizer in a monthly rebalance backtest: its
+    rolling returns are those of the adjusted close prices, and its
+    last (warm started) weights those of a CLA solved on them at the
+    last rebalance.
+    """
+    tickers = ["SPY", "AGG", "AAPL"]
+    start_date, end_date = datetime.datetime(2012, 1, 1), datetime.datetime(2013, 12, 31)
+    config = utilities.DEFAULT
+    prices = pd.concat([
+        pd.read_csv(os.path.join(config.CSV_DATA_DIR, "%s.csv" % ticker), index_col=0,
+                    parse_dates=True, dayfirst=True)["Adj Close"].rename(ticker)
+        for ticker in tickers
+    ], axis=1).sort_index()
+    # bars up to the end date (excluded), the returns of the last
+    # timestamp are added at the next one
+    prices = prices[(prices.index >= start_date) & (prices.index < end_date)]
+    returns = prices.pct_change().iloc[1:-1]
+
+    assert_raises(ValueError, CLAPositionSizer, tickers, target="max_return")
+    for target in CLAPositionSizer.TARGETS:
+        position_sizer = CLAPositionSizer(tickers, window=126, target=target, u_b=0.6)
+        results = _run_rebalance_backtest(position_sizer, tickers, start_date, end_date)
+        assert_true(results["equity"].iloc[-1] != 500000.00)
+        np.testing.assert_allclose(position_sizer.covariance.values(), returns.values[-126:], rtol=1e-9)
+
+        # estimates at the last rebalance: a window of the returns
+        means = returns.rolling(126).mean().values
+        last = np.flatnonzero(np.abs(means - position_sizer.cla.mean.ravel()).max(axis=1) < 1e-12)
+        assert_equal(len(last), 1)
+        in_window = returns.values[last[0] - 125:last[0] + 1]
+        np.testing.assert_allclose(position_sizer.cla.covar, np.cov(in_window.T), rtol=1e-7)
+        cla = CLA(
+            in_window.mean(axis=0).reshape(-1, 1), np.cov(in_window.T),
+            position_sizer.l_b, position_sizer.u_b
+        )
+        cla.solve()
+        weights = cla.get_max_sharpe()[1] if target == "max_sharpe" else cla.get_min_var()[1]
+        assert_equal(sorted(position_sizer.ticker_weights), sorted(tickers))
+        np.testing.assert_allclose(
+            [position_sizer.ticker_weights[ticker] for ticker in tickers], weights.ravel(), atol=1e-9
+        )
+
+    # exponentially weighted estimates, shrunk
+    position_sizer = CLAPositionSizer(
+        tickers, window=126, u_b=0.6, covariance=EWCovariance(3, halflife=63, shrinkage=True)
+    )
+    _run_rebalance_backtest(position_sizer, tickers, start_date, end_date)
+    weights = np.array([position_sizer.ticker_weights[ticker] for ticker in tickers])
+    assert_true(0 < position_sizer.covariance.shrinkage_intensity() < 1)
+    assert_true(np.allclose(weights.sum(), 1.0) and (weights >= 0).all() and (weights <= 0.6 + 1e-12).all())
+
+
+class _Portfolio(object):
+    def __init__(self, equity, positions):
+        self.equity = equity
+        self.positions = positions
+
+
+def test_vol_target_position_sizer():
+    """
+    Test the volatility target position sizer: its EWMA and rolling
+    volatilities are pandas' ones of the returns, and the orders are
+    sized to the target volatility position.
+    """
+    assert_raises(ValueError, VolTargetStockPositionSizer, method="garch")
+    np.random.seed(7)
+    prices = pd.Series(100 * np.cumprod(1 + np.random.normal(0.0005, 0.015, 300)))
+    returns = prices.pct_change().iloc[1:]
+    ewma = np.sqrt((returns ** 2).ewm(halflife=10).mean().values[-1] * 252)
+    rolling = returns.rolling(30).std().values[-1] * np.sqrt(252)
+
+    sizers = {
+        method: VolTargetStockPositionSizer(
+            target_vol=0.15, n_positions=2, method=method, halflife=10, window=30, min_periods=30
+        )
+        for method in VolTargetStockPositionSizer.METHODS
+    }
+    for i, price in enumerate(prices):
+        event = BarEvent("XYZ", i, 86400, price, price, price, price, 1000, price)
+        for sizer in sizers.values():
+            sizer.on_market_event(event)
+            if i == 29:
+                assert_true(np.isnan(sizer.volatility("XYZ")))
+                assert_equal(sizer.target_quantity(_Portfolio(1e6, {}), "XYZ"), 0)
+    np.testing.assert_allclose(sizers["ewma"].volatility("XYZ"), ewma, rtol=1e-10)
+    np.testing.assert_allclose(sizers["rolling"].volatility("XYZ"), rolling, rtol=1e-10)
+    np.testing.assert_allclose(sizers["max"].volatility("XYZ"), max(ewma, rolling), rtol=1e-10)
+    assert_true(np.isnan(sizers["ewma"].volatility("ABC")))
+
+    sizer = sizers["ewma"]
+    target = int(np.floor(0.15 / 2 / ewma * 1e6 / prices.values[-1]))
+    portfolio = _Portfolio(1e6, {})
+    order = sizer.size_order(portfolio, SuggestedOrderEvent("XYZ", "BOT"))
+    assert_equal((order.action, order.quantity), ("BOT", target))
+    price = prices.values[-1]
+    # topped up to the target, none beyond it
+    portfolio.positions["XYZ"] = Stock("BOT", "XYZ", target - 10, price, 1.0, price, price)
+    assert_equal(sizer.size_order(portfolio, SuggestedOrderEvent("XYZ", "BOT")).quantity, 10)
+    portfolio.positions["XYZ"] = Stock("BOT", "XYZ", target + 10, price, 1.0, price, price)
+    assert_equal(sizer.size_order(portfolio, SuggestedOrderEvent("XYZ", "BOT")).quantity, 0)
+    # a sell closes a long position, a buy a short one, an exit any
+    order = sizer.size_order(portfolio, SuggestedOrderEvent("XYZ", "SLD"))
+    assert_equal((order.action, order.quantity), ("SLD", target + 10))
+    order = sizer.size_order(portfolio, SuggestedOrderEvent("XYZ", "EXIT"))
+    assert_equal((order.action, order.quantity), ("SLD", target + 10))
+    portfolio.positions["XYZ"] = Stock("SLD", "XYZ", 5, price, 1.0, price, price)
+    order = sizer.size_order(portfolio, SuggestedOrderEvent("XYZ", "EXIT"))
+    assert_equal((order.action, order.quantity), ("BOT", 5))
+    order = sizer.size_order(portfolio, SuggestedOrderEvent("XYZ", "BOT"))
+    assert_equal((order.action, order.quantity), ("BOT", 5))
+    order = sizer.size_order(portfolio, SuggestedOrderEvent("XYZ", "SLD"))
+    assert_equal((order.action, order.quantity), ("SLD", target - 5))
+    # a flat position
+    portfolio.positions["XYZ"].trade("BOT", 5, price, 1.0)
+    order = sizer.size_order(portfolio, SuggestedOrderEvent("XYZ", "SLD"))
+    assert_equal((order.action, order.quantity), ("SLD", target))
+    # capped
+    sizer = VolTargetStockPositionSizer(target_vol=10.0, halflife=10, max_weight=0.5)
+    for i, price in enumerate(prices):
+        sizer.on_market_event(BarEvent("XYZ", i, 86400, price, price, price, price, 1000, price))
+    assert_equal(sizer.target_quantity(portfolio, "XYZ"), int(np.floor(0.5e6 / prices.values[-1])))
+
+    # in a monthly rebalance backtest
+    tickers = ["SPY", "AGG", "AAPL"]
+    position_sizer = VolTargetStockPositionSizer(target_vol=0.10, n_positions=3)
+    results = _run_rebalance_backtest(
+        position_sizer, tickers, datetime.datetime(2012, 1, 1), datetime.datetime(2013, 12, 31)
+    )
+    assert_true(results["equity"].iloc[-1] != 500000.00)
+    for ticker in tickers:
+        assert_true(0 < position_sizer.volatility(ticker) < 1)
@@ -3,16 +3,62 @@
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
-from nose.tools import assert_equal
+from nose.tools import assert_almost_equal, assert_equal, assert_raises
+from algo2.positions.futures import Futures, FuturesBook
 from algo2.positions.stock import Stock
 
-# TODO: futures test below
 
 def test_calculate_futures_round_trip():
     """
-    Test a round-trip trade in one futures contract.
+    Test a round-trip trade in one futures contract (E-mini S&P,
+    50 USD per point), incl. a settlement and a reversal.
     """
-    pass
+    book = FuturesBook({"ES": (50.0, 12000.0)})
+    ES_position = Futures("BOT", "ES", 2, 4000.00, 2.50, 4000.25, 4000.75, book=book)
+    assert_equal(ES_position.quantity, 2)
+    assert_equal(ES_position.market_value, 400050.00)
+    assert_equal(ES_position.cost, 400000.00)
+    assert_equal(ES_position.unrealised_pnl, 50.00)
+    assert_equal(ES_position.realised_pnl, 47.50)
+    assert_equal(ES_position.margin, 24000.00)
+    assert_equal(book.margin_requirement(), 24000.00)
+
+    # daily settlement: the variation is settled, none unrealised
+    assert_equal(book.settle(), 50.00)
+    assert_equal(ES_position.unrealised_pnl, 0.00)
+    assert_equal(ES_position.realised_pnl, 47.50)
+
+    ES_position.trade("BOT", 1, 4010.00, 1.25)
+    ES_position.update_value(4020.00, 4020.00)
+    assert_equal(ES_position.market_value, 603000.00)
+    assert_equal(ES_position.unrealised_pnl, 2450.00)
+
+    # reversal: 3 long sold, 2 short
+    ES_position.trade("SLD", 5, 4015.00, 2.50)
+    ES_position.update_value(4012.00, 4012.00)
+    assert_equal(ES_position.quantity, -2)
+    assert_equal(ES_position.market_value, -401200.00)
+    assert_equal(ES_position.unrealised_pnl, 2000.00)
+    assert_equal(ES_position.realised_pnl, 2043.75)
+    assert_equal(ES_position.margin, 24000.00)
+
+    ES_position.trade("BOT", 2, 4011.00, 2.50)
+    assert_equal(ES_position.quantity, 0)
+    assert_equal((ES_position.buys, ES_position.sells), (5, 5))
+    assert_equal(ES_position.total_commission, 8.75)
+    assert_equal(ES_position.market_value, 0.00)
+    assert_equal(ES_position.unrealised_pnl, 2100.00)
+    assert_equal(ES_position.realised_pnl, 2141.25)
+    assert_raises(ValueError, ES_position.trade, "BOT", 1, 4011.00, 1.25)
+
+    # its row released, the variation paid at the next settlement
+    assert_equal(len(book), 0)
+    assert_equal(book.margin_requirement(), 0.00)
+    assert_equal(book.settle(), 2100.00)
+    assert_equal(book.settle(), 0.00)
+    NQ_position = Futures("SLD", "NQ", 1, 15000.00, 1.25, 15000.00, 15000.00, book=book, point_value=20.0)
+    assert_equal((NQ_position.row, NQ_position.quantity, NQ_position.point_value), (0, -1, 20.0))
+    assert_almost_equal(Futures("BOT", "CL", 1, 80.0, 0.0, 80.5, 80.5, point_value=1000.0).unrealised_pnl, 500.0)
 
 
 
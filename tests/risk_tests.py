@@ -0,0 +1,98 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import numpy as np
+import pandas as pd
+from nose.tools import assert_equal, assert_raises, assert_true
+
+from algo2.risk.covariance import EWCovariance, WindowCovariance
+
+
+def _ledoit_wolf(values, weights):
+    """
+    Weighted Ledoit-Wolf shrinkage intensity, computed directly.
+    """
+    w1, w2 = weights.sum(), (weights ** 2).sum()
+    deviations = values - np.dot(weights, values) / w1
+    s = np.dot(deviations.T * weights, deviations) / w1
+    mu = np.trace(s) / len(s)
+    b2 = sum(
+        w ** 2 * ((np.outer(y, y) - s) ** 2).sum() for w, y in zip(weights, deviations)
+    ) / w1 ** 2
+    d2 = ((s - mu * np.eye(len(s))) ** 2).sum()
+    assert_true(w2 > 0)
+    return min(b2, d2) / d2
+
+
+def _shrunk(cov, intensity):
+    return (1 - intensity) * cov + intensity * np.trace(cov) / len(cov) * np.eye(len(cov))
+
+
+def test_window_covariance():
+    """
+    Test the rolling mean and covariance matrix (and shrinkage) against
+    numpy ones, vector by vector, incl. while the window fills up and
+    over many wrap-arounds of the ring buffer.
+    """
+    np.random.seed(8)
+    values = np.random.normal(0.001, 0.02, (600, 4))
+    values[:, 1] += values[:, 0]    # correlated
+    for window in (1, 2, 30, 250):
+        covariance = WindowCovariance(4, window)
+        shrunk = WindowCovariance(4, window, shrinkage=True)
+        for i, vector in enumerate(values):
+            covariance.update(vector)
+            shrunk.update(vector)
+            assert_equal(len(covariance), min(i + 1, window))
+            assert_equal(covariance.is_full(), i + 1 >= window)
+            in_window = values[max(0, i + 1 - window):i + 1]
+            np.testing.assert_allclose(covariance.values(), in_window)
+            np.testing.assert_allclose(covariance.mean(), in_window.mean(axis=0), rtol=1e-9, atol=1e-15)
+            if len(in_window) > 1:
+                cov = np.cov(in_window.T)
+                np.testing.assert_allclose(covariance.cov(), cov, rtol=1e-7, atol=1e-15)
+                if i % 17 == 0:
+                    intensity = _ledoit_wolf(in_window, np.ones(len(in_window)))
+                    np.testing.assert_allclose(shrunk.shrinkage_intensity(), intensity, atol=1e-8)
+                    np.testing.assert_allclose(shrunk.cov(), _shrunk(cov, intensity), rtol=1e-7, atol=1e-15)
+            else:
+                assert_true(np.isnan(covariance.cov()).all())
+        assert_equal(covariance.shrinkage_intensity(), 0.0)
+    assert_raises(ValueError, WindowCovariance, 4, 0)
+
+
+def test_ew_covariance():
+    """
+    Test the exponentially weighted mean and covariance matrix against
+    pandas' ewm ones, their shrinkage, and the read-only views.
+    """
+    np.random.seed(9)
+    values = np.random.normal(0.001, 0.02, (300, 3))
+    values[:, 2] -= 0.5 * values[:, 0]
+    frame = pd.DataFrame(values)
+    covariance = EWCovariance(3, halflife=20)
+    shrunk = EWCovariance(3, alpha=1 - 0.5 ** (1 / 20.0), shrinkage=True)
+    for vector in values:
+        covariance.update(vector)
+        shrunk.update(vector)
+    assert_equal(len(covariance), len(values))
+    np.testing.assert_allclose(covariance.mean(), frame.ewm(halflife=20).mean().iloc[-1], rtol=1e-9)
+    cov = frame.ewm(halflife=20).cov().loc[len(values) - 1].values
+    np.testing.assert_allclose(covariance.cov(), cov, rtol=1e-9)
+    weights = 0.5 ** (np.arange(len(values))[::-1] / 20.0)
+    intensity = _ledoit_wolf(values, weights)
+    np.testing.assert_allclose(shrunk.shrinkage_intensity(), intensity, rtol=1e-6)
+    np.testing.assert_allclose(shrunk.cov(), _shrunk(cov, intensity), rtol=1e-7)
+
+    # views of the estimates, updated in place
+    view = covariance.cov()
+    assert_raises(ValueError, view.__setitem__, (0, 0), 1.0)
+    covariance.update(values[0])
+    assert_true(covariance.cov() is view)
+    assert_true(not np.allclose(view, cov))
+
+    assert_raises(ValueError, EWCovariance, 3)
+    assert_raises(ValueError, EWCovariance, 3, halflife=10, alpha=0.1)
+    assert_raises(ValueError, EWCovariance, 3, alpha=1.5)
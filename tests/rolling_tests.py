@@ -0,0 +1,49 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import numpy as np
+import pandas as pd
+from nose.tools import assert_equal, assert_raises, assert_true
+
+from algo2.rolling import RollingWindow
+
+
+def test_rolling_window():
+    """
+    Test the O(1) rolling statistics against pandas rolling ones,
+    value by value, incl. while the window fills up and over
+    many wrap-arounds of the ring buffer.
+    """
+    np.random.seed(7)
+    values = 100 + np.cumsum(np.random.normal(0, 1, 2000))
+    values[500:520] = 3.0   # constant run: zero variance
+    for window in (1, 2, 20, 200):
+        rolling = pd.Series(values).rolling(window, min_periods=1)
+        expected = {
+            "sum": rolling.sum().values, "mean": rolling.mean().values,
+            "var": rolling.var().values, "min": rolling.min().values,
+            "max": rolling.max().values
+        }
+        rw = RollingWindow(window)
+        for i, value in enumerate(values):
+            rw.append(value)
+            assert_equal(len(rw), min(i + 1, window))
+            assert_equal(rw.is_full(), i + 1 >= window)
+            np.testing.assert_allclose(rw.values(), values[max(0, i + 1 - window):i + 1])
+            for name in ("sum", "mean", "min", "max"):
+                np.testing.assert_allclose(getattr(rw, name)(), expected[name][i], rtol=1e-10)
+            if min(i + 1, window) > 1:
+                np.testing.assert_allclose(rw.var(), expected["var"][i], rtol=1e-6, atol=1e-9)
+            else:
+                assert_true(np.isnan(rw.var()))
+        np.testing.assert_allclose(rw.std(ddof=0), values[-window:].std(), rtol=1e-6, atol=1e-9)
+
+    rw = RollingWindow(3, extremes=False)
+    assert_true(np.isnan(rw.mean()))
+    for value in values[:10]:
+        rw.append(value)
+    np.testing.assert_allclose(rw.mean(), values[7:10].mean())
+    assert_raises(ValueError, rw.max)
+    assert_raises(ValueError, RollingWindow, 0)
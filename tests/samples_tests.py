@@ -10,13 +10,14 @@ from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 import sys
 import os
-from nose.tools import assert_almost_equal  # , assert_equal
+from nose.tools import assert_almost_equal, assert_equal
 
 from algo2 import utilities
 from algo2.statistics.base_statistics import load
 
 import samples.buy_and_hold_backtest
 import samples.mac_xstocks_backtest
+import samples.mac_parameter_sweep
 import samples.cla_sample
 
 # Explicit access to module level variables:
@@ -77,6 +78,23 @@ def test_mac_backtest():
     assert_almost_equal(float(results['max_drawdown_pct']), 4.4979, places=2)
 
 
+###################################
+def test_mac_parameter_sweep():
+    """
+    Test the MAC parameter sweep (2 worker processes)
+    """
+    tickers = ["SP500TR"]
+    grid = {"short_window": [50, 100], "long_window": [300, 400]}
+    results = samples.mac_parameter_sweep.run(this.config, this.testing, tickers, grid, max_workers=2)
+
+    assert_equal(len(results), 4)
+    assert_equal(list(results.columns[:2]), ["short_window", "long_window"])
+    row = results[(results.short_window == 100) & (results.long_window == 400)].iloc[0]
+    # same as test_mac_backtest
+    assert_almost_equal(float(row['sharpe']), 0.6388, places=2)
+    assert_almost_equal(float(row['max_drawdown_pct']), 4.4979, places=2)
+
+
 ###################################
 def cla_sample():
     """
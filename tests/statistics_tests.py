@@ -3,14 +3,25 @@
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
-from nose.tools import assert_equal, assert_almost_equal
+from itertools import groupby
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+from nose.tools import assert_equal, assert_almost_equal, assert_true
 
 # from decimal import Decimal
 from tests.portfolio_tests import DataHandlerMock
 
 import algo2.utilities as utilities
 from algo2.portfolio import Portfolio
+import algo2.statistics.performance as perf
 from algo2.statistics.simple import SimpleStatistics
+from algo2.statistics.streaming import StreamingStatistics
+from algo2.statistics import tearsheet
+from algo2.statistics import CLA
 
 
 class PortfolioHandlerMock(object):
@@ -157,3 +168,372 @@ def test_calculating_statistics():
     assert_almost_equal(results["max_drawdown_pct"], 0.192)  # (top - bottom) / top
     assert_almost_equal(float(results["sharpe"]), 1.7513)
     print("done")
+
+
+class EquityMock(object):
+    def __init__(self, equity):
+        self.equity = equity
+
+
+def test_streaming_statistics():
+    """
+    Test StreamingStatistics against SimpleStatistics on a random
+    equity curve, with and without storing it.
+    """
+    config = utilities.DEFAULT
+    np.random.seed(3)
+    curve = 1e6 * np.exp(np.cumsum(np.random.normal(0, 0.01, 500)))
+    timestamps = pd.date_range("2010-01-01", periods=len(curve))
+    portfolio_handler = PortfolioHandlerMock(EquityMock(1e6))
+    simple = SimpleStatistics(config, portfolio_handler)
+    stored = StreamingStatistics(config, portfolio_handler, capacity=16)
+    streamed = StreamingStatistics(config, portfolio_handler, store_equity=False)
+    for timestamp, equity in zip(timestamps, curve):
+        portfolio_handler.portfolio.equity = equity
+        for statistics in (simple, stored, streamed):
+            statistics.update(timestamp, portfolio_handler)
+            statistics.update(timestamp, portfolio_handler)     # ignored
+
+    expected = simple.get_results()
+    for statistics in (stored, streamed):
+        results = statistics.get_results()
+        for key in ("sharpe", "max_drawdown", "max_drawdown_pct", "CAGR"):
+            assert_almost_equal(results[key], expected[key], places=8)
+    duration = max(
+        len(list(run)) for in_drawdown, run in groupby(np.array(simple.drawdowns) > 0) if in_drawdown
+    )
+    assert_equal(results["max_drawdown_duration"], duration)
+    assert_true(results["equity"] is None)
+
+    results = stored.get_results()
+    for key in ("equity", "equity_returns", "drawdowns"):
+        pd.testing.assert_series_equal(results[key], expected[key], check_index_type=False)
+    # the same frames, bar the index' freq
+    stored_df, simple_df = stored._get_equity_df(), simple._get_equity_df()
+    assert_equal(list(stored_df.columns), list(simple_df.columns))
+    np.testing.assert_array_equal(stored_df.values, simple_df.values)
+    np.testing.assert_array_equal(pd.DatetimeIndex(stored_df.index), pd.DatetimeIndex(simple_df.index))
+
+
+def _create_drawdowns_loop(returns):
+    """
+    performance.create_drawdowns as it was (.ix as .iloc).
+    """
+    idx = returns.index
+    hwm = np.zeros(len(idx))
+    for t in range(1, len(idx)):
+        hwm[t] = max(hwm[t - 1], returns.iloc[t])
+    drawdown = pd.Series((hwm - returns.values) / hwm, index=idx)
+    drawdown.iloc[0] = 0.0
+    duration = max(sum(1 for i in g if i == 1) for k, g in groupby(np.where(drawdown == 0, 0, 1)))
+    return drawdown, np.max(drawdown), duration
+
+
+def _get_drawdowns_loop(returns):
+    """
+    performance.get_drawdowns_slow as it was.
+    """
+    hwm = np.zeros(len(returns))
+    drawdown = np.zeros(len(returns))
+    duration = np.zeros(len(returns))
+    for t in range(1, len(returns)):
+        hwm[t] = max(hwm[t - 1], returns.iloc[t])
+        drawdown[t] = (returns.iloc[t] - hwm[t])
+        duration[t] = (0 if drawdown[t] == 0 else duration[t - 1] + 1)
+    return drawdown, drawdown.min(), duration.max()
+
+
+def test_drawdowns():
+    """
+    Test the vectorized drawdowns against the loops they replaced,
+    on the SP500TR prices and PnL and on a random walk with NaN.
+    """
+    prices = pd.read_csv(
+        os.path.join(utilities.DEFAULT.CSV_DATA_DIR, "SP500TR.csv"), index_col=0, parse_dates=True
+    )["Close"]
+    np.random.seed(5)
+    walk = pd.Series(np.cumsum(np.random.normal(0, 1, 2000)))
+    walk.iloc[[10, 500, 501]] = np.nan
+    for curve in (prices, prices - prices.iloc[0], walk):
+        drawdown, max_drawdown, duration = perf.create_drawdowns(curve)
+        expected = _create_drawdowns_loop(curve)
+        pd.testing.assert_series_equal(drawdown, expected[0], check_names=False)
+        assert_almost_equal(max_drawdown, expected[1])
+        assert_equal(duration, expected[2])
+
+        drawdown, max_drawdown, duration = perf.get_drawdowns_slow(curve)
+        expected = _get_drawdowns_loop(curve)
+        np.testing.assert_allclose(drawdown, expected[0])
+        np.testing.assert_allclose([max_drawdown, duration], expected[1:])
+
+
+def test_drawdown_episodes():
+    """
+    Test the table of drawdown episodes.
+    """
+    index = pd.date_range("2016-01-01", periods=10)
+    equity = pd.Series([100, 110, 99, 88, 110, 120, 120, 108, 114, 119], index=index)
+    episodes = perf.get_drawdown_episodes(equity)
+    assert_equal(list(episodes.columns), ["start", "trough", "recovery", "depth", "length"])
+    assert_equal(list(episodes["start"]), [index[1], index[6]])
+    assert_equal(list(episodes["trough"]), [index[3], index[7]])
+    assert_equal(episodes["recovery"].iloc[0], index[4])
+    assert_true(pd.isnull(episodes["recovery"].iloc[1]))
+    np.testing.assert_allclose(episodes["depth"], [0.2, 0.1])
+    assert_equal(list(episodes["length"]), [3, 3])
+
+    _, _, _, episodes = perf.get_drawdowns_slow(equity - 100, episodes=True)
+    np.testing.assert_allclose(episodes["depth"], [22, 12])
+
+    # the largest drawdown, 110 -> 88
+    assert_equal(perf.get_max_drawdown_pct(equity), 20.0)
+    assert_true(np.isnan(perf.get_max_drawdown_pct([100, 110, 120])))
+
+
+def _aggregate_returns_groupby(returns, convert_to):
+    """
+    performance.aggregate_returns as it was.
+    """
+    def cumulate_returns(x):
+        return np.exp(np.log(1 + x).cumsum()).iloc[-1] - 1
+
+    keys = {
+        "weekly": [lambda x: x.year, lambda x: x.month, lambda x: x.isocalendar()[1]],
+        "monthly": [lambda x: x.year, lambda x: x.month],
+        "yearly": [lambda x: x.year],
+    }[convert_to]
+    return returns.groupby(keys).apply(cumulate_returns)
+
+
+def _sp500tr_returns(skip_first=True):
+    prices = pd.read_csv(
+        os.path.join(utilities.DEFAULT.CSV_DATA_DIR, "SP500TR.csv"), index_col=0, parse_dates=True
+    )["Close"]
+    returns = prices.pct_change()
+    return returns.iloc[1:] if skip_first else returns
+
+
+def test_aggregate_returns():
+    """
+    Test the vectorized aggregate_returns against the groupby it replaced.
+    """
+    returns = _sp500tr_returns()
+    for convert_to in ("weekly", "monthly", "yearly"):
+        actual = perf.aggregate_returns(returns, convert_to)
+        expected = _aggregate_returns_groupby(returns, convert_to)
+        np.testing.assert_allclose(actual.values, expected.values, rtol=1e-9, atol=1e-12)
+        assert_equal(list(actual.index), list(expected.index))
+
+    # NaN are skipped: the leading one of pct_change, mid-period ones
+    # (not the last of their period, where the groupby gave NaN) and
+    # a month of NaN only, which is NaN
+    returns = _sp500tr_returns(skip_first=False)
+    returns.iloc[[40, 300, 1000]] = np.nan     # 2010-03-03, 2011-03-14, 2013-12-23
+    returns[(returns.index.year == 2012) & (returns.index.month == 5)] = np.nan
+    for convert_to in ("weekly", "monthly", "yearly"):
+        actual = perf.aggregate_returns(returns, convert_to)
+        expected = _aggregate_returns_groupby(returns, convert_to)
+        np.testing.assert_allclose(actual.values, expected.values, rtol=1e-9, atol=1e-12)
+    monthly = perf.aggregate_returns(returns, "monthly")
+    assert_true(np.isnan(monthly[(2012, 5)]))
+    assert_equal(monthly.isnull().sum(), 1)
+    try:
+        perf.aggregate_returns(returns, "daily")
+        assert_true(False)
+    except ValueError:
+        pass
+
+
+def test_rolling_performance():
+    """
+    Test the rolling and expanding metrics against pandas and
+    the point functions applied to each window.
+    """
+    returns = _sp500tr_returns()
+    np.random.seed(3)
+    benchmark = 0.5 * returns + pd.Series(np.random.normal(0, 0.01, len(returns)), returns.index)
+    window = 60
+
+    rolling = returns.rolling(window)
+    np.testing.assert_allclose(
+        perf.rolling_volatility(returns, window), rolling.std() * np.sqrt(252), rtol=1e-8
+    )
+    np.testing.assert_allclose(
+        perf.rolling_sharpe_ratio(returns, window),
+        np.sqrt(252) * rolling.mean() / rolling.std(ddof=0), rtol=1e-8
+    )
+    np.testing.assert_allclose(
+        perf.rolling_beta(returns, benchmark, window),
+        rolling.cov(benchmark) / benchmark.rolling(window).var(), rtol=1e-8
+    )
+    sortino = perf.rolling_sortino_ratio(returns, window)
+    assert_true(sortino.index.equals(returns.index))
+    assert_true(sortino.iloc[:window - 1].isnull().all())
+    for end in (window, 100, 777, len(returns)):
+        np.testing.assert_allclose(
+            sortino.iloc[end - 1], perf.create_sortino_ratio(returns.iloc[end - window:end]),
+            rtol=1e-8
+        )
+
+    # expanding, with NaN ignored
+    gappy = returns.copy()
+    gappy.iloc[[5, 50, 51]] = np.nan
+    sharpe = perf.rolling_sharpe_ratio(gappy, None)
+    sortino = perf.rolling_sortino_ratio(gappy, None)
+    for end in (2, 52, 300, len(returns)):
+        values = gappy.iloc[:end].dropna()
+        np.testing.assert_allclose(
+            [sharpe.iloc[end - 1], sortino.iloc[end - 1]],
+            [perf.create_sharpe_ratio(values), perf.create_sortino_ratio(values)], rtol=1e-8
+        )
+    assert_true(np.isnan(sharpe.iloc[0]))
+    np.testing.assert_allclose(
+        perf.rolling_volatility(gappy.values, None, min_periods=10),
+        gappy.expanding(10).std() * np.sqrt(252), rtol=1e-8
+    )
+
+
+def test_tearsheet():
+    """
+    Test the tearsheet data, and rendering tearsheets to files,
+    directly and from saved statistics on a process pool.
+    """
+    config = utilities.DEFAULT
+    np.random.seed(4)
+    curve = 1e6 * np.exp(np.cumsum(np.random.normal(0, 0.01, 400)))
+    timestamps = pd.date_range("2010-01-01", periods=len(curve))
+    portfolio_handler = PortfolioHandlerMock(EquityMock(1e6))
+    statistics = tearsheet.TearsheetStatistics(config, portfolio_handler, title="Random walk")
+    for timestamp, equity in zip(timestamps, curve):
+        portfolio_handler.portfolio.equity = equity
+        statistics.update(timestamp, portfolio_handler)
+
+    data = tearsheet.tearsheet_data(statistics.get_results())
+    monthly = data["monthly_returns"]
+    assert_equal(list(monthly.index), [2010, 2011])
+    assert_equal(list(monthly.columns), tearsheet.MONTHS)
+    equity = data["equity"]
+    assert_almost_equal(monthly.loc[2010, "Mar"], (equity["2010-03-31"] / equity["2010-02-28"] - 1) * 100)
+    assert_true(np.isnan(monthly.loc[2011, "Dec"]))
+    assert_true((data["drawdowns"] <= 0).all())
+    assert_equal(data["rolling_sharpe"].notnull().sum(), len(curve) - 126 + 1)
+
+    directory = tempfile.mkdtemp()
+    try:
+        filename = statistics.plot_results(os.path.join(directory, "tearsheet.png"))
+        filenames = []
+        for i in range(3):
+            filenames.append(os.path.join(directory, "statistics_%d.pkl" % i))
+            statistics.save(filenames[-1], csv=False)
+        rendered = tearsheet.render_tearsheets(filenames, extension=".pdf", max_workers=2)
+        assert_equal(rendered, [name[:-4] + ".pdf" for name in filenames])
+        for name, magic in [(filename, b"\x89PNG")] + [(name, b"%PDF") for name in rendered]:
+            with open(name, "rb") as fd:
+                assert_equal(fd.read(4), magic)
+    finally:
+        shutil.rmtree(directory)
+
+
+def _random_cla_problem(n_assets, upper, seed):
+    state = np.random.RandomState(seed)
+    covar = np.cov(state.normal(size=(3 * n_assets, n_assets)).T)
+    mean = state.normal(0.05, 0.02, (n_assets, 1))
+    return mean, covar, np.zeros((n_assets, 1)), np.full((n_assets, 1), upper)
+
+
+def test_cla():
+    """
+    Test the Critical Line Algorithm: turning points of CLA_Data.csv,
+    and of random problems, each the solution (KKT conditions) of the
+    mean-variance problem at its lambda, their max Sharpe ratio and
+    efficient frontier, and warm starts.
+    """
+    config = utilities.DEFAULT
+    data = np.genfromtxt(os.path.join(config.CSV_DATA_DIR, "CLA_Data.csv"), delimiter=",", skip_header=1)
+    cla = CLA.CLA(data[:1].T, data[3:], data[1:2].T, data[2:3].T)
+    cla.solve()
+    assert_equal(len(cla.w), 11)
+    assert_almost_equal(cla.get_max_sharpe()[0], 4.4535334766, places=8)
+    assert_almost_equal(float(cla.get_min_var()[0]), 0.2052376185, places=8)
+
+    for n_assets, upper, seed in [(5, 1.0, 0), (20, 0.25, 1), (60, 0.05, 2)]:
+        mean, covar, l_b, u_b = _random_cla_problem(n_assets, upper, seed)
+        cla = CLA.CLA(mean, covar, l_b, u_b)
+        cla.solve()
+        assert_equal(cla.l[-1], 0)
+        for w, l, f in zip(cla.w[1:], cla.l[1:], cla.f[1:]):
+            w = w.ravel()
+            assert_almost_equal(w.sum(), 1.0, places=10)
+            assert_true(((w >= -1e-12) & (w <= upper + 1e-12)).all())
+            # gradient of w.covar.w/2 - l * mean.w: equal on the free weights,
+            # not lower (higher) on the weights at their lower (upper) bound
+            gradient = np.dot(covar, w) - l * mean.ravel()
+            gamma = gradient[f].mean()
+            np.testing.assert_allclose(gradient[f], gamma, atol=1e-9)
+            bounded = np.ones(n_assets, dtype=bool)
+            bounded[f] = False
+            at_upper = bounded & (w > upper / 2)
+            assert_true((gradient[bounded & ~at_upper] >= gamma - 1e-9).all())
+            assert_true((gradient[at_upper] <= gamma + 1e-9).all())
+
+    # max Sharpe ratio (closed form) vs. a grid of each segment
+    grid = np.linspace(0, 1, 1001)
+    sharpe, w_sr = cla.get_max_sharpe()
+    for w0, w1 in zip(cla.w[:-1], cla.w[1:]):
+        w = w0 * grid + w1 * (1 - grid)
+        sr = np.dot(mean.T, w) / np.sqrt(np.einsum("ij,ij->j", w, np.dot(covar, w)))
+        assert_true(sr.max() <= sharpe + 1e-12)
+    assert_almost_equal(float(np.dot(mean.T, w_sr) / np.sqrt(np.dot(w_sr.T, np.dot(covar, w_sr)))), sharpe)
+
+    mu, sigma, weights = cla.eff_frontier(1000)
+    assert_equal(len(mu), (len(cla.w) - 1) * (1000 // len(cla.w) - 1) + 1)
+    np.testing.assert_allclose(weights[0], cla.w[0])
+    np.testing.assert_allclose(weights[-1], cla.w[-1])
+    w = np.hstack(weights)
+    np.testing.assert_allclose(mu, np.dot(mean.T, w).ravel())
+    np.testing.assert_allclose(sigma, np.sqrt(np.einsum("ij,ij->j", w, np.dot(covar, w))))
+
+    # warm start from the solution of a close problem: the same turning
+    # points from there (down to the max Sharpe ratio one, if so)
+    previous = cla
+    mean, covar = mean * 1.05, covar * 1.02
+    cold = CLA.CLA(mean, covar, l_b, u_b)
+    cold.solve()
+    for max_sharpe in (False, True):
+        warm = CLA.CLA(mean, covar, l_b, u_b)
+        assert_true(warm.warm_start(previous, max_sharpe))
+        warm.solve(stop_at_max_sharpe=max_sharpe)
+        assert_true(warm.l[0] is not None and len(warm.w) < len(cold.w))
+        if max_sharpe:
+            assert_almost_equal(warm.get_max_sharpe()[0], cold.get_max_sharpe()[0], places=10)
+            np.testing.assert_allclose(warm.get_max_sharpe()[1], cold.get_max_sharpe()[1], atol=1e-10)
+        else:
+            np.testing.assert_allclose(warm.w[1:], cold.w[-len(warm.w) + 1:], atol=1e-10)
+    # nothing to start from
+    assert_true(not CLA.CLA(mean, covar, l_b, u_b).warm_start(CLA.CLA(mean, covar, l_b, u_b)))
+
+    # incremental inverse of the free assets' covariance matrix
+    mean, covar, l_b, u_b = _random_cla_problem(10, 1.0, 3)
+    free = CLA._FreeSet(covar, [4, 1])
+    for i in [7, 0, 9]:
+        free.add(i)
+    free.remove(1)
+    free.remove(9)
+    free.add(2)
+    assert_equal(free.f, [4, 7, 0, 2])
+    np.testing.assert_allclose(free.inv, np.linalg.inv(covar[np.ix_(free.f, free.f)]), atol=1e-10)
+    assert_true(not free.drifted())
+    schur = free.schur.copy()
+    free.refresh()
+    np.testing.assert_allclose(schur, free.schur, atol=1e-10)
+
+    solved = CLA.solve_batch(
+        [_random_cla_problem(20, 0.25, seed)[0] for seed in range(3)],
+        [_random_cla_problem(20, 0.25, seed)[1] for seed in range(3)],
+        np.zeros((20, 1)), np.full((20, 1), 0.25)
+    )
+    for seed, cla in enumerate(solved):
+        mean, covar, l_b, u_b = _random_cla_problem(20, 0.25, seed)
+        single = CLA.CLA(mean, covar, l_b, u_b)
+        single.solve()
+        np.testing.assert_allclose(np.hstack(cla.w), np.hstack(single.w))
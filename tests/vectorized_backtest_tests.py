@@ -0,0 +1,148 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Test harness checking that the VectorizedBacktest reproduces
+the event-driven Backtest on the sample data.
+"""
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import numpy as np
+import pandas as pd
+from nose.tools import assert_equal, assert_almost_equal
+
+from algo2 import utilities
+from algo2.utilities import queue
+from algo2.feeds.csv_files import HistoricCSVBarDataHandler
+from algo2.strategies.buy_and_hold import BuyAndHoldStrategy
+from algo2.strategies.moving_average_cross_xstocks import MovingAverageCrossStrategy
+from algo2.pos_sizers.naive import FixedPositionSizer
+from algo2.pos_refiners.naive import NaivePositionRefiner
+from algo2.portfolio_handler import PortfolioHandler
+from algo2.brokers.simulated_broker import IBSimulatedExecutionHandler
+from algo2.statistics.simple import SimpleStatistics
+from algo2.backtest import Backtest
+from algo2.vectorized_backtest import VectorizedBacktest, create_price_panel
+
+
+def _run_event_driven(tickers, create_strategy, batch_timestamps=False):
+    """
+    Runs the event-driven Backtest (as in samples) and returns
+    the results and the data handler.
+    """
+    config = utilities.DEFAULT
+    events_queue = queue.Queue()
+    initial_equity = 500000.00
+    data_handler = HistoricCSVBarDataHandler(config.CSV_DATA_DIR, events_queue, tickers)
+    strategy = create_strategy(tickers, events_queue)
+    position_sizer = FixedPositionSizer()
+    position_refiner = NaivePositionRefiner()
+    portfolio_handler = PortfolioHandler(
+        initial_equity, events_queue, data_handler,
+        position_sizer, position_refiner
+    )
+    broker = IBSimulatedExecutionHandler(events_queue, data_handler)
+    statistics = SimpleStatistics(config, portfolio_handler)
+    backtest = Backtest(
+        data_handler, strategy,
+        portfolio_handler, broker,
+        position_sizer, position_refiner,
+        statistics, initial_equity,
+        batch_timestamps=batch_timestamps
+    )
+    return backtest.simulate_trading(testing=True), data_handler
+
+
+def _buy_and_hold_signals(prices):
+    """
+    BuyAndHoldStrategy: long from the first bar of each ticker.
+    """
+    return prices.notnull().astype(float)
+
+
+def _mac_signals(prices, short_window, long_window):
+    """
+    MovingAverageCrossStrategy: goes long when the short moving
+    average crosses above the long one and flat when below,
+    once more than 'long_window' bars have been seen.
+    """
+    short_sma = prices.rolling(short_window).mean()
+    long_sma = prices.rolling(long_window).mean()
+    signals = pd.DataFrame(np.nan, index=prices.index, columns=prices.columns)
+    signals[short_sma > long_sma] = 1.0
+    signals[short_sma < long_sma] = 0.0
+    bars = prices.notnull().cumsum() - 1    # bar no. of each ticker
+    signals[bars <= long_window] = np.nan
+    signals.iloc[0] = signals.iloc[0].fillna(0.0)
+    return signals.ffill()
+
+
+def _check_same_results(expected, results):
+    for key in ["sharpe", "max_drawdown", "max_drawdown_pct", "CAGR"]:
+        assert_almost_equal(float(expected[key]), float(results[key]), places=4)
+    for key in ["equity", "drawdowns", "equity_returns"]:
+        assert_equal(len(expected[key]), len(results[key]))
+        np.testing.assert_allclose(
+            np.asarray(expected[key], dtype=float), results[key].values, atol=1e-6
+        )
+        assert_equal(list(expected[key].index[1:]), list(results[key].index[1:]))
+
+
+def test_vectorized_buy_and_hold():
+    tickers = ["SP500TR"]
+    expected, data_handler = _run_event_driven(tickers, BuyAndHoldStrategy)
+
+    prices = create_price_panel(data_handler.tickers_data)
+    backtest = VectorizedBacktest(prices, signals=_buy_and_hold_signals(prices))
+    results = backtest.simulate_trading()
+
+    assert_equal(backtest.fills, 1)
+    _check_same_results(expected, results)
+
+
+def test_vectorized_mac():
+    tickers = ["SP500TR"]
+    short_window, long_window = 100, 400
+
+    def create_strategy(tkrs, events_queue):
+        return MovingAverageCrossStrategy(tkrs, events_queue, short_window, long_window)
+    expected, data_handler = _run_event_driven(tickers, create_strategy)
+
+    prices = create_price_panel(data_handler.tickers_data)
+    signals = _mac_signals(prices, short_window, long_window)
+    backtest = VectorizedBacktest(prices, signals=signals)
+    results = backtest.simulate_trading()
+
+    assert_equal(backtest.fills > 0, True)
+    _check_same_results(expected, results)
+
+
+def test_batch_timestamps():
+    """
+    Test the Backtest in timestamp batch mode on 3 tickers: the
+    equity is sampled once per timestamp, marked at all the prices
+    of the timestamp after its fills, i.e. the vectorized cash plus
+    the positions held after each bar.
+    """
+    tickers = ["SPY", "AGG", "SP500TR"]
+    short_window, long_window = 50, 200
+
+    def create_strategy(tkrs, events_queue):
+        return MovingAverageCrossStrategy(tkrs, events_queue, short_window, long_window)
+
+    for create, signals in [
+        (BuyAndHoldStrategy, _buy_and_hold_signals),
+        (create_strategy, lambda p: _mac_signals(p, short_window, long_window))
+    ]:
+        results, data_handler = _run_event_driven(tickers, create, batch_timestamps=True)
+
+        prices = create_price_panel(data_handler.tickers_data)
+        backtest = VectorizedBacktest(prices, signals=signals(prices))
+        backtest.simulate_trading()
+        held = backtest.positions != 0
+        market_value = np.where(held, backtest.positions * backtest.price_array, 0.0)
+        expected = backtest.cash + market_value.sum(axis=1)
+
+        assert_equal(backtest.fills > 0, True)
+        assert_equal(list(results["equity"].index[1:]), list(prices.index))
+        np.testing.assert_allclose(results["equity"].values[1:], expected, atol=1e-6)